@@ -0,0 +1,50 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+import sys
+import time
+import threading
+
+
+class RecordingTyper:
+    """Records every text handed over by SerialReader with its arrival time"""
+    
+    def __init__(self, clock=time.perf_counter, delay=0.0, echo=False):
+        """
+        Initialize the typer.
+        
+        Args:
+            clock: Function returning the arrival timestamp (time.time to compare across processes)
+            delay: Seconds each call takes, simulating slow typing
+            echo: Also write every text to stdout
+        """
+        self.records = []
+        self.clock = clock
+        self.delay = delay
+        self.echo = echo
+        self.lock = threading.Lock()
+    
+    def type_text(self, text):
+        if self.delay:
+            time.sleep(self.delay)
+        now = self.clock()
+        with self.lock:
+            self.records.append((now, text))
+        if self.echo:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+    
+    @property
+    def texts(self):
+        """The recorded texts without their timestamps"""
+        with self.lock:
+            return [text for _, text in self.records]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of `values` (None if empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
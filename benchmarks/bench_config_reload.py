@@ -0,0 +1,177 @@
+"""
+Reload config.json repeatedly while scans stream through a virtual serial port.
+
+A writer thread sends Shift-JIS scans over a pty pair in randomly sized
+chunks (so records and multi-byte characters are split across reads) while
+the main thread rewrites a temporary config file, alternating baud rate,
+idle-gap timeout, encoding (shift_jis/cp932) and framer (lf / explicit
+terminator). Every few reloads an invalid file is written, which must be
+ignored. A ConfigWatcher feeds the changes to SerialReader.apply_config().
+
+Prints a JSON report with the number of reloads applied and rejected, the
+time from file write to the change being applied, and the records that were
+lost, duplicated or corrupted (all three must be 0). Runs headless on Linux.
+
+Usage:
+    python benchmarks/bench_config_reload.py [--scans 2000] [--reloads 50]
+"""
+import os
+import sys
+import pty
+import tty
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from loguru import logger
+from core.config import ConfigWatcher
+from core.serial_reader import SerialReader
+from _common import RecordingTyper
+
+
+def payloads(count, size, seed=1):
+    rng = random.Random(seed)
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789アイウエオ患者品番"
+    result = []
+    for seq in range(count):
+        text = f"{seq:06d}:"
+        while len(text.encode('shift_jis')) < size - 1:
+            text += rng.choice(alphabet)
+        result.append(text + "\n")
+    return result
+
+
+def serial_config(step):
+    """The serial section for reload number `step`"""
+    return {
+        'baudrate': (9600, 115200)[step % 2],
+        'timeout': (0.05, 0.2)[step // 2 % 2],
+        'encoding': ('shift_jis', 'cp932')[step // 3 % 2],
+        'framer': ('lf', 'terminator')[step // 5 % 2],
+        'terminator': '\n',
+        'read_mode': 'event',
+        'queue_size': 4096,
+        'auto_reconnect': False,
+        'dedup_window': 0,
+    }
+
+
+def write_config(path, config):
+    """Replace the file atomically, as an editor saving it would"""
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        if config is None:
+            f.write('{"serial": {"baudrate": -1')
+        else:
+            json.dump({'serial': config}, f)
+    os.replace(tmp, path)
+
+
+def run(args):
+    rng = random.Random(2)
+    texts = payloads(args.scans, args.size)
+    stream = b''.join(text.encode('shift_jis') for text in texts)
+    
+    typer = RecordingTyper()
+    reader = SerialReader(typer, serial_config(0))
+    master, slave = pty.openpty()
+    tty.setraw(master)
+    if not reader.connect(os.ttyname(slave)):
+        raise RuntimeError("could not open pty")
+    
+    def send():
+        pos = 0
+        while pos < len(stream):
+            size = rng.randint(1, args.max_chunk)
+            os.write(master, stream[pos:pos + size])
+            pos += size
+            time.sleep(args.chunk_delay)
+    
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'config.json')
+    write_config(path, serial_config(0))
+    watcher = ConfigWatcher(lambda config: reader.apply_config(config['serial']), path, args.poll_interval)
+    watcher.start()
+    
+    writer = threading.Thread(target=send)
+    writer.start()
+    
+    apply_latency = []
+    rejected = 0
+    step = 0
+    while writer.is_alive() and step < args.reloads:
+        step += 1
+        time.sleep(args.interval)
+        if step % 10 == 0:
+            write_config(path, None)
+            rejected += 1
+            continue
+        applied = reader.config_reloads
+        written = time.perf_counter()
+        write_config(path, serial_config(step))
+        deadline = written + 2.0
+        while reader.config_reloads == applied and time.perf_counter() < deadline:
+            time.sleep(0.001)
+        if reader.config_reloads != applied:
+            apply_latency.append(time.perf_counter() - written)
+    
+    writer.join()
+    deadline = time.time() + args.drain
+    while len(typer.records) < len(texts) and time.time() < deadline:
+        time.sleep(0.01)
+    watcher.stop()
+    reader.disconnect()
+    os.close(master)
+    
+    received = {}
+    corrupted = 0
+    for text in typer.texts:
+        try:
+            seq = int(text[:6])
+        except ValueError:
+            corrupted += 1
+            continue
+        if text != texts[seq]:
+            corrupted += 1
+        received[seq] = received.get(seq, 0) + 1
+    
+    apply_latency.sort()
+    return {
+        'scans': len(texts),
+        'received': len(typer.records),
+        'lost': sum(1 for seq in range(len(texts)) if seq not in received),
+        'duplicated': sum(count - 1 for count in received.values()),
+        'corrupted': corrupted,
+        'reloads_applied': reader.config_reloads,
+        'reloads_rejected': watcher.error_count,
+        'invalid_files_written': rejected,
+        'apply_latency_ms': {
+            'p50': round(apply_latency[len(apply_latency) // 2] * 1000, 2) if apply_latency else None,
+            'max': round(apply_latency[-1] * 1000, 2) if apply_latency else None,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scans", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=64, help="bytes per scan")
+    parser.add_argument("--max-chunk", type=int, default=48, help="largest write to the pty")
+    parser.add_argument("--chunk-delay", type=float, default=0.0005)
+    parser.add_argument("--reloads", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between config writes")
+    parser.add_argument("--poll-interval", type=float, default=0.01, help="ConfigWatcher poll interval")
+    parser.add_argument("--drain", type=float, default=5.0)
+    args = parser.parse_args()
+    
+    logger.remove()
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
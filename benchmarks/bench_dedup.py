@@ -0,0 +1,95 @@
+"""
+Cost and memory of the duplicate-scan filter.
+
+Lookup: time per is_duplicate() call for new and repeated payloads with the
+index holding a given number of live digests.
+
+Memory: simulates hours of scanning on a synthetic clock (default 5000
+scans/hour, 20% of them repeated within the window) and reports index size
+and traced memory after each hour; both must stay flat.
+
+Usage:
+    python benchmarks/bench_dedup.py [--hours 8] [--rate 5000] [--window 1.0]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from core.dedup import DuplicateFilter
+
+
+def payload(seq):
+    return f"{seq:08d}:患者ID-ABCDEFGHIJKLMNOPQRSTUVWXYZ-品番0123456789\n"
+
+
+def bench_lookup(live, calls, max_entries):
+    """ns per call for misses and hits with `live` digests inside the window"""
+    dedup = DuplicateFilter(window=3600.0, max_entries=max_entries)
+    for seq in range(live):
+        dedup.is_duplicate('port', payload(seq), 0.0)
+    
+    new = [payload(live + seq) for seq in range(calls)]
+    start = time.perf_counter()
+    for text in new:
+        dedup.is_duplicate('port', text, 1.0)
+    miss = (time.perf_counter() - start) / calls
+    
+    repeated = [payload(seq % max(live, 1)) for seq in range(calls)]
+    start = time.perf_counter()
+    for text in repeated:
+        dedup.is_duplicate('port', text, 2.0)
+    hit = (time.perf_counter() - start) / calls
+    
+    return {'live_entries': live, 'miss_ns': round(miss * 1e9), 'hit_ns': round(hit * 1e9)}
+
+
+def bench_memory(hours, rate, window, ports, max_entries):
+    """Index size and traced memory after each simulated hour"""
+    rng = random.Random(1)
+    dedup = DuplicateFilter(window=window, global_window=window, max_entries=max_entries)
+    interval = 3600.0 / rate
+    now = 0.0
+    seq = 0
+    report = []
+    
+    tracemalloc.start()
+    for hour in range(1, hours + 1):
+        for _ in range(rate):
+            port = f"port{rng.randrange(ports)}"
+            text = payload(seq)
+            dedup.is_duplicate(port, text, now)
+            if rng.random() < 0.2:
+                dedup.is_duplicate(port, text, now + rng.uniform(0, window * 0.9))
+            seq += 1
+            now += interval
+        current, _ = tracemalloc.get_traced_memory()
+        stats = dedup.get_stats()
+        report.append({'hour': hour, 'entries': stats['entries'], 'suppressed': stats['suppressed'], 'traced_kib': round(current / 1024, 1)})
+    tracemalloc.stop()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=int, default=8)
+    parser.add_argument("--rate", type=int, default=5000, help="scans per simulated hour")
+    parser.add_argument("--window", type=float, default=1.0)
+    parser.add_argument("--ports", type=int, default=4)
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--max-entries", type=int, default=1024)
+    args = parser.parse_args()
+    
+    print(json.dumps({
+        'lookup': [bench_lookup(live, args.calls, max(args.max_entries, live)) for live in (0, 100, 1000, 10000)],
+        'memory': bench_memory(args.hours, args.rate, args.window, args.ports, args.max_entries),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
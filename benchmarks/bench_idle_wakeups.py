@@ -0,0 +1,62 @@
+"""
+Measure idle wakeups per second of the serial read loop.
+
+Opens a pty pair, connects a SerialReader to the slave side and leaves the
+line idle for a few seconds in each read mode. Runs headless on Linux/macOS.
+
+Usage:
+    python benchmarks/bench_idle_wakeups.py [--seconds 3]
+"""
+import os
+import sys
+import pty
+import time
+import json
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from loguru import logger
+from core.serial_reader import SerialReader
+
+
+class NullTyper:
+    def type_text(self, text):
+        pass
+
+
+def measure(read_mode, seconds):
+    master, slave = pty.openpty()
+    reader = SerialReader(NullTyper(), {'read_mode': read_mode, 'timeout': 0.05})
+    try:
+        if not reader.connect(os.ttyname(slave)):
+            raise RuntimeError("could not open pty")
+        cpu_start = time.process_time()
+        wakeups_start = reader.wakeup_count
+        time.sleep(seconds)
+        wakeups = reader.wakeup_count - wakeups_start
+        cpu = time.process_time() - cpu_start
+    finally:
+        reader.disconnect()
+        os.close(master)
+        os.close(slave)
+    return {
+        'read_mode': read_mode,
+        'seconds': seconds,
+        'wakeups_per_second': wakeups / seconds,
+        'cpu_seconds': cpu,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    args = parser.parse_args()
+    
+    logger.remove()
+    results = [measure(mode, args.seconds) for mode in ('poll', 'event')]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Byte loss at high baud rates with the port read in-process or by the I/O
+process (serial.read_mode: event vs process).
+
+A device process plays the scanner: it streams records into a pty at the
+given baud rate and models the UART FIFO. Whenever the bytes waiting to be
+read would exceed `--fifo`, the excess is discarded (an overrun), just as
+the hardware FIFO loses bytes when the host does not drain it in time.
+Meanwhile the main process runs a "hog" thread that holds the GIL for
+`--hog-ms` every `--hog-interval` seconds (a sort, standing in for a Tk
+redraw or a long keyboard.type call).
+
+Reported per mode: bytes lost to overruns, records typed intact, the drop
+rate (records not typed intact) and the latency of intact records from the
+device writing their first byte to the typer call.
+
+Usage:
+    python benchmarks/bench_io_process.py [--baud 115200] [--fifo 128] [--seconds 3]
+                                          [--size 64] [--hog-ms 30] [--hog-interval 0.1]
+"""
+import os
+import sys
+import pty
+import tty
+import json
+import time
+import fcntl
+import random
+import struct
+import termios
+import argparse
+import threading
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from loguru import logger
+from core.serial_reader import SerialReader
+from _common import RecordingTyper, percentile
+
+
+def make_record(seq, size):
+    """A record of `size` bytes: sequence number, send time, padding, newline"""
+    head = f"{seq:06d}:{time.time():.6f}:".encode()
+    return head + b'X' * (size - len(head) - 1) + b'\n'
+
+
+def queued(fd):
+    return struct.unpack('i', fcntl.ioctl(fd, termios.FIONREAD, b'\0\0\0\0'))[0]
+
+
+def device(master, slave, baud, fifo, seconds, size):
+    """Stream records at `baud` into the pty, dropping what overflows the FIFO"""
+    rate = baud / 10.0
+    start = time.time()
+    pending = b''
+    seq = sent = overrun = 0
+    
+    while True:
+        elapsed = time.time() - start
+        if elapsed >= seconds and not pending:
+            break
+        budget = int(elapsed * rate) - sent - overrun
+        while budget > 0:
+            if not pending:
+                if elapsed >= seconds:
+                    break
+                pending = make_record(seq, size)
+                seq += 1
+            chunk, pending = pending[:budget], pending[budget:]
+            budget -= len(chunk)
+            written = min(len(chunk), max(0, fifo - queued(slave)))
+            if written:
+                os.write(master, chunk[:written])
+            sent += written
+            overrun += len(chunk) - written
+        time.sleep(0.0005)
+    
+    print(json.dumps({'records': seq, 'bytes_sent': sent, 'bytes_overrun': overrun}), flush=True)
+
+
+def hog(stop, hog_ms, interval):
+    """Hold the GIL for about `hog_ms` every `interval` seconds"""
+    if not hog_ms:
+        return
+    data = list(range(100000))
+    random.shuffle(data)
+    start = time.perf_counter()
+    sorted(data)
+    n = max(1000, int(len(data) * hog_ms / 1000.0 / (time.perf_counter() - start)))
+    data = list(range(n))
+    random.shuffle(data)
+    while not stop.wait(interval):
+        sorted(data)
+
+
+def run(mode, args):
+    # Wall-clock arrival times, compared with the send times of the device process
+    typer = RecordingTyper(clock=time.time)
+    reader = SerialReader(typer, {
+        'read_mode': mode, 'dedup_window': 0, 'baudrate': args.baud, 'queue_size': 100000, 'timeout': 0.05
+    })
+    master, slave = pty.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    if not reader.connect(os.ttyname(slave)):
+        raise RuntimeError("could not open pty")
+    
+    stop = threading.Event()
+    hogger = threading.Thread(target=hog, args=(stop, args.hog_ms, args.hog_interval), daemon=True)
+    hogger.start()
+    
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--device', str(master), str(slave),
+         '--baud', str(args.baud), '--fifo', str(args.fifo), '--seconds', str(args.seconds), '--size', str(args.size)],
+        pass_fds=(master, slave), capture_output=True, text=True
+    )
+    stop.set()
+    time.sleep(0.3)
+    reader.wait_idle(5.0)
+    stats = reader.get_stats()
+    reader.disconnect()
+    if reader.io_process is not None:
+        reader.io_process.stop()
+    os.close(master)
+    os.close(slave)
+    
+    sent = json.loads(proc.stdout)
+    intact = []
+    for when, text in typer.records:
+        parts = text.split(':')
+        if len(parts) == 3:
+            head = f"{parts[0]}:{parts[1]}:"
+            if text == head + 'X' * (args.size - len(head) - 1) + '\n':
+                intact.append((when - float(parts[1])) * 1000)
+    
+    result = {
+        'read_mode': mode,
+        'records_sent': sent['records'],
+        'records_intact': len(intact),
+        'drop_rate': round(1 - len(intact) / sent['records'], 4) if sent['records'] else None,
+        'bytes_overrun': sent['bytes_overrun'],
+        'latency_p50_ms': round(percentile(intact, 50), 2) if intact else None,
+        'latency_p99_ms': round(percentile(intact, 99), 2) if intact else None,
+    }
+    if 'ring_dropped' in stats:
+        result['ring_dropped'] = stats['ring_dropped']
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--fifo", type=int, default=128, help="bytes the emulated UART FIFO holds")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--size", type=int, default=64, help="bytes per record")
+    parser.add_argument("--hog-ms", type=float, default=30.0, help="GIL hold time per hog (0 disables)")
+    parser.add_argument("--hog-interval", type=float, default=0.1)
+    parser.add_argument("--device", nargs=2, type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.device:
+        device(*args.device, args.baud, args.fifo, args.seconds, args.size)
+        return
+    
+    logger.remove()
+    print(json.dumps([run(mode, args) for mode in ('event', 'process')], indent=2))
+
+
+if __name__ == "__main__":
+    main()
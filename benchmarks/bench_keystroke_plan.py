@@ -0,0 +1,94 @@
+"""
+Compare cached keystroke-plan replay with the line-by-line typing path.
+
+Drives MacTyper with a mock controller (no real key events) over a working set
+of repeated payloads, with and without the plan cache. Requires pynput to be
+importable.
+
+Usage:
+    python benchmarks/bench_keystroke_plan.py [--payloads 300] [--scans 20000]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from loguru import logger
+from platform_mac.mac_typing import MacTyper
+
+
+class MockController:
+    """
+    Accepts key events without sending them anywhere. type() mirrors what
+    pynput's Controller.type does per character before pressing.
+    """
+    
+    CONTROL_CODES = {'\n': 'enter', '\r': 'enter', '\t': 'tab'}
+    
+    def __init__(self):
+        self.events = 0
+    
+    def press(self, key):
+        self.events += 1
+    
+    def release(self, key):
+        self.events += 1
+    
+    def type(self, text):
+        for i, char in enumerate(text):
+            key = self.CONTROL_CODES.get(char, char)
+            try:
+                self.press(key)
+                self.release(key)
+            except ValueError:
+                raise ValueError(i, char)
+
+
+def make_payloads(count, seed=1):
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(count):
+        lines = [f"患者ID:{rng.randrange(10 ** 8):08d}", f"品番 ABC-{i:05d}", "ロット" + "X" * rng.randrange(5, 40)]
+        payloads.append("\n".join(lines) + "\n")
+    return payloads
+
+
+def run(cache_size, payloads, scans, seed=2):
+    controller = MockController()
+    typer = MacTyper({'line_delay': 0.0, 'plan_cache_size': cache_size}, controller=controller)
+    rng = random.Random(seed)
+    sequence = [rng.choice(payloads) for _ in range(scans)]
+    
+    start = time.perf_counter()
+    for text in sequence:
+        typer.type_text(text)
+    elapsed = time.perf_counter() - start
+    
+    return {
+        'plan_cache_size': cache_size,
+        'scans': scans,
+        'seconds': elapsed,
+        'us_per_scan': elapsed * 1e6 / scans,
+        'key_events': controller.events,
+        'stats': typer.get_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--payloads', type=int, default=300)
+    parser.add_argument('--scans', type=int, default=20000)
+    args = parser.parse_args()
+    
+    logger.remove()
+    payloads = make_payloads(args.payloads)
+    results = [run(size, payloads, args.scans) for size in (0, 512)]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
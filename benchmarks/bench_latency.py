@@ -0,0 +1,210 @@
+"""
+End-to-end benchmark: bytes written to a virtual serial port -> text handed to the typer.
+
+Creates a pty pair (or uses pyserial's loop:// port), drives a real SerialReader
+with a recording fake typer and replays synthetic or captured scan traffic,
+paced to the chosen baud rate. Prints a JSON report with latency percentiles,
+records per second, CPU time and dropped/corrupted records. Runs headless on Linux.
+
+Latency is reported twice:
+    from_first_byte: first byte of the scan written -> typer called
+    from_last_byte:  terminator written -> typer called (pipeline overhead)
+
+Usage:
+    python benchmarks/bench_latency.py --baud 9600 --size 128 --gap 0.05 --scans 200
+    python benchmarks/bench_latency.py --payload-file scans.txt --output report.json
+"""
+import os
+import sys
+import pty
+import tty
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from loguru import logger
+from core.serial_reader import SerialReader
+from core.metrics import Metrics
+from _common import RecordingTyper, percentile
+
+
+def synthetic_payloads(count, size, seed=1):
+    """Shift-JIS scans of roughly `size` bytes, each tagged with a sequence number"""
+    rng = random.Random(seed)
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789アイウエオ患者品番"
+    payloads = []
+    for seq in range(count):
+        text = f"{seq:06d}:"
+        while len(text.encode('shift_jis')) < size - 1:
+            text += rng.choice(alphabet)
+        payloads.append(text + "\n")
+    return payloads
+
+
+def file_payloads(path, count):
+    """Scans read one per line from a UTF-8 text file, tagged with sequence numbers"""
+    with open(path, encoding='utf-8') as f:
+        lines = [line.rstrip('\n') for line in f if line.strip()]
+    return [f"{seq:06d}:{lines[seq % len(lines)]}\n" for seq in range(count)]
+
+
+def write_paced(write, data, baud, chunk):
+    """
+    Write data in chunks, sleeping for the time the bytes would take on the wire.
+    
+    Returns:
+        perf_counter() timestamp of the write that carried the last byte
+    """
+    byte_time = 10.0 / baud
+    last_write = None
+    for i in range(0, len(data), chunk):
+        piece = data[i:i + chunk]
+        write(piece)
+        last_write = time.perf_counter()
+        time.sleep(len(piece) * byte_time)
+    return last_write
+
+
+def run(args):
+    encoding = 'shift_jis'
+    if args.payload_file:
+        payloads = file_payloads(args.payload_file, args.scans)
+    else:
+        payloads = synthetic_payloads(args.scans, args.size)
+    encoded = [p.encode(encoding) for p in payloads]
+    
+    typer = RecordingTyper()
+    metrics = Metrics(enabled=args.metrics)
+    reader = SerialReader(typer, {
+        'baudrate': args.baud,
+        'timeout': args.idle_gap,
+        'encoding': encoding,
+        'framer': args.framer,
+        'read_mode': args.read_mode,
+        'queue_size': args.queue_size,
+        'queue_policy': args.queue_policy,
+        'dedup_window': 0,
+    }, metrics)
+    
+    master = slave = None
+    if args.transport == 'pty':
+        master, slave = pty.openpty()
+        tty.setraw(master)
+        device = os.ttyname(slave)
+        write = lambda data: os.write(master, data)
+    else:
+        device = 'loop://'
+    
+    if not reader.connect(device):
+        raise RuntimeError(f"could not open {device}")
+    if args.transport == 'loop':
+        port = reader.sessions[device].serial_port
+        write = port.write
+    
+    sent = []
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    try:
+        for data in encoded:
+            first = time.perf_counter()
+            last = write_paced(write, data, args.baud, args.chunk)
+            sent.append((first, last))
+            if args.gap:
+                time.sleep(args.gap)
+        
+        deadline = time.perf_counter() + args.drain
+        while time.perf_counter() < deadline and len(typer.records) < len(encoded):
+            time.sleep(0.01)
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        stats = reader.get_stats()
+        reader.disconnect()
+        if master is not None:
+            os.close(master)
+            os.close(slave)
+    
+    received = {}
+    corrupted = 0
+    for when, text in typer.records:
+        seq_text, _, _ = text.partition(':')
+        try:
+            seq = int(seq_text)
+        except ValueError:
+            corrupted += 1
+            continue
+        if seq >= len(payloads) or text != payloads[seq]:
+            corrupted += 1
+            continue
+        received.setdefault(seq, when)
+    
+    from_first = [(received[seq] - sent[seq][0]) * 1000 for seq in received]
+    from_last = [(received[seq] - sent[seq][1]) * 1000 for seq in received]
+    
+    def summary(values):
+        return {
+            'p50_ms': percentile(values, 50),
+            'p95_ms': percentile(values, 95),
+            'p99_ms': percentile(values, 99),
+            'max_ms': max(values) if values else None,
+        }
+    
+    return {
+        'config': {
+            'transport': args.transport,
+            'baud': args.baud,
+            'payload_bytes': sum(len(d) for d in encoded) / len(encoded),
+            'scans': len(encoded),
+            'gap_s': args.gap,
+            'framer': args.framer,
+            'read_mode': args.read_mode,
+            'metrics': args.metrics,
+        },
+        'latency_from_first_byte': summary(from_first),
+        'latency_from_last_byte': summary(from_last),
+        'records_sent': len(encoded),
+        'records_received': len(received),
+        'records_dropped': len(encoded) - len(received),
+        'records_corrupted': corrupted,
+        'records_per_second': len(received) / wall if wall else None,
+        'wall_seconds': wall,
+        'cpu_seconds': cpu,
+        'reader_stats': stats,
+        'metrics': metrics.snapshot() if args.metrics else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transport', choices=['pty', 'loop'], default='pty')
+    parser.add_argument('--baud', type=int, default=115200)
+    parser.add_argument('--size', type=int, default=128, help='synthetic payload size in bytes')
+    parser.add_argument('--scans', type=int, default=200)
+    parser.add_argument('--gap', type=float, default=0.02, help='seconds between scans')
+    parser.add_argument('--chunk', type=int, default=32, help='bytes per paced write')
+    parser.add_argument('--payload-file', help='UTF-8 file with one captured scan per line')
+    parser.add_argument('--idle-gap', type=float, default=0.05, help='SerialReader idle-gap timeout')
+    parser.add_argument('--framer', default='lf')
+    parser.add_argument('--read-mode', choices=['event', 'poll'], default='event')
+    parser.add_argument('--queue-size', type=int, default=64)
+    parser.add_argument('--queue-policy', default='block')
+    parser.add_argument('--metrics', action='store_true', help='enable hot-path instrumentation')
+    parser.add_argument('--drain', type=float, default=2.0, help='seconds to wait for stragglers')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+    
+    logger.remove()
+    report = run(args)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Records per second through SerialReader with different logging setups.
+
+Feeds records through a virtual port (framing, decoding, queueing, a typer
+that logs like MacTyper) as fast as possible and compares:
+    off           no log handler
+    sync-debug    loguru's own file sink at DEBUG (writes on the calling thread)
+    batched-debug BatchedFileSink at DEBUG
+    batched-info  BatchedFileSink at INFO (payload debug lines are never formatted)
+
+Usage:
+    python benchmarks/bench_logging.py [--records 20000] [--size 128]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from loguru import logger
+from core.serial_reader import SerialReader
+from core.log_sink import BatchedFileSink
+
+FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}"
+
+
+class LoggingTyper:
+    """Counts records and logs one INFO line per record, as MacTyper does"""
+    
+    def __init__(self):
+        self.records = 0
+    
+    def type_text(self, text):
+        self.records += 1
+        logger.info("Successfully typed text ({} characters)", len(text))
+
+
+def run(mode, records, payload, directory):
+    logger.remove()
+    log_path = os.path.join(directory, f"{mode}.log")
+    sink = None
+    if mode == 'sync-debug':
+        logger.add(log_path, level="DEBUG", format=FORMAT)
+    elif mode.startswith('batched'):
+        sink = BatchedFileSink(log_path)
+        logger.add(sink, level="DEBUG" if mode == 'batched-debug' else "INFO", format=FORMAT)
+    
+    typer = LoggingTyper()
+    reader = SerialReader(typer, {'queue_size': 1024, 'dedup_window': 0})
+    session = reader.open_virtual_port('bench')
+    
+    start = time.perf_counter()
+    for _ in range(records):
+        reader.feed(session, payload)
+    reader.wait_idle()
+    elapsed = time.perf_counter() - start
+    
+    logger.remove()
+    return {
+        'mode': mode,
+        'records': typer.records,
+        'seconds': elapsed,
+        'records_per_second': typer.records / elapsed,
+        'write_batches': sink.batches if sink else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--size', type=int, default=128)
+    args = parser.parse_args()
+    
+    payload = ("患者ID" + "X" * args.size).encode('shift_jis')[:args.size - 1] + b'\n'
+    with tempfile.TemporaryDirectory() as directory:
+        results = [
+            run(mode, args.records, payload, directory)
+            for mode in ('off', 'sync-debug', 'batched-debug', 'batched-info')
+        ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
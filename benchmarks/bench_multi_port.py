@@ -0,0 +1,94 @@
+"""
+Measure CPU cost and per-port throughput/latency as scanners are added.
+
+Opens N pty pairs, connects one SerialReader to all of them and feeds every
+port the same scan traffic. CPU time should stay roughly flat per scan as N
+grows since all ports share one selector thread. Runs headless on Linux/macOS.
+
+Usage:
+    python benchmarks/bench_multi_port.py [--ports 1 2 4 8] [--seconds 3] [--rate 20]
+"""
+import os
+import sys
+import pty
+import tty
+import time
+import json
+import argparse
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from loguru import logger
+from core.serial_reader import SerialReader
+
+
+class CountingTyper:
+    def __init__(self):
+        self.records = 0
+    
+    def type_text(self, text):
+        self.records += 1
+
+
+def feed(masters, seconds, rate, payload):
+    interval = 1.0 / rate
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        for master in masters:
+            os.write(master, payload)
+        time.sleep(interval)
+
+
+def measure(port_count, seconds, rate, payload):
+    pairs = [pty.openpty() for _ in range(port_count)]
+    for master, _ in pairs:
+        tty.setraw(master)
+    
+    typer = CountingTyper()
+    reader = SerialReader(typer, {'timeout': 0.05, 'dedup_window': 0})
+    try:
+        if not reader.connect_all([os.ttyname(slave) for _, slave in pairs]):
+            raise RuntimeError("could not open ptys")
+        
+        cpu_start = time.process_time()
+        wakeups_start = reader.wakeup_count
+        writer = threading.Thread(target=feed, args=([m for m, _ in pairs], seconds, rate, payload))
+        writer.start()
+        writer.join()
+        time.sleep(0.2)
+        cpu = time.process_time() - cpu_start
+        port_stats = reader.get_port_stats()
+        wakeups = reader.wakeup_count - wakeups_start
+    finally:
+        reader.disconnect()
+        for master, slave in pairs:
+            os.close(master)
+            os.close(slave)
+    
+    return {
+        'ports': port_count,
+        'records': typer.records,
+        'cpu_seconds': cpu,
+        'cpu_ms_per_record': cpu * 1000 / typer.records if typer.records else None,
+        'wakeups': wakeups,
+        'per_port': port_stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--ports', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--rate', type=float, default=20.0, help='scans per second per port')
+    parser.add_argument('--size', type=int, default=64, help='payload bytes per scan')
+    args = parser.parse_args()
+    
+    logger.remove()
+    payload = b'X' * (args.size - 1) + b'\n'
+    results = [measure(n, args.seconds, args.rate, payload) for n in args.ports]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Reconnect after a scanner is unplugged in the middle of a record.
+
+Each cycle plays a USB glitch on a pty reached through a symlink, the way a
+scanner appears under a stable /dev path: "HELLO-" is sent, the pty is
+closed and the symlink removed (unplug) within the idle-gap `--timeout`, and
+after `--unplugged` seconds a
+new pty is created behind the same symlink (replug) and "WORLD\\n" is sent.
+The reader's supervisor must reopen the port on its own and keep the
+partial record, so every cycle has to type exactly 'HELLO-WORLD\\n'.
+
+Reported: cycles whose text arrived intact, the time from the replug to the
+port being connected again (bounded by the reconnect backoff schedule), and
+the reader's reconnect counter.
+
+Usage:
+    python benchmarks/bench_reconnect.py [--cycles 5] [--unplugged 0.7] [--timeout 0.3]
+                                         [--initial-delay 0.5] [--max-delay 10]
+"""
+import os
+import sys
+import pty
+import tty
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from loguru import logger
+from core.metrics import Metrics
+from core.serial_reader import SerialReader
+from _common import RecordingTyper
+
+EXPECTED = 'HELLO-WORLD\n'
+
+
+def plug(link):
+    """Create a pty and point `link` at its slave side"""
+    master, slave = pty.openpty()
+    tty.setraw(master)
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.ttyname(slave), link)
+    return master, slave
+
+
+def unplug(link, master, slave):
+    os.close(master)
+    os.close(slave)
+    os.remove(link)
+
+
+def wait_until(condition, timeout):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--unplugged", type=float, default=0.7, help="seconds the scanner stays unplugged")
+    parser.add_argument("--timeout", type=float, default=0.3, help="idle-gap timeout in seconds")
+    parser.add_argument("--initial-delay", type=float, default=0.5, help="reconnect_initial_delay")
+    parser.add_argument("--max-delay", type=float, default=10.0, help="reconnect_max_delay")
+    args = parser.parse_args()
+    
+    logger.remove()
+    typer = RecordingTyper()
+    metrics = Metrics(enabled=True)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        link = os.path.join(directory, 'scanner0')
+        master, slave = plug(link)
+        reader = SerialReader(typer, {
+            'framer': 'lf', 'dedup_window': 0, 'spool_path': None, 'encoding_detect': False, 'timeout': args.timeout,
+            'reconnect_initial_delay': args.initial_delay, 'reconnect_max_delay': args.max_delay
+        }, metrics)
+        if not reader.connect(link):
+            raise RuntimeError("could not open pty")
+        
+        intact, reconnect_ms, texts = 0, [], []
+        for _ in range(args.cycles):
+            typer.records.clear()
+            os.write(master, b'HELLO-')
+            time.sleep(0.05)
+            unplug(link, master, slave)
+            if not wait_until(lambda: reader.is_reconnecting, 5.0):
+                raise RuntimeError("reader did not notice the unplug")
+            time.sleep(args.unplugged)
+            
+            master, slave = plug(link)
+            replugged = time.perf_counter()
+            if not wait_until(lambda: reader.is_connected, args.max_delay + 5.0):
+                raise RuntimeError("reader did not reconnect")
+            reconnect_ms.append((time.perf_counter() - replugged) * 1000)
+            
+            os.write(master, b'WORLD\n')
+            wait_until(lambda: typer.records, 2.0)
+            reader.wait_idle(2.0)
+            text = ''.join(typer.texts)
+            texts.append(text)
+            intact += text == EXPECTED
+        
+        reader.disconnect()
+        os.close(master)
+        os.close(slave)
+    
+    print(json.dumps({
+        'cycles': args.cycles,
+        'intact': intact,
+        'texts': sorted(set(texts)),
+        'reconnect_ms': {
+            'median': round(statistics.median(reconnect_ms), 1),
+            'max': round(max(reconnect_ms), 1),
+        },
+        'reconnects': metrics.snapshot()['counters']['reconnects'],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
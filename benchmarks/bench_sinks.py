@@ -0,0 +1,131 @@
+"""
+Throughput of the non-keyboard output sinks.
+
+Writes synthetic decoded records straight into each sink (the role SerialReader's
+typer thread plays) and measures records per second until everything is
+written, plus the number of batches the writer thread needed:
+    file          FileSink with fsync after every batch
+    file-nofsync  FileSink without fsync
+    stdout-jsonl  StreamSink writing JSON lines to /dev/null
+    unix-socket   UnixSocketSink to a local reader thread
+    http          HttpPostSink to a local keep-alive HTTP/1.1 server
+    multi         file + unix-socket at once through MultiSink
+
+Usage:
+    python benchmarks/bench_sinks.py [--records 50000] [--size 64] [--max-batch 256]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from loguru import logger
+from core.serial_reader import Record
+from core.sinks import FileSink, StreamSink, UnixSocketSink, HttpPostSink, MultiSink
+
+
+class PostHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    received = 0
+    
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        PostHandler.received += body.count(b'\n')
+        self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+    
+    def log_message(self, *args):
+        pass
+
+
+def unix_reader(path):
+    """Accept one connection on a Unix socket and discard what it receives"""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    
+    def serve():
+        conn, _ = server.accept()
+        while conn.recv(65536):
+            pass
+        conn.close()
+        server.close()
+    threading.Thread(target=serve, daemon=True).start()
+
+
+def records(count, size):
+    now = time.time()
+    text = "患者ID" + "X" * max(0, size - 8)
+    return [Record('/dev/ttyUSB0', f"{seq:06d}{text}\n", now, now, now) for seq in range(count)]
+
+
+def measure(name, sink, batch):
+    start = time.perf_counter()
+    for record in batch:
+        sink.write_record(record)
+    sink.flush(timeout=60)
+    elapsed = time.perf_counter() - start
+    stats = sink.get_stats()
+    sink.close()
+    if isinstance(sink, MultiSink):
+        stats = {'batches': sum(s['batches'] for s in stats.values()), 'errors': sum(s['errors'] for s in stats.values())}
+    return {
+        'sink': name,
+        'records_per_second': round(len(batch) / elapsed),
+        'batches': stats['batches'],
+        'errors': stats['errors'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=50000)
+    parser.add_argument('--size', type=int, default=64, help='characters per record')
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--flush-interval', type=float, default=0.2)
+    args = parser.parse_args()
+    
+    logger.remove()
+    batch = records(args.records, args.size)
+    options = {'max_batch': args.max_batch, 'flush_interval': args.flush_interval}
+    
+    http_server = ThreadingHTTPServer(('127.0.0.1', 0), PostHandler)
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        results.append(measure('file', FileSink(os.path.join(directory, 'fsync.txt'), True, **options), batch))
+        results.append(measure('file-nofsync', FileSink(os.path.join(directory, 'plain.txt'), False, **options), batch))
+        
+        with open(os.devnull, 'wb') as devnull:
+            results.append(measure('stdout-jsonl', StreamSink(devnull, jsonl=True, **options), batch))
+        
+        path = os.path.join(directory, 'sink.sock')
+        unix_reader(path)
+        results.append(measure('unix-socket', UnixSocketSink(path, **options), batch))
+        
+        url = f"http://127.0.0.1:{http_server.server_port}/records"
+        http_sink = HttpPostSink(url, **options)
+        result = measure('http', http_sink, batch)
+        result['connections_opened'] = http_sink.connections_opened
+        results.append(result)
+        
+        path = os.path.join(directory, 'multi.sock')
+        unix_reader(path)
+        multi = MultiSink([FileSink(os.path.join(directory, 'multi.txt'), True, **options), UnixSocketSink(path, **options)])
+        results.append(measure('multi', multi, batch))
+    
+    http_server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Cost and crash safety of the record spool (serial.spool_path).
+
+Latency: scans written to a pty one at a time; time from writing the scan to
+the typer call, with the spool off and with each spool_sync mode. Modes are
+run in interleaved rounds and the median of each percentile is reported, so
+machine drift does not favour one mode. The journal should add no more than
+a write() per record, far below the milliseconds typing takes.
+
+Burst: scans written back to back at full speed; records/s and how many
+journal writes and fsyncs they needed (group commit: far fewer than records).
+
+Crash: a child process reads scans through a slow typer and is killed with
+SIGKILL part-way; a new reader recovers the journal and replays it. Every
+scan must be typed exactly once across both runs (only a kill between the
+typer returning and its DONE entry being written can replay a scan). Two
+cases: `burst` sends every scan at once and is killed a third of the way
+through typing them; `slow_typer` sends scans while the typer is still busy
+with the first one and is killed before it returns, so the later scans are
+only safe if the background commit wrote them within spool_sync_interval.
+
+Usage:
+    python benchmarks/bench_spool.py [--scans 300] [--gap 0.01] [--rounds 3] [--burst 5000]
+"""
+import os
+import sys
+import pty
+import tty
+import json
+import time
+import statistics
+import signal
+import argparse
+import tempfile
+import threading
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from loguru import logger
+from core.serial_reader import SerialReader
+from _common import RecordingTyper, percentile
+
+MODES = ('off', 'never', 'interval', 'always')
+
+
+def make_reader(typer, mode, path, queue_size=64):
+    config = {'dedup_window': 0, 'queue_size': queue_size}
+    if mode != 'off':
+        config.update({'spool_path': path, 'spool_sync': mode})
+    return SerialReader(typer, config)
+
+
+def open_pty(reader):
+    master, slave = pty.openpty()
+    tty.setraw(master)
+    if not reader.connect(os.ttyname(slave)):
+        raise RuntimeError("could not open pty")
+    return master, slave
+
+
+def wait_for(typer, count, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline and len(typer.records) < count:
+        time.sleep(0.005)
+
+
+def close(reader, master, slave):
+    reader.disconnect()
+    if reader.spool is not None:
+        reader.spool.close()
+    os.close(master)
+    os.close(slave)
+
+
+def bench_latency(mode, scans, gap, directory):
+    typer = RecordingTyper()
+    reader = make_reader(typer, mode, os.path.join(directory, f"latency-{mode}.journal"))
+    master, slave = open_pty(reader)
+    
+    sent = []
+    for seq in range(scans):
+        sent.append(time.perf_counter())
+        os.write(master, f"{seq:06d}:SCAN-ABCDEFGHIJKLMNOPQRSTUVWXYZ\n".encode())
+        time.sleep(gap)
+    wait_for(typer, scans, 2.0)
+    
+    stats = reader.spool.get_stats() if reader.spool else None
+    close(reader, master, slave)
+    
+    latencies = [(when - sent[int(text[:6])]) * 1e6 for when, text in typer.records]
+    return {
+        'spool': mode,
+        'records': len(latencies),
+        'p50_us': round(percentile(latencies, 50)),
+        'p95_us': round(percentile(latencies, 95)),
+        'p99_us': round(percentile(latencies, 99)),
+        'spool_stats': stats,
+    }
+
+
+def bench_latency_rounds(scans, gap, rounds, directory):
+    """Median of each latency percentile over interleaved rounds of every mode"""
+    runs = {mode: [] for mode in MODES}
+    for _ in range(rounds):
+        for mode in MODES:
+            runs[mode].append(bench_latency(mode, scans, gap, directory))
+    
+    report = []
+    for mode, results in runs.items():
+        summary = {'spool': mode, 'records': sum(result['records'] for result in results)}
+        for key in ('p50_us', 'p95_us', 'p99_us'):
+            summary[key] = round(statistics.median(result[key] for result in results))
+        summary['spool_stats'] = results[-1]['spool_stats']
+        report.append(summary)
+    return report
+
+
+def bench_burst(mode, count, directory):
+    typer = RecordingTyper()
+    reader = make_reader(typer, mode, os.path.join(directory, f"burst-{mode}.journal"), queue_size=count)
+    master, slave = open_pty(reader)
+    
+    data = b''.join(f"{seq:06d}:SCAN-ABCDEFGHIJKLMNOPQRSTUVWXYZ\n".encode() for seq in range(count))
+    start = time.perf_counter()
+    writer = threading.Thread(target=lambda: os.write(master, data))
+    writer.start()
+    wait_for(typer, count, 30.0)
+    elapsed = time.perf_counter() - start
+    writer.join()
+    
+    stats = reader.spool.get_stats() if reader.spool else None
+    close(reader, master, slave)
+    return {
+        'spool': mode,
+        'records': len(typer.records),
+        'records_per_second': round(len(typer.records) / elapsed),
+        'spool_stats': stats,
+    }
+
+
+def crash_cases(count):
+    """Typer delay, gap between scans and time of the kill for each crash case"""
+    return {
+        'burst': (0.02, 0.0, count * 0.02 / 3),
+        'slow_typer': (count * 0.02, 0.01, count * 0.01 + 0.2),
+    }
+
+
+def crash_child(path, mode, case, count):
+    """Read `count` scans through a slow typer, then SIGKILL ourselves mid-stream"""
+    logger.remove()
+    delay, gap, kill_after = crash_cases(count)[case]
+    typer = RecordingTyper(delay=delay, echo=True)
+    reader = make_reader(typer, mode, path, queue_size=count)
+    master, _ = open_pty(reader)
+    start = time.perf_counter()
+    for seq in range(count):
+        os.write(master, f"{seq:06d}\n".encode())
+        if gap:
+            time.sleep(gap)
+    time.sleep(max(0.0, kill_after - (time.perf_counter() - start)))
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def bench_crash(mode, case, count, directory):
+    path = os.path.join(directory, f"crash-{case}-{mode}.journal")
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--crash-child', path, '--mode', mode,
+         '--case', case, '--burst', str(count)],
+        capture_output=True, text=True
+    )
+    before = result.stdout.split()
+    
+    typer = RecordingTyper()
+    reader = SerialReader(typer, {'spool_path': path, 'spool_sync': mode})
+    unfinished = reader.recover_spool('replay')
+    wait_for(typer, unfinished, 5.0)
+    reader.spool.close()
+    replayed = [text.strip() for text in typer.texts]
+    
+    typed = before + replayed
+    expected = {f"{seq:06d}" for seq in range(count)}
+    return {
+        'case': case,
+        'spool': mode,
+        'killed_by_signal': -result.returncode if result.returncode < 0 else None,
+        'typed_before_kill': len(before),
+        'replayed': len(replayed),
+        'lost': len(expected - set(typed)),
+        'duplicated': len(typed) - len(set(typed)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scans", type=int, default=300)
+    parser.add_argument("--gap", type=float, default=0.01, help="seconds between latency scans")
+    parser.add_argument("--rounds", type=int, default=3, help="interleaved latency rounds per mode")
+    parser.add_argument("--burst", type=int, default=5000)
+    parser.add_argument("--crash-scans", type=int, default=60)
+    parser.add_argument("--crash-child", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", default='interval', help=argparse.SUPPRESS)
+    parser.add_argument("--case", default='burst', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.crash_child:
+        crash_child(args.crash_child, args.mode, args.case, args.burst)
+        return
+    
+    logger.remove()
+    with tempfile.TemporaryDirectory() as directory:
+        print(json.dumps({
+            'latency': bench_latency_rounds(args.scans, args.gap, args.rounds, directory),
+            'burst': [bench_burst(mode, args.burst, directory) for mode in MODES],
+            'crash': [
+                bench_crash(mode, case, args.crash_scans, directory)
+                for case in crash_cases(args.crash_scans) for mode in MODES[1:]
+            ],
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
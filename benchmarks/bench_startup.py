@@ -0,0 +1,105 @@
+"""
+Cold-start time of QR2Key.
+
+Runs `src/main.py --headless --exit-when-ready` several times in fresh
+interpreters and reports the time until the daemon has made its first
+connection attempt, plus the cumulative `-X importtime` cost of the heaviest
+top-level modules. A second set of runs imports only core.serial_reader to
+show the cost of the scan path itself.
+
+MacTyper needs pynput; on machines without it, put a stand-in package on
+PYTHONPATH before running.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--top 10]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+
+def parse_importtime(stderr):
+    """Return {module: cumulative microseconds} for top-level imports"""
+    result = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|", 2)
+        if name.startswith("  "):
+            # Nested import; already included in its parent's cumulative time
+            continue
+        result[name.strip()] = max(result.get(name.strip(), 0), int(cumulative_us))
+    return result
+
+
+def run(args):
+    """Run one interpreter and return (wall seconds, reported ready seconds, import times)"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime"] + args,
+        cwd=SRC, capture_output=True, text=True, timeout=60
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed")
+    
+    ready = None
+    for line in proc.stdout.splitlines():
+        if line.startswith("ready "):
+            ready = float(line.split()[1])
+    return wall, ready, parse_importtime(proc.stderr)
+
+
+def summarize(samples):
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 2),
+        "min_ms": round(min(samples) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2),
+    }
+
+
+def measure(name, args, runs, top):
+    walls, readies, imports = [], [], {}
+    for _ in range(runs):
+        wall, ready, times = run(args)
+        walls.append(wall)
+        if ready is not None:
+            readies.append(ready)
+        for module, us in times.items():
+            imports.setdefault(module, []).append(us)
+    
+    heaviest = sorted(
+        ((module, statistics.median(values)) for module, values in imports.items()),
+        key=lambda item: item[1], reverse=True
+    )[:top]
+    result = {
+        "name": name,
+        "wall": summarize(walls),
+        "imports_ms": {module: round(us / 1000, 2) for module, us in heaviest},
+    }
+    if readies:
+        result["ready"] = summarize(readies)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="number of heaviest imports to report")
+    options = parser.parse_args()
+    
+    results = [
+        measure("headless", ["main.py", "--headless", "--exit-when-ready"], options.runs, options.top),
+        measure("serial_reader", ["-c", "import core.serial_reader"], options.runs, options.top),
+    ]
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Time to first keystroke and total completion time of large multi-line
+records with serial.stream_typing off, lines and chunks.
+
+Each record (`--lines` lines of `--line-bytes` bytes, Shift_JIS) is written
+to a pty at `--baud` as a real scanner would send it. The typer simulates
+keystroke cost like MacTyper: `--char-ms` per character plus the
+`--line-ms` pause after every line segment of each call. Reported per mode,
+as medians over `--records` records, from the first byte on the wire:
+
+    first_keystroke_ms   when the first text reached the typer
+    complete_ms          when the typer returned from the last text
+    typer_calls          type_text() calls per record
+
+Every mode must type exactly the same text (identical keystrokes).
+
+Usage:
+    python benchmarks/bench_streaming.py [--baud 9600] [--lines 40] [--line-bytes 50]
+                                         [--framer idle_gap] [--records 3]
+"""
+import os
+import sys
+import pty
+import tty
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from loguru import logger
+from core.serial_reader import SerialReader
+
+MODES = ('off', 'lines', 'chunks')
+FRAMES = {'idle_gap': (b'', b''), 'stx_etx': (b'\x02', b'\x03'), 'cr': (b'', b'\r')}
+
+
+class SimulatedTyper:
+    """Takes as long as typing would and records when each call started and ended"""
+    
+    def __init__(self, char_ms, line_ms):
+        self.char_delay = char_ms / 1000.0
+        self.line_delay = line_ms / 1000.0
+        self.calls = []
+    
+    def type_text(self, text):
+        start = time.perf_counter()
+        time.sleep(len(text) * self.char_delay + (text.count('\n') + 1) * self.line_delay)
+        self.calls.append((start, time.perf_counter(), text))
+        return True
+
+
+def make_payload(lines, line_bytes):
+    """Multi-line Shift_JIS text of about lines * line_bytes bytes"""
+    rows = []
+    for i in range(lines):
+        row = f"{i:03d} 患者ID ".encode('shift_jis')
+        rows.append(row + b'A' * max(0, line_bytes - len(row) - 1))
+    return b'\n'.join(rows)
+
+
+def send(master, data, baud):
+    """Write data at the pace of `baud` (10 bits per byte)"""
+    rate = baud / 10.0
+    start = time.perf_counter()
+    sent = 0
+    while sent < len(data):
+        due = min(len(data), int((time.perf_counter() - start) * rate) + 1)
+        if due > sent:
+            os.write(master, data[sent:due])
+            sent = due
+        time.sleep(0.001)
+
+
+def run(mode, args, payload):
+    typer = SimulatedTyper(args.char_ms, args.line_ms)
+    reader = SerialReader(typer, {
+        'dedup_window': 0, 'framer': args.framer, 'stream_typing': mode, 'timeout': args.gap,
+        'encoding_detect': False, 'spool_path': None
+    })
+    master, slave = pty.openpty()
+    tty.setraw(master)
+    if not reader.connect(os.ttyname(slave)):
+        raise RuntimeError("could not open pty")
+    
+    prefix, suffix = FRAMES[args.framer]
+    data = prefix + payload + suffix
+    first, complete, calls, texts = [], [], [], []
+    for _ in range(args.records):
+        typer.calls.clear()
+        start = time.perf_counter()
+        send(master, data, args.baud)
+        # Wait for the idle gap and for the typer to finish
+        time.sleep(args.gap * 2)
+        reader.wait_idle(60.0)
+        first.append((typer.calls[0][0] - start) * 1000)
+        complete.append((typer.calls[-1][1] - start) * 1000)
+        calls.append(len(typer.calls))
+        texts.append(''.join(text for _, _, text in typer.calls))
+        time.sleep(args.gap * 2)
+    
+    reader.disconnect()
+    os.close(master)
+    os.close(slave)
+    return {
+        'stream_typing': mode,
+        'first_keystroke_ms': round(statistics.median(first), 1),
+        'complete_ms': round(statistics.median(complete), 1),
+        'typer_calls': statistics.median(calls),
+    }, texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baud", type=int, default=9600)
+    parser.add_argument("--lines", type=int, default=40)
+    parser.add_argument("--line-bytes", type=int, default=50)
+    parser.add_argument("--framer", choices=sorted(FRAMES), default='idle_gap')
+    parser.add_argument("--gap", type=float, default=0.05, help="idle-gap timeout in seconds")
+    parser.add_argument("--char-ms", type=float, default=1.0, help="simulated typing time per character")
+    parser.add_argument("--line-ms", type=float, default=10.0, help="simulated pause after each line (line_delay)")
+    parser.add_argument("--records", type=int, default=3)
+    args = parser.parse_args()
+    
+    logger.remove()
+    payload = make_payload(args.lines, args.line_bytes)
+    results, typed = [], set()
+    for mode in MODES:
+        result, texts = run(mode, args, payload)
+        results.append(result)
+        typed.update(texts)
+    
+    print(json.dumps({
+        'record_bytes': len(payload),
+        'wire_ms': round(len(payload) * 10000.0 / args.baud, 1),
+        'identical_text': len(typed) == 1,
+        'results': results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
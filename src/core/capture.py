@@ -0,0 +1,192 @@
+import os
+import mmap
+import time
+import struct
+from loguru import logger
+
+MAGIC = b'QR2KCAP1'
+
+# kind, port index, wall-clock timestamp, payload length
+CHUNK_HEADER = struct.Struct('<BHdI')
+
+KIND_DATA = 1
+KIND_PORT = 2
+
+class CaptureWriter:
+    """
+    Appends raw serial chunks with timestamps to a binary trace file.
+    
+    File layout: an 8-byte magic followed by chunks, each a CHUNK_HEADER and
+    its payload. KIND_PORT chunks bind a port index to a device name (UTF-8
+    payload); KIND_DATA chunks hold bytes exactly as read from that port.
+    Writes go through a large userspace buffer that is flushed at most once
+    per `flush_interval`, so capturing costs the read thread one struct pack
+    and a memory copy per chunk.
+    """
+    
+    def __init__(self, path, flush_interval=1.0):
+        """
+        Open (or create) a trace file for appending.
+        
+        Args:
+            path: Trace file path
+            flush_interval: Maximum seconds between flushes to disk
+        """
+        self.path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.file = open(self.path, 'ab', buffering=256 * 1024)
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        self.flush_interval = flush_interval
+        self.last_flush = time.time()
+        self.ports = {}
+        logger.info(f"Capturing serial traffic to {self.path}")
+    
+    def write(self, device, data, timestamp=None):
+        """
+        Append one chunk read from a port.
+        
+        Args:
+            device: Port device path the bytes came from
+            data: Raw bytes
+            timestamp: Optional time.time() of the read
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        
+        index = self.ports.get(device)
+        if index is None:
+            index = len(self.ports)
+            self.ports[device] = index
+            name = device.encode('utf-8')
+            self.file.write(CHUNK_HEADER.pack(KIND_PORT, index, timestamp, len(name)))
+            self.file.write(name)
+        
+        self.file.write(CHUNK_HEADER.pack(KIND_DATA, index, timestamp, len(data)))
+        self.file.write(data)
+        
+        if timestamp - self.last_flush >= self.flush_interval:
+            self.file.flush()
+            self.last_flush = timestamp
+    
+    def close(self):
+        """Flush and close the trace file"""
+        try:
+            self.file.close()
+        except Exception as e:
+            logger.error(f"Error closing capture file: {e}")
+
+
+class CaptureReader:
+    """
+    Reads a trace file written by CaptureWriter through a memory map.
+    
+    Payloads are yielded as memoryview slices of the map, so iterating a trace
+    does not copy the captured bytes.
+    """
+    
+    def __init__(self, path):
+        """
+        Map a trace file.
+        
+        Args:
+            path: Trace file path
+        """
+        self.path = os.path.expanduser(path)
+        self.file = open(self.path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Not a QR2Key capture file: {self.path}")
+    
+    def __iter__(self):
+        """
+        Iterate over data chunks.
+        
+        Each payload memoryview is only valid until the next chunk is requested.
+        
+        Yields:
+            (timestamp, device, data) tuples, data being a memoryview
+        """
+        view = memoryview(self.map)
+        ports = {}
+        offset = len(MAGIC)
+        end = len(self.map)
+        
+        try:
+            while offset + CHUNK_HEADER.size <= end:
+                kind, index, timestamp, length = CHUNK_HEADER.unpack_from(self.map, offset)
+                offset += CHUNK_HEADER.size
+                if offset + length > end:
+                    logger.warning(f"Truncated chunk at end of {self.path}")
+                    break
+                start = offset
+                offset += length
+                
+                if kind == KIND_PORT:
+                    ports[index] = self.map[start:offset].decode('utf-8')
+                elif kind == KIND_DATA:
+                    payload = view[start:offset]
+                    try:
+                        yield timestamp, ports.get(index, f"port{index}"), payload
+                    finally:
+                        payload.release()
+        finally:
+            view.release()
+    
+    def close(self):
+        """Unmap and close the trace file"""
+        self.map.close()
+        self.file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def replay(path, reader, speed=1.0):
+    """
+    Feed a trace back through a SerialReader's framing, decoding and typing path.
+    
+    Idle-gap flushes are reproduced from the captured timestamps, so records
+    split exactly as they did on the original station regardless of speed.
+    Records carry the captured times too, so duplicate windows and latencies
+    are measured on the original timeline.
+    
+    Args:
+        path: Trace file path
+        reader: SerialReader to feed
+        speed: Playback speed multiplier; 0 replays as fast as possible
+    
+    Returns:
+        Number of chunks replayed
+    """
+    gap = reader.config.get('timeout', 0.05)
+    sessions = {}
+    last_seen = {}
+    previous = None
+    chunks = 0
+    
+    with CaptureReader(path) as trace:
+        for timestamp, device, data in trace:
+            if speed > 0 and previous is not None and timestamp > previous:
+                time.sleep((timestamp - previous) / speed)
+            previous = timestamp
+            
+            session = sessions.get(device)
+            if session is None:
+                session = sessions[device] = reader.open_virtual_port(device)
+            elif session.awaiting_gap and timestamp - last_seen[device] >= gap:
+                reader.flush_port(session, last_seen[device] + gap)
+            last_seen[device] = timestamp
+            
+            reader.feed(session, data, timestamp)
+            chunks += 1
+    
+    for device, session in sessions.items():
+        if session.awaiting_gap:
+            reader.flush_port(session, last_seen[device] + gap)
+    
+    return chunks
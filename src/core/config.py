@@ -0,0 +1,304 @@
+import os
+import json
+import codecs
+import threading
+from loguru import logger
+
+from core.framing import create_framer
+from core.transform import compile_pipeline
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
+
+DEFAULT_CONFIG = {
+    "serial": {
+        "baudrate": 9600,
+        "timeout": 0.05,
+        "encoding": "shift_jis",
+        "error_char": "�",
+        "read_mode": "event",
+        "io_ring_size": 1048576,
+        "queue_size": 64,
+        "queue_policy": "block",
+        "stream_typing": "off",
+        "framer": "lf",
+        "multi_port": False,
+        "ports": [],
+        "capture_path": None,
+        "port_poll_interval": 2.0,
+        "auto_reconnect": True,
+        "reconnect_initial_delay": 0.5,
+        "reconnect_max_delay": 10.0,
+        "dedup_window": 1.0,
+        "dedup_global_window": 0.0,
+        "transforms": [],
+        "encoding_detect": True,
+        "encoding_candidates": ["shift_jis", "cp932", "utf-8"],
+        "encoding_cache_path": "~/Library/Application Support/QR2Key/encodings.json",
+        "spool_path": "~/Library/Application Support/QR2Key/spool.journal",
+        "spool_sync": "interval",
+        "spool_sync_interval": 0.05,
+        "spool_max_bytes": 1048576,
+        "spool_replay": "ask"
+    },
+    "typing": {
+        "key_delay": 0.0,
+        "line_delay": 0.01,
+        "batch_size": 0,
+        "plan_cache_size": 256
+    },
+    "output": {
+        "sinks": [
+            {"type": "keyboard"}
+        ]
+    },
+    "metrics": {
+        "enabled": False,
+        "serve": True,
+        "port": 9464,
+        "unix_socket": None
+    },
+    "app": {
+        "log_path": "~/Library/Logs/QR2Key/app.log",
+        "log_level": "INFO",
+        "log_payload": "truncate",
+        "log_payload_max": 64,
+        "config_reload": True,
+        "config_poll_interval": 1.0,
+        "control_socket": "~/Library/Application Support/QR2Key/control.sock"
+    }
+}
+
+def apply_defaults(config):
+    """
+    Fill in every setting a configuration leaves out from DEFAULT_CONFIG.
+    
+    Sections are merged key by key, so DEFAULT_CONFIG is the one place a
+    default is defined; a key set to null in the file stays null (e.g.
+    `spool_path` to turn the journal off).
+    
+    Args:
+        config: Configuration dictionary as read from config.json
+    
+    Returns:
+        A new configuration dictionary
+    """
+    if not isinstance(config, dict):
+        return config
+    merged = json.loads(json.dumps(DEFAULT_CONFIG))
+    for section, values in config.items():
+        if isinstance(values, dict) and isinstance(merged.get(section), dict):
+            merged[section].update(values)
+        else:
+            merged[section] = values
+    return merged
+
+def read_config(path=CONFIG_PATH):
+    """
+    Read and validate a configuration file, filling in the defaults.
+    
+    Args:
+        path: Path to the JSON configuration file
+    
+    Returns:
+        The configuration dictionary
+    
+    Raises:
+        OSError, ValueError: If the file cannot be read, parsed or validated
+    """
+    with open(path, 'r') as f:
+        config = apply_defaults(json.load(f))
+    validate_config(config)
+    return config
+
+def load_config(path=CONFIG_PATH):
+    """Load configuration from config.json, falling back to the defaults"""
+    try:
+        config = read_config(path)
+        logger.info("Configuration loaded successfully")
+        return config
+    except Exception as e:
+        logger.error(f"Failed to load configuration: {e}")
+        return json.loads(json.dumps(DEFAULT_CONFIG))
+
+def _check_number(errors, section, key, minimum=0, integer=False, exclusive=False):
+    """Append an error if section[key] is present but not a number in range"""
+    if key not in section:
+        return
+    value = section[key]
+    kinds = (int,) if integer else (int, float)
+    if isinstance(value, bool) or not isinstance(value, kinds):
+        errors.append(f"{key} must be {'an integer' if integer else 'a number'}")
+    elif value < minimum or (exclusive and value == minimum):
+        errors.append(f"{key} must be {'>' if exclusive else '>='} {minimum}")
+
+def validate_config(config):
+    """
+    Check a configuration for values the reader or typer would reject at runtime.
+    
+    Args:
+        config: Configuration dictionary as read from config.json
+    
+    Raises:
+        ValueError: Listing every invalid setting
+    """
+    if not isinstance(config, dict) or not isinstance(config.get("serial"), dict):
+        raise ValueError("Configuration must contain a 'serial' section")
+    
+    errors = []
+    serial_config = config["serial"]
+    _check_number(errors, serial_config, "baudrate", integer=True, exclusive=True)
+    _check_number(errors, serial_config, "timeout", exclusive=True)
+    _check_number(errors, serial_config, "queue_size", integer=True)
+    _check_number(errors, serial_config, "io_ring_size", integer=True, minimum=4096)
+    _check_number(errors, serial_config, "encoding_detect_records", integer=True, minimum=1)
+    _check_number(errors, serial_config, "dedup_window")
+    _check_number(errors, serial_config, "dedup_global_window")
+    _check_number(errors, serial_config, "spool_sync_interval", exclusive=True)
+    _check_number(errors, serial_config, "spool_max_bytes", integer=True, exclusive=True)
+    port_windows = serial_config.get("dedup_port_windows") or {}
+    if not isinstance(port_windows, dict):
+        errors.append("dedup_port_windows must map ports to seconds")
+    else:
+        for port in port_windows:
+            _check_number(errors, port_windows, port)
+    
+    for encoding in [serial_config.get("encoding", "shift_jis")] + list(serial_config.get("encoding_candidates", [])):
+        try:
+            codecs.lookup(encoding)
+        except (LookupError, TypeError):
+            errors.append(f"Unknown encoding: {encoding}")
+    
+    if not isinstance(serial_config.get("error_char", "�"), str):
+        errors.append("error_char must be a string")
+    if serial_config.get("read_mode", "event") not in ("event", "poll", "process"):
+        errors.append(f"Unknown read_mode: {serial_config.get('read_mode')}")
+    if serial_config.get("queue_policy", "block") not in ("block", "drop_oldest", "drop_newest"):
+        errors.append(f"Unknown queue_policy: {serial_config.get('queue_policy')}")
+    if serial_config.get("stream_typing", "off") not in ("off", "lines", "chunks"):
+        errors.append(f"Unknown stream_typing: {serial_config.get('stream_typing')}")
+    if serial_config.get("spool_sync", "interval") not in ("always", "interval", "never"):
+        errors.append(f"Unknown spool_sync: {serial_config.get('spool_sync')}")
+    if serial_config.get("spool_replay", "ask") not in ("ask", "replay", "discard"):
+        errors.append(f"Unknown spool_replay: {serial_config.get('spool_replay')}")
+    
+    try:
+        create_framer(serial_config)
+    except (ValueError, TypeError) as e:
+        errors.append(str(e))
+    
+    try:
+        compile_pipeline(serial_config.get("transforms"))
+    except (ValueError, AttributeError) as e:
+        errors.append(str(e))
+    
+    sinks = config.get("output", {}).get("sinks") or []
+    required = {"keyboard": (), "stdout": (), "file": ("path",), "unix_socket": ("path",), "http": ("url",)}
+    for i, sink in enumerate(sinks if isinstance(sinks, list) else [None]):
+        kind = sink.get("type") if isinstance(sink, dict) else None
+        if kind not in required:
+            errors.append(f"Unknown sink at position {i}: {kind}")
+            continue
+        for key in required[kind]:
+            if not sink.get(key):
+                errors.append(f"{kind} sink at position {i} needs '{key}'")
+    
+    app_config = config.get("app", {})
+    if not isinstance(app_config, dict):
+        errors.append("'app' must be a section")
+    else:
+        level = app_config.get("log_level", "INFO")
+        try:
+            logger.level(str(level).upper())
+        except ValueError:
+            errors.append(f"Unknown log_level: {level}")
+    
+    typing_config = config.get("typing", {})
+    if not isinstance(typing_config, dict):
+        errors.append("'typing' must be a section")
+    else:
+        for key in ("key_delay", "line_delay", "batch_size", "plan_cache_size"):
+            _check_number(errors, typing_config, key, integer=key in ("batch_size", "plan_cache_size"))
+    
+    if errors:
+        raise ValueError("; ".join(errors))
+
+class ConfigWatcher:
+    """
+    Reloads config.json when it changes.
+    
+    The file's modification time and size are checked every `poll_interval`
+    seconds. A changed file is parsed and validated in full before the
+    callback sees it, so a half-written or invalid file never replaces the
+    running configuration; the next change is picked up as usual.
+    """
+    
+    def __init__(self, callback, path=CONFIG_PATH, poll_interval=1.0):
+        """
+        Initialize the watcher.
+        
+        Args:
+            callback: Called as callback(config) with each valid new configuration
+            path: Path to the JSON configuration file
+            poll_interval: Seconds between modification checks
+        """
+        self.callback = callback
+        self.path = path
+        self.poll_interval = poll_interval
+        self.reload_count = 0
+        self.error_count = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+        self._signature = self._stat()
+    
+    def _stat(self):
+        """Return (mtime_ns, size) of the config file, or None if it is missing"""
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+    
+    def check(self):
+        """
+        Reload the file if it changed since the last check.
+        
+        Returns:
+            bool: True if a new configuration was passed to the callback
+        """
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+        
+        try:
+            config = read_config(self.path)
+        except Exception as e:
+            self.error_count += 1
+            logger.error(f"Ignoring invalid configuration change: {e}")
+            return False
+        
+        self.reload_count += 1
+        logger.info("Configuration reloaded")
+        try:
+            self.callback(config)
+        except Exception as e:
+            logger.error(f"Error applying reloaded configuration: {e}")
+        return True
+    
+    def start(self):
+        """Start watching in a background thread"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._watch_loop, daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        """Stop watching"""
+        self.stop_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+    
+    def _watch_loop(self):
+        while not self.stop_event.wait(self.poll_interval):
+            self.check()
@@ -0,0 +1,147 @@
+import time
+import hashlib
+from collections import OrderedDict
+
+class _WindowIndex:
+    """
+    Payload digests seen within one time window, oldest first.
+    
+    Entries are appended with the time of their scan, so the OrderedDict is
+    sorted by expiry and expired entries are evicted from the front. Scans
+    from different ports can be checked slightly out of order, so a digest's
+    own expiry is compared as well.
+    """
+    
+    def __init__(self, window, max_entries):
+        self.window = window
+        self.max_entries = max_entries
+        self.expiry = OrderedDict()
+    
+    def contains(self, digest, now):
+        """Evict expired digests, then check whether `digest` is still within its window"""
+        expiry = self.expiry
+        while expiry:
+            oldest = next(iter(expiry.values()))
+            if oldest > now:
+                break
+            expiry.popitem(last=False)
+        return expiry.get(digest, now) > now
+    
+    def add(self, digest, now):
+        """Remember an accepted digest, dropping the oldest one if full"""
+        self.expiry[digest] = now + self.window
+        self.expiry.move_to_end(digest)
+        if len(self.expiry) > self.max_entries:
+            self.expiry.popitem(last=False)
+
+
+class DuplicateFilter:
+    """
+    Suppresses records repeated within a time window, e.g. when a handheld
+    scanner sends the same code again while the operator lingers.
+    
+    Each port has its own index with `window` seconds (overridable per port
+    through `port_windows`); `global_window` additionally suppresses the same
+    payload arriving on any port. A window of 0 disables that check. The
+    window starts at the accepted scan, so a steady stream of repeats does not
+    extend it. Every index holds at most `max_entries` digests and drops
+    expired ones as new scans arrive, so memory stays bounded regardless of
+    the scan rate.
+    """
+    
+    def __init__(self, window=1.0, port_windows=None, global_window=0.0, max_entries=1024):
+        """
+        Initialize the filter.
+        
+        Args:
+            window: Default per-port window in seconds
+            port_windows: Optional dict mapping device paths to their own window
+            global_window: Window in seconds across all ports
+            max_entries: Maximum number of digests kept per index
+        """
+        self.max_entries = max_entries
+        self.ports = {}
+        self.suppressed = 0
+        self.configure(window, port_windows, global_window)
+    
+    @classmethod
+    def from_config(cls, config):
+        """Create a filter from the `dedup_*` keys of the serial config"""
+        return cls(
+            config.get('dedup_window', 1.0),
+            config.get('dedup_port_windows'),
+            config.get('dedup_global_window', 0.0),
+            config.get('dedup_max_entries', 1024)
+        )
+    
+    def configure(self, window=1.0, port_windows=None, global_window=0.0):
+        """
+        Change the windows; digests already seen are forgotten.
+        
+        Args:
+            window: Default per-port window in seconds
+            port_windows: Optional dict mapping device paths to their own window
+            global_window: Window in seconds across all ports
+        """
+        self.window = window
+        self.port_windows = dict(port_windows or {})
+        self.global_index = _WindowIndex(global_window, self.max_entries) if global_window > 0 else None
+        self.ports = {}
+    
+    @property
+    def enabled(self):
+        """True if any window is non-zero"""
+        return (
+            self.window > 0 or self.global_index is not None
+            or any(window > 0 for window in self.port_windows.values())
+        )
+    
+    def is_duplicate(self, port, text, now=None):
+        """
+        Check a record and remember it if it is new.
+        
+        Args:
+            port: Device path the record came from
+            text: Decoded record text
+            now: Time of the scan, e.g. the record's first byte (default
+                 time.monotonic()); one filter must always be given the same clock
+        
+        Returns:
+            bool: True if the record should be suppressed
+        """
+        if now is None:
+            now = time.monotonic()
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        
+        if port in self.ports:
+            index = self.ports[port]
+        else:
+            window = self.port_windows.get(port, self.window)
+            index = self.ports[port] = _WindowIndex(window, self.max_entries) if window > 0 else None
+        
+        duplicate = (
+            (index is not None and index.contains(digest, now))
+            or (self.global_index is not None and self.global_index.contains(digest, now))
+        )
+        if duplicate:
+            self.suppressed += 1
+            return True
+        
+        if index is not None:
+            index.add(digest, now)
+        if self.global_index is not None:
+            self.global_index.add(digest, now)
+        return False
+    
+    def get_stats(self):
+        """
+        Get filter counters.
+        
+        Returns:
+            Dictionary with the suppression count and index sizes
+        """
+        return {
+            'suppressed': self.suppressed,
+            'entries': sum(len(index.expiry) for index in self.ports.values() if index is not None)
+                       + (len(self.global_index.expiry) if self.global_index is not None else 0),
+        }
@@ -0,0 +1,124 @@
+import os
+import json
+import threading
+from loguru import logger
+
+DEFAULT_CANDIDATES = ('shift_jis', 'cp932', 'utf-8')
+
+def identity_key(session):
+    """
+    Key under which a port's encoding verdict is stored.
+    
+    USB ports are keyed by vid:pid:serial so the verdict follows the scanner
+    to another device path; other ports by their device path.
+    """
+    vid, pid, serial_number = session.identity
+    if vid is None:
+        return session.device
+    return f"{vid:04x}:{pid:04x}:{serial_number or ''}"
+
+
+class EncodingDetection:
+    """
+    Scores records from one port against candidate encodings.
+    
+    Only records containing non-ASCII bytes are scored, since ASCII decodes
+    the same in every candidate. Each candidate's score is the number of
+    replacement characters it produced; ties go to the earlier candidate, so
+    the configured encoding wins unless another one does strictly better.
+    """
+    
+    def __init__(self, candidates, samples=5):
+        """
+        Initialize the detection.
+        
+        Args:
+            candidates: Encodings to try, in order of preference
+            samples: Number of non-ASCII records to score before deciding
+        """
+        self.candidates = list(candidates)
+        self.samples = samples
+        self.scored = 0
+        self.errors = [0] * len(self.candidates)
+    
+    @property
+    def done(self):
+        """True once enough records have been scored"""
+        return self.scored >= self.samples
+    
+    @property
+    def best(self):
+        """The candidate with the fewest replacements so far"""
+        return self.candidates[self.errors.index(min(self.errors))]
+    
+    def score(self, record):
+        """
+        Score one raw record.
+        
+        Args:
+            record: Record bytes
+        
+        Returns:
+            bool: True if the record was informative (contained non-ASCII bytes)
+        """
+        if record.isascii():
+            return False
+        
+        for i, encoding in enumerate(self.candidates):
+            try:
+                record.decode(encoding)
+            except UnicodeDecodeError:
+                self.errors[i] += record.decode(encoding, errors='replace').count('�') or 1
+        self.scored += 1
+        return True
+
+
+class EncodingCache:
+    """
+    Persisted encoding verdicts per device identity.
+    
+    Verdicts are kept in memory and, when a path is given, written to a JSON
+    file after each change (via a temporary file, so a crash never leaves a
+    truncated file behind).
+    """
+    
+    def __init__(self, path=None):
+        """
+        Initialize the cache.
+        
+        Args:
+            path: Optional JSON file to load from and save to
+        """
+        self.path = os.path.expanduser(path) if path else None
+        self.verdicts = {}
+        self.lock = threading.Lock()
+        
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    self.verdicts = dict(json.load(f))
+            except Exception as e:
+                logger.error(f"Failed to load encoding verdicts from {self.path}: {e}")
+    
+    def get(self, key):
+        """Return the stored encoding for a device identity, or None"""
+        return self.verdicts.get(key)
+    
+    def put(self, key, encoding):
+        """Store a verdict and persist the cache"""
+        with self.lock:
+            if self.verdicts.get(key) == encoding:
+                return
+            self.verdicts[key] = encoding
+            verdicts = dict(self.verdicts)
+        
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(verdicts, f, indent=2)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.error(f"Failed to save encoding verdicts to {self.path}: {e}")
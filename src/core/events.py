@@ -0,0 +1,113 @@
+import time
+import threading
+from loguru import logger
+
+class EventBus:
+    """
+    Thread-safe publish/subscribe channel for SerialReader events.
+    
+    Events and their info dictionaries:
+        connected     device
+        disconnected  device
+        lost          device (the supervisor is reconnecting it)
+        reconnected   device
+        record        port, chars, latency (first byte -> handed to the output)
+        error         message, device (may be None), fatal
+        throughput    records, records_per_second, interval
+    
+    Subscribers are called as callback(event, info) on the publishing thread
+    (read, typer, supervisor or timer thread), so they must return quickly and
+    hand UI work to their own thread. The subscriber list is replaced rather
+    than mutated, so publish() runs without taking the lock.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = ()
+    
+    def __bool__(self):
+        """True if anyone is listening (lets hot paths skip building events)"""
+        return bool(self.subscribers)
+    
+    def subscribe(self, callback, events=None):
+        """
+        Register callback(event, info).
+        
+        Args:
+            callback: Callable taking the event name and its info dictionary
+            events: Optional iterable of event names to receive (default all)
+        """
+        with self.lock:
+            self.subscribers += ((callback, frozenset(events) if events else None),)
+    
+    def unsubscribe(self, callback):
+        """Remove a previously registered callback"""
+        with self.lock:
+            self.subscribers = tuple(entry for entry in self.subscribers if entry[0] != callback)
+    
+    def publish(self, event, **info):
+        """Call every subscriber interested in `event`"""
+        for callback, events in self.subscribers:
+            if events is not None and event not in events:
+                continue
+            try:
+                callback(event, info)
+            except Exception as e:
+                logger.error(f"Error in {event} event subscriber: {e}")
+
+
+class ThroughputTicker:
+    """
+    Publishes 'throughput' events while records are flowing.
+    
+    The first record after an idle period starts a one-shot timer; when it
+    fires, the records counted since are published and, if there were any,
+    the timer is started again. The last tick therefore reports 0 records/s
+    and an idle reader has no timer at all.
+    """
+    
+    def __init__(self, bus, interval=1.0):
+        """
+        Initialize the ticker.
+        
+        Args:
+            bus: EventBus to publish on
+            interval: Seconds per tick
+        """
+        self.bus = bus
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.count = 0
+        self.window_start = None
+        self.timer = None
+    
+    def record(self):
+        """Count one record handed to the output"""
+        with self.lock:
+            self.count += 1
+            if self.timer is None:
+                self._schedule()
+    
+    def _schedule(self):
+        """Start the next tick (lock held)"""
+        self.window_start = time.monotonic()
+        self.timer = threading.Timer(self.interval, self._tick)
+        self.timer.daemon = True
+        self.timer.start()
+    
+    def _tick(self):
+        with self.lock:
+            count, self.count = self.count, 0
+            elapsed = time.monotonic() - self.window_start
+            if count:
+                self._schedule()
+            else:
+                self.timer = None
+        self.bus.publish('throughput', records=count, records_per_second=count / elapsed, interval=elapsed)
+    
+    def cancel(self):
+        """Stop a pending tick"""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
@@ -0,0 +1,330 @@
+import codecs
+
+class Framer:
+    """
+    Base class for record framers.
+    
+    A framer turns the raw byte stream of one port into records. feed() must
+    return a record as soon as its last byte arrives; flush() is called when the
+    line has been idle for the configured `timeout` and returns whatever is
+    buffered as a best-effort record.
+    
+    `whole_scans` is True when every record is a complete scan. A terminator
+    framer yields single lines instead, and a multi-line QR code is split
+    across several of them.
+    """
+    
+    whole_scans = True
+    
+    def __init__(self):
+        """Initialize an empty framer"""
+        self.buffer = bytearray()
+        self.scan_pos = 0
+    
+    @property
+    def pending(self):
+        """Number of buffered bytes that do not yet form a complete record"""
+        return len(self.buffer)
+    
+    def feed(self, data):
+        """
+        Append received bytes and return every record they complete.
+        
+        Args:
+            data: Bytes read from the serial port
+        
+        Returns:
+            List of complete records (bytes)
+        """
+        raise NotImplementedError
+    
+    def partial(self, start=0):
+        """
+        Payload bytes of the pending record that are certain to belong to it.
+        
+        They are always a prefix of the record feed() or flush() returns
+        next, so a caller can emit them early and later skip that many bytes
+        of the record (see `stream_typing` in SerialReader).
+        
+        Args:
+            start: Offset into the payload of the first byte wanted
+        
+        Returns:
+            Bytes from `start` to the end of the safe prefix (possibly empty)
+        """
+        return bytes(self.buffer[start:])
+    
+    def flush(self):
+        """
+        Return whatever is buffered as a record, e.g. after the idle-gap timeout.
+        
+        Returns:
+            The buffered bytes (possibly empty)
+        """
+        record = bytes(self.buffer)
+        self.buffer.clear()
+        self.scan_pos = 0
+        return record
+
+
+class TerminatorFramer(Framer):
+    """
+    Splits the stream on a terminator byte sequence (LF, CR, CRLF or custom).
+    
+    Only bytes that have not been searched yet are scanned for the terminator,
+    so framing cost is linear in the number of bytes received regardless of
+    how large a record grows. The terminator is replaced by `suffix`, which
+    defaults to a newline so the typer still presses Enter after each record.
+    """
+    
+    whole_scans = False
+    
+    def __init__(self, terminator=b'\n', suffix=b'\n'):
+        """
+        Initialize the framer.
+        
+        Args:
+            terminator: Byte sequence that ends a record
+            suffix: Bytes appended to each record in place of the terminator
+        """
+        super().__init__()
+        if not terminator:
+            raise ValueError("Terminator must not be empty")
+        self.terminator = bytes(terminator)
+        self.suffix = bytes(suffix)
+    
+    def feed(self, data):
+        self.buffer.extend(data)
+        records = []
+        start = 0
+        size = len(self.terminator)
+        
+        while True:
+            end = self.buffer.find(self.terminator, self.scan_pos)
+            if end < 0:
+                break
+            records.append(bytes(self.buffer[start:end]) + self.suffix)
+            start = end + size
+            self.scan_pos = start
+        
+        if start:
+            del self.buffer[:start]
+        # A terminator may be split across reads, so rescan its first bytes next time
+        self.scan_pos = max(0, len(self.buffer) - size + 1)
+        return records
+    
+    def partial(self, start=0):
+        # The last bytes may be the start of a split terminator
+        return bytes(self.buffer[start:max(0, len(self.buffer) - len(self.terminator) + 1)])
+
+
+class StxEtxFramer(Framer):
+    """
+    Extracts payloads wrapped in STX ... ETX.
+    
+    Bytes received outside a frame are discarded. Each payload is emitted the
+    moment its ETX arrives, followed by `suffix`.
+    """
+    
+    def __init__(self, stx=0x02, etx=0x03, suffix=b'\n'):
+        """
+        Initialize the framer.
+        
+        Args:
+            stx: Start-of-frame byte value
+            etx: End-of-frame byte value
+            suffix: Bytes appended to each payload
+        """
+        super().__init__()
+        self.stx = bytes([stx])
+        self.etx = bytes([etx])
+        self.suffix = bytes(suffix)
+        self.in_frame = False
+    
+    def feed(self, data):
+        self.buffer.extend(data)
+        records = []
+        
+        while True:
+            if not self.in_frame:
+                start = self.buffer.find(self.stx, self.scan_pos)
+                if start < 0:
+                    self.buffer.clear()
+                    self.scan_pos = 0
+                    break
+                del self.buffer[:start + 1]
+                self.in_frame = True
+                self.scan_pos = 0
+            
+            end = self.buffer.find(self.etx, self.scan_pos)
+            if end < 0:
+                self.scan_pos = len(self.buffer)
+                break
+            records.append(bytes(self.buffer[:end]) + self.suffix)
+            del self.buffer[:end + 1]
+            self.in_frame = False
+            self.scan_pos = 0
+        
+        return records
+    
+    def partial(self, start=0):
+        if not self.in_frame:
+            return b''
+        return super().partial(start)
+    
+    def flush(self):
+        self.in_frame = False
+        return super().flush()
+
+
+class LengthPrefixedFramer(Framer):
+    """
+    Reads frames made of a fixed-size length header followed by that many bytes.
+    """
+    
+    def __init__(self, length_bytes=2, byteorder='big', suffix=b'\n'):
+        """
+        Initialize the framer.
+        
+        Args:
+            length_bytes: Size of the length header in bytes
+            byteorder: 'big' or 'little'
+            suffix: Bytes appended to each payload
+        """
+        super().__init__()
+        self.length_bytes = length_bytes
+        self.byteorder = byteorder
+        self.suffix = bytes(suffix)
+    
+    def feed(self, data):
+        self.buffer.extend(data)
+        records = []
+        start = 0
+        
+        while len(self.buffer) - start >= self.length_bytes:
+            header_end = start + self.length_bytes
+            size = int.from_bytes(self.buffer[start:header_end], self.byteorder)
+            if len(self.buffer) - header_end < size:
+                break
+            records.append(bytes(self.buffer[header_end:header_end + size]) + self.suffix)
+            start = header_end + size
+        
+        if start:
+            del self.buffer[:start]
+        return records
+    
+    def partial(self, start=0):
+        if len(self.buffer) < self.length_bytes:
+            return b''
+        size = int.from_bytes(self.buffer[:self.length_bytes], self.byteorder)
+        return bytes(self.buffer[self.length_bytes + start:self.length_bytes + size])
+    
+    def flush(self):
+        record = super().flush()
+        return record[self.length_bytes:]
+
+
+class IdleGapFramer(Framer):
+    """Treats everything received until the line goes idle as one record"""
+    
+    def feed(self, data):
+        self.buffer.extend(data)
+        return []
+
+
+def _config_bytes(value):
+    """Convert a config value (string or list of byte values) to bytes"""
+    if isinstance(value, str):
+        return value.encode('latin-1')
+    return bytes(value)
+
+
+def create_framer(config):
+    """
+    Create the framer selected by the `framer` key of the serial config.
+    
+    Supported values are lf (default), cr, crlf, terminator, stx_etx,
+    length_prefixed and idle_gap. Framer options are read from the same section:
+    `terminator`, `stx`, `etx`, `length_bytes`, `length_byteorder` and
+    `record_suffix`.
+    
+    Args:
+        config: Serial configuration dictionary
+    
+    Returns:
+        A new Framer instance
+    """
+    name = config.get('framer', 'lf')
+    suffix = _config_bytes(config.get('record_suffix', '\n'))
+    
+    if name == 'lf':
+        return TerminatorFramer(b'\n', suffix)
+    if name == 'cr':
+        return TerminatorFramer(b'\r', suffix)
+    if name == 'crlf':
+        return TerminatorFramer(b'\r\n', suffix)
+    if name == 'terminator':
+        return TerminatorFramer(_config_bytes(config.get('terminator', '\n')), suffix)
+    if name == 'stx_etx':
+        return StxEtxFramer(config.get('stx', 0x02), config.get('etx', 0x03), suffix)
+    if name == 'length_prefixed':
+        return LengthPrefixedFramer(
+            config.get('length_bytes', 2),
+            config.get('length_byteorder', 'big'),
+            suffix
+        )
+    if name == 'idle_gap':
+        return IdleGapFramer()
+    
+    raise ValueError(f"Unknown framer: {name}")
+
+
+class RecordDecoder:
+    """
+    Incrementally decodes records for one port.
+    
+    A multi-byte character cut in half by an idle-gap flush is not replaced;
+    its lead byte is held back and completed by the first byte of the next record.
+    """
+    
+    def __init__(self, encoding='shift_jis', error_char='�'):
+        """
+        Initialize the decoder.
+        
+        Args:
+            encoding: Codec name of the scanner output
+            error_char: Character substituted for undecodable bytes
+        """
+        self.encoding = encoding
+        self.error_char = error_char
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self.replacements = 0
+    
+    @property
+    def pending(self):
+        """True while the lead bytes of a split multi-byte character are held back"""
+        return bool(self.decoder.getstate()[0])
+    
+    def decode(self, data, final=False):
+        """
+        Decode one record.
+        
+        Args:
+            data: Record bytes
+            final: If True, flush any pending partial character as a replacement
+        
+        Returns:
+            The decoded text
+        """
+        text = self.decoder.decode(data, final)
+        
+        if '�' in text:
+            self.replacements += text.count('�')
+            if self.error_char != '�':
+                text = text.replace('�', self.error_char)
+        
+        return text
+    
+    def reset(self):
+        """Drop any pending partial character"""
+        self.decoder.reset()
@@ -0,0 +1,310 @@
+import os
+import time
+import selectors
+import threading
+import multiprocessing
+import serial
+
+from core.shm_ring import KIND_DATA, KIND_ERROR, SharedRing
+
+class RingPort:
+    """
+    Stand-in for a pyserial handle whose port is read by the I/O process.
+    
+    SerialReader keeps it as the session's serial_port: closing it and
+    changing the baud rate or timeout are forwarded to the I/O process.
+    It has no file descriptor; its bytes arrive through the ring.
+    """
+    
+    def __init__(self, io, port_id, device, baudrate, timeout):
+        self.io = io
+        self.port_id = port_id
+        self.device = device
+        self._baudrate = baudrate
+        self._timeout = timeout
+        self.is_open = True
+    
+    def fileno(self):
+        raise OSError("port is read by the I/O process")
+    
+    @property
+    def baudrate(self):
+        return self._baudrate
+    
+    @baudrate.setter
+    def baudrate(self, value):
+        self.io.request('set', self.port_id, 'baudrate', value)
+        self._baudrate = value
+    
+    @property
+    def timeout(self):
+        return self._timeout
+    
+    @timeout.setter
+    def timeout(self, value):
+        self.io.request('set', self.port_id, 'timeout', value)
+        self._timeout = value
+    
+    def close(self):
+        if not self.is_open:
+            return
+        self.is_open = False
+        if self.io.is_alive():
+            self.io.request('close', self.port_id)
+
+
+class SerialIOProcess:
+    """
+    Child process that does nothing but read serial ports into a SharedRing.
+    
+    With `read_mode: process` the ports are opened and read here instead of
+    in SerialReader's read thread, so a long keystroke call, a Tk redraw or
+    anything else holding the main interpreter's GIL cannot delay draining
+    the UART FIFO. The main process consumes the ring (see
+    SerialReader._ring_loop) and does all framing, decoding and typing.
+    
+    Commands (open, close, set, stop) go over a multiprocessing pipe and are
+    answered synchronously; data and read errors go through the ring, in
+    the order they happened. A doorbell pipe wakes the consumer.
+    """
+    
+    def __init__(self, ring_size=1024 * 1024, poll_interval=0.05):
+        """
+        Initialize the handle; the process is started by start().
+        
+        Args:
+            ring_size: Bytes of shared memory for data waiting to be framed
+            poll_interval: Seconds between reads of ports without a file descriptor
+        """
+        self.ring_size = ring_size
+        self.poll_interval = poll_interval
+        self.ring = None
+        self.process = None
+        self.control = None
+        self.doorbell = None
+        self.next_port_id = 1
+        self.lock = threading.Lock()
+    
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+    
+    def start(self):
+        """Start the I/O process if it is not running (a dead one is replaced)"""
+        with self.lock:
+            if self.is_alive():
+                return
+            self._stop_process()
+            
+            if self.ring is None:
+                self.ring = SharedRing.create(self.ring_size)
+            else:
+                self.ring.reset()
+            
+            # spawn, not fork: the main process already runs several threads
+            context = multiprocessing.get_context('spawn')
+            self.control, child_control = context.Pipe()
+            self.doorbell, child_doorbell = context.Pipe(duplex=False)
+            self.process = context.Process(
+                target=_io_main,
+                args=(self.ring.name, child_control, child_doorbell, self.poll_interval),
+                name='qr2key-serial-io',
+                daemon=True
+            )
+            self.process.start()
+            child_control.close()
+            child_doorbell.close()
+            os.set_blocking(self.doorbell.fileno(), False)
+    
+    def request(self, *command):
+        """
+        Send a command to the I/O process and wait for its answer.
+        
+        Raises:
+            OSError: If the process is gone or reports a failure
+        """
+        with self.lock:
+            if not self.is_alive():
+                raise OSError("serial I/O process is not running")
+            try:
+                self.control.send(command)
+                if not self.control.poll(5.0):
+                    raise OSError("serial I/O process did not answer")
+                ok, result = self.control.recv()
+            except (EOFError, BrokenPipeError) as e:
+                raise OSError(f"serial I/O process is not running: {e}")
+        if not ok:
+            raise OSError(result)
+        return result
+    
+    def open_port(self, device, baudrate, timeout):
+        """
+        Open a port in the I/O process.
+        
+        Returns:
+            RingPort for the session
+        
+        Raises:
+            OSError: If the port could not be opened
+        """
+        self.start()
+        port_id = self.next_port_id
+        self.next_port_id = port_id % 0xFFFF + 1
+        self.request('open', port_id, device, baudrate, timeout)
+        return RingPort(self, port_id, device, baudrate, timeout)
+    
+    @property
+    def doorbell_fd(self):
+        """File descriptor that becomes readable when entries were appended"""
+        return self.doorbell.fileno()
+    
+    def drain_doorbell(self):
+        """
+        Empty the doorbell pipe.
+        
+        Returns:
+            bool: False once the I/O process has exited (end of file)
+        """
+        try:
+            while True:
+                if not os.read(self.doorbell.fileno(), 4096):
+                    return False
+        except BlockingIOError:
+            return True
+    
+    def entries(self):
+        """Entries appended since the last call; see SharedRing.entries()"""
+        return self.ring.entries()
+    
+    def get_stats(self):
+        """
+        Get ring usage.
+        
+        Returns:
+            Dictionary with the ring size, bytes in use and chunks dropped
+        """
+        if self.ring is None:
+            return {'ring_size': self.ring_size, 'ring_used': 0, 'ring_dropped': 0}
+        return {'ring_size': self.ring.capacity, 'ring_used': self.ring.used, 'ring_dropped': self.ring.dropped}
+    
+    def _stop_process(self):
+        """Stop the process (lock held)"""
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            try:
+                self.control.send(('stop',))
+                self.control.poll(1.0)
+            except (OSError, EOFError):
+                pass
+            self.process.join(1.0)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(1.0)
+        for conn in (self.control, self.doorbell):
+            conn.close()
+        self.process = self.control = self.doorbell = None
+    
+    def stop(self):
+        """Stop the I/O process and free the shared memory"""
+        with self.lock:
+            self._stop_process()
+            if self.ring is not None:
+                self.ring.close()
+                self.ring = None
+
+
+def _io_main(ring_name, control, doorbell, poll_interval):
+    """Entry point of the I/O process"""
+    ring = SharedRing.attach(ring_name)
+    bell = doorbell.fileno()
+    os.set_blocking(bell, False)
+    ports = {}
+    polled = {}
+    pending = []
+    selector = selectors.DefaultSelector()
+    selector.register(control, selectors.EVENT_READ, None)
+    
+    def publish(kind, port_id, payload):
+        if ring.append(kind, port_id, payload, time.time()):
+            try:
+                os.write(bell, b'\0')
+            except BlockingIOError:
+                pass
+            return True
+        return False
+    
+    def close_port(port_id):
+        port = ports.pop(port_id, None)
+        polled.pop(port_id, None)
+        if port is None:
+            return
+        try:
+            selector.unregister(port)
+        except (KeyError, ValueError):
+            pass
+        try:
+            port.close()
+        except Exception:
+            pass
+    
+    def read(port_id, port):
+        try:
+            data = port.read(min(port.in_waiting or 1, ring.max_payload))
+        except Exception as e:
+            close_port(port_id)
+            # Errors must reach the reader; retried below while the ring is full
+            pending.append((port_id, str(e).encode('utf-8', 'replace')))
+            return
+        if data:
+            publish(KIND_DATA, port_id, data)
+    
+    def execute(command):
+        name, *args = command
+        if name == 'open':
+            port_id, device, baudrate, timeout = args
+            port = serial.serial_for_url(device, baudrate=baudrate, timeout=timeout)
+            ports[port_id] = port
+            try:
+                selector.register(port.fileno(), selectors.EVENT_READ, port_id)
+            except Exception:
+                polled[port_id] = port
+        elif name == 'close':
+            close_port(args[0])
+        elif name == 'set':
+            port_id, attribute, value = args
+            setattr(ports[port_id], attribute, value)
+        else:
+            raise ValueError(f"Unknown command: {name}")
+    
+    try:
+        while True:
+            while pending and publish(KIND_ERROR, *pending[0]):
+                pending.pop(0)
+            
+            wait = poll_interval if (polled or pending) else None
+            for key, _ in selector.select(wait):
+                if key.data is not None:
+                    port = ports.get(key.data)
+                    if port is not None:
+                        read(key.data, port)
+                    continue
+                
+                try:
+                    command = control.recv()
+                except (EOFError, OSError):
+                    return
+                if command[0] == 'stop':
+                    control.send((True, None))
+                    return
+                try:
+                    control.send((True, execute(command)))
+                except Exception as e:
+                    control.send((False, str(e)))
+            
+            for port_id, port in list(polled.items()):
+                read(port_id, port)
+    finally:
+        for port_id in list(ports):
+            close_port(port_id)
+        selector.close()
+        ring.close()
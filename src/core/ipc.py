@@ -0,0 +1,351 @@
+import os
+import sys
+import json
+import time
+import fcntl
+import queue
+import socket
+import socketserver
+import threading
+from loguru import logger
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+def launch_command(*args):
+    """
+    Command line that starts another QR2Key process with `args`.
+    
+    Works both from source (python main.py) and from the bundled app.
+    """
+    if getattr(sys, 'frozen', False):
+        return [sys.executable, *args]
+    return [sys.executable, MAIN_PATH, *args]
+
+
+def tray_lock_path(control_path):
+    """Lock file that keeps the menu bar app single-instance (next to the control socket)"""
+    return os.path.join(os.path.dirname(os.path.expanduser(control_path)), "tray.lock")
+
+
+class InstanceLock:
+    """
+    Exclusive flock() on a lock file, held for the life of the process.
+    
+    The kernel drops the lock when the process exits, even after a crash,
+    so a stale file never blocks the next start.
+    """
+    
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        self.fd = None
+    
+    def acquire(self):
+        """
+        Take the lock without waiting.
+        
+        Returns:
+            bool: False if another process holds it
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self.fd = fd
+        return True
+    
+    def release(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+    
+    @staticmethod
+    def is_held(path):
+        """True if some process currently holds the lock at `path`"""
+        lock = InstanceLock(path)
+        if lock.acquire():
+            lock.release()
+            return False
+        return True
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    """One client connection: JSON request lines in, JSON response lines out"""
+    
+    def handle(self):
+        control = self.server.control
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                command = request.pop('cmd')
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                self._send({'ok': False, 'error': f"Bad request: {e}"})
+                continue
+            
+            if command == 'subscribe':
+                self._send({'ok': True, 'result': None})
+                control.stream_events(self)
+                return
+            
+            try:
+                response = {'ok': True, 'result': control.handler(command, request)}
+            except Exception as e:
+                response = {'ok': False, 'error': str(e)}
+            self._send(response)
+    
+    def _send(self, message):
+        self.wfile.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+
+class _UnixControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ControlServer:
+    """
+    Local control endpoint of the ingest daemon, on a Unix domain socket.
+    
+    Protocol: one JSON object per line. A request is {"cmd": name, ...args}
+    and is answered with {"ok": true, "result": ...} or {"ok": false,
+    "error": message}. The request {"cmd": "subscribe"} turns the connection
+    into an event stream of {"event": name, "info": {...}} lines.
+    
+    Each subscriber has its own bounded queue and writer, so a stalled front
+    end never blocks the thread that publishes; a subscriber that falls
+    `max_backlog` events behind is disconnected.
+    """
+    
+    def __init__(self, path, handler, max_backlog=1000):
+        """
+        Initialize the server.
+        
+        Args:
+            path: Unix socket path
+            handler: Callable(command, args) returning a JSON-serializable result;
+                     exceptions are sent back as errors
+            max_backlog: Events queued per subscriber before it is dropped
+        """
+        self.path = os.path.expanduser(path)
+        self.handler = handler
+        self.max_backlog = max_backlog
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.server = None
+        self.thread = None
+    
+    def start(self):
+        """
+        Start serving in a background thread.
+        
+        The socket file is replaced, so the caller must hold the instance lock.
+        
+        Returns:
+            bool: True if the server started
+        """
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.server = _UnixControlServer(self.path, _ControlHandler)
+            os.chmod(self.path, 0o600)
+            self.server.control = self
+            self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+            self.thread.start()
+            logger.info(f"Control socket listening on {self.path}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to start control socket: {e}")
+            self.server = None
+            return False
+    
+    def publish(self, event, info):
+        """Queue an event for every subscriber (never blocks)"""
+        message = json.dumps({'event': event, 'info': info}, ensure_ascii=False).encode('utf-8') + b'\n'
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for events in subscribers:
+            try:
+                events.put_nowait(message)
+            except queue.Full:
+                self._drop(events)
+    
+    def stream_events(self, handler):
+        """Write queued events to a subscribed connection until it closes"""
+        events = queue.Queue(maxsize=self.max_backlog)
+        with self.lock:
+            self.subscribers.append(events)
+        try:
+            while True:
+                message = events.get()
+                if message is None:
+                    break
+                handler.wfile.write(message)
+                handler.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            self._drop(events)
+    
+    def _drop(self, events):
+        with self.lock:
+            if events not in self.subscribers:
+                return
+            self.subscribers.remove(events)
+        # Wake the writer; the queue may be full, so make room first
+        try:
+            events.get_nowait()
+        except queue.Empty:
+            pass
+        events.put_nowait(None)
+    
+    def stop(self):
+        """Stop serving and disconnect every client"""
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for events in subscribers:
+            self._drop(events)
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class ControlClient:
+    """
+    Client side of the daemon's control socket.
+    
+    request() is synchronous and may be called from any thread; events are
+    read on a separate connection by a background thread.
+    """
+    
+    def __init__(self, path, timeout=5.0):
+        """
+        Connect to the daemon.
+        
+        Args:
+            path: Unix socket path
+            timeout: Seconds to wait for a response
+        
+        Raises:
+            OSError: If no daemon is listening
+        """
+        self.path = os.path.expanduser(path)
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.sock, self.reader = self._open()
+        self.event_sock = None
+    
+    def _open(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        return sock, sock.makefile('rb')
+    
+    def request(self, command, **args):
+        """
+        Send one command and wait for its result.
+        
+        Raises:
+            OSError: If the connection to the daemon is lost
+            RuntimeError: If the daemon reports an error
+        """
+        line = json.dumps({'cmd': command, **args}, ensure_ascii=False).encode('utf-8') + b'\n'
+        with self.lock:
+            self.sock.sendall(line)
+            response = self.reader.readline()
+        if not response:
+            raise ConnectionError("QR2Key daemon closed the connection")
+        
+        response = json.loads(response)
+        if not response.get('ok'):
+            raise RuntimeError(response.get('error', 'unknown error'))
+        return response.get('result')
+    
+    def subscribe(self, callback, on_close=None):
+        """
+        Receive daemon events on a background thread.
+        
+        Args:
+            callback: Callable(event, info) for each event
+            on_close: Optional callable invoked once the stream ends
+        """
+        sock, reader = self._open()
+        sock.sendall(b'{"cmd": "subscribe"}\n')
+        if not json.loads(reader.readline() or b'{}').get('ok'):
+            sock.close()
+            raise ConnectionError("QR2Key daemon refused the event subscription")
+        sock.settimeout(None)
+        self.event_sock = sock
+        
+        def read_events():
+            try:
+                for line in reader:
+                    message = json.loads(line)
+                    try:
+                        callback(message['event'], message['info'])
+                    except Exception as e:
+                        logger.error(f"Error in daemon event callback: {e}")
+            except (OSError, ValueError):
+                pass
+            if on_close is not None:
+                on_close()
+        
+        threading.Thread(target=read_events, daemon=True).start()
+    
+    def close(self):
+        for sock in (self.sock, self.event_sock):
+            if sock is not None:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+    
+    @classmethod
+    def connect_or_spawn(cls, path, wait=10.0):
+        """
+        Connect to the running daemon, starting one (detached) if there is none.
+        
+        Args:
+            path: Control socket path
+            wait: Seconds to wait for a new daemon to start listening
+        
+        Returns:
+            A connected ControlClient
+        
+        Raises:
+            OSError: If no daemon could be reached
+        """
+        try:
+            return cls(path)
+        except OSError:
+            pass
+        
+        import subprocess
+        logger.info("Starting QR2Key ingest daemon")
+        subprocess.Popen(
+            launch_command('--headless'),
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        
+        deadline = time.monotonic() + wait
+        while True:
+            try:
+                return cls(path)
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.05)
@@ -0,0 +1,127 @@
+import hashlib
+from collections import OrderedDict
+
+PRESS = 0
+RELEASE = 1
+PAUSE_BATCH = 2
+PAUSE_LINE = 3
+
+class KeystrokePlan:
+    """
+    A record compiled into a flat sequence of keyboard events.
+    
+    Each event is an (action, key) tuple where action is PRESS, RELEASE,
+    PAUSE_BATCH or PAUSE_LINE. Characters are pressed as-is and line breaks are
+    already resolved to the platform's Enter key, so replaying a plan needs
+    no string handling at all.
+    """
+    
+    __slots__ = ('events', 'chars')
+    
+    def __init__(self, events, chars):
+        """
+        Initialize the plan.
+        
+        Args:
+            events: Tuple of (action, key) events
+            chars: Number of characters in the source text
+        """
+        self.events = events
+        self.chars = chars
+
+
+def compile_plan(text, pacer, enter_key, special_keys=None):
+    """
+    Compile text into a keystroke plan using the pacer's batching.
+    
+    Args:
+        text: The text to type
+        pacer: KeystrokePacer deciding where batch pauses go
+        enter_key: Key object pressed for each line break, and for '\r' as
+                   the controller's type() does
+        special_keys: Optional mapping of characters (e.g. tab) to key objects
+    
+    Returns:
+        KeystrokePlan
+    """
+    special_keys = {'\r': enter_key, **(special_keys or {})}
+    events = []
+    lines = text.split('\n')
+    
+    for i, line in enumerate(lines):
+        if line:
+            batches = pacer.batches(line)
+            for j, batch in enumerate(batches):
+                for char in batch:
+                    key = special_keys.get(char, char)
+                    events.append((PRESS, key))
+                    events.append((RELEASE, key))
+                if j < len(batches) - 1:
+                    events.append((PAUSE_BATCH, None))
+        
+        if i < len(lines) - 1:
+            events.append((PRESS, enter_key))
+            events.append((RELEASE, enter_key))
+        
+        events.append((PAUSE_LINE, None))
+    
+    return KeystrokePlan(tuple(events), len(text))
+
+
+class PlanCache:
+    """
+    Size-bounded LRU cache of keystroke plans keyed by a hash of the payload.
+    """
+    
+    def __init__(self, max_entries=256):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Maximum number of plans kept
+        """
+        self.max_entries = max_entries
+        self.plans = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def key_for(text, batch_size):
+        """Cache key for a payload typed with the given batch size"""
+        return (hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest(), batch_size)
+    
+    def get(self, key):
+        """
+        Look up a plan and mark it most recently used.
+        
+        Returns:
+            The cached KeystrokePlan or None
+        """
+        plan = self.plans.get(key)
+        if plan is None:
+            self.misses += 1
+            return None
+        
+        self.plans.move_to_end(key)
+        self.hits += 1
+        return plan
+    
+    def put(self, key, plan):
+        """Store a plan, evicting the least recently used one if full"""
+        self.plans[key] = plan
+        self.plans.move_to_end(key)
+        if len(self.plans) > self.max_entries:
+            self.plans.popitem(last=False)
+    
+    def get_stats(self):
+        """
+        Get cache counters.
+        
+        Returns:
+            Dictionary with size, hits and misses
+        """
+        return {
+            'size': len(self.plans),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -0,0 +1,126 @@
+import os
+import time
+import queue
+import hashlib
+import threading
+
+_payload_mode = 'truncate'
+_payload_max_chars = 64
+
+def configure_payload_logging(mode='truncate', max_chars=64):
+    """
+    Choose how scanned payloads appear in debug logs.
+    
+    Args:
+        mode: 'full', 'truncate' (first max_chars characters), 'hash' or 'off'
+        max_chars: Character limit for 'truncate'
+    """
+    global _payload_mode, _payload_max_chars
+    _payload_mode = mode
+    _payload_max_chars = max_chars
+
+def payload_preview(text):
+    """
+    Render a payload for logging according to the configured mode.
+    
+    Meant to be passed to logger.opt(lazy=True) so it only runs when the
+    message is actually emitted.
+    
+    Args:
+        text: The scanned text
+    
+    Returns:
+        A log-safe representation of the payload
+    """
+    if _payload_mode == 'full':
+        return repr(text)
+    if _payload_mode == 'hash':
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+        return f"<{len(text)} chars, blake2b {digest}>"
+    if _payload_mode == 'off':
+        return f"<{len(text)} chars>"
+    if len(text) > _payload_max_chars:
+        return repr(text[:_payload_max_chars]) + f"... ({len(text)} chars)"
+    return repr(text)
+
+
+class BatchedFileSink:
+    """
+    Loguru sink that moves file writes off the calling thread.
+    
+    write() only enqueues the formatted message. A writer thread blocks until a
+    message arrives, then drains everything else already queued (up to
+    `max_batch`) and writes it with a single write and flush. Under load this
+    coalesces many log lines into one system call; when idle it costs nothing.
+    The file is rotated once it exceeds `rotation_bytes`.
+    """
+    
+    _STOP = object()
+    
+    def __init__(self, path, rotation_bytes=10 * 1024 * 1024, max_batch=512):
+        """
+        Open the log file and start the writer thread.
+        
+        Args:
+            path: Log file path
+            rotation_bytes: Size after which the file is rotated
+            max_batch: Maximum number of messages per write
+        """
+        self.path = path
+        self.rotation_bytes = rotation_bytes
+        self.max_batch = max_batch
+        self.queue = queue.SimpleQueue()
+        self.file = open(path, 'a', encoding='utf-8')
+        self.batches = 0
+        self.thread = threading.Thread(target=self._write_loop, daemon=True)
+        self.thread.start()
+    
+    def write(self, message):
+        """Queue one formatted message (called by loguru)"""
+        self.queue.put(message)
+    
+    def stop(self):
+        """Write everything still queued and close the file (called by loguru on remove)"""
+        self.queue.put(self._STOP)
+        self.thread.join(timeout=2.0)
+    
+    def _write_loop(self):
+        """Writer thread: drain the queue in batches"""
+        while True:
+            message = self.queue.get()
+            if message is self._STOP:
+                break
+            
+            batch = [message]
+            stopping = False
+            while len(batch) < self.max_batch:
+                try:
+                    message = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if message is self._STOP:
+                    stopping = True
+                    break
+                batch.append(message)
+            
+            try:
+                self.file.write(''.join(batch))
+                self.file.flush()
+                self.batches += 1
+                if self.file.tell() >= self.rotation_bytes:
+                    self._rotate()
+            except Exception:
+                # Logging must never take the app down; drop the batch
+                pass
+            
+            if stopping:
+                break
+        
+        self.file.close()
+    
+    def _rotate(self):
+        """Rename the current file with a timestamp and start a new one"""
+        self.file.close()
+        root, ext = os.path.splitext(self.path)
+        os.rename(self.path, f"{root}.{time.strftime('%Y-%m-%d_%H-%M-%S')}{ext}")
+        self.file = open(self.path, 'a', encoding='utf-8')
@@ -0,0 +1,171 @@
+import bisect
+import threading
+from loguru import logger
+
+# Upper bounds in seconds; the last bucket is +Inf
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds"""
+    
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Initialize the histogram.
+        
+        Args:
+            buckets: Sorted bucket upper bounds in seconds
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        """Record one duration"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+    
+    def snapshot(self):
+        """
+        Get the histogram contents.
+        
+        Returns:
+            Dictionary with count, sum and cumulative bucket counts keyed by upper bound
+        """
+        cumulative = {}
+        running = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            running += count
+            cumulative[bound] = running
+        return {'count': self.count, 'sum': self.total, 'buckets': cumulative}
+
+
+class Metrics:
+    """
+    Counters, gauges and stage latency histograms for the scan hot path.
+    
+    When disabled, inc() and observe() return immediately, so instrumented code
+    pays one attribute check per call. Each metric is updated from a single
+    thread, so updates are not locked. Creating a metric is, because
+    snapshot() copies the registry on another thread (the metrics server).
+    """
+    
+    def __init__(self, enabled=False, prefix='qr2key'):
+        """
+        Initialize the registry.
+        
+        Args:
+            enabled: Whether to record anything
+            prefix: Name prefix used in the Prometheus output
+        """
+        self.enabled = enabled
+        self.prefix = prefix
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        self.lock = threading.Lock()
+    
+    def register_counters(self, *names):
+        """Create counters up front so they are reported even while zero"""
+        with self.lock:
+            for name in names:
+                self.counters.setdefault(name, 0)
+    
+    def inc(self, name, value=1):
+        """
+        Increment a counter.
+        
+        Args:
+            name: Counter name
+            value: Amount to add
+        """
+        if not self.enabled:
+            return
+        if name not in self.counters:
+            with self.lock:
+                self.counters.setdefault(name, 0)
+        self.counters[name] += value
+    
+    def observe(self, name, seconds):
+        """
+        Record a stage duration.
+        
+        Args:
+            name: Histogram name
+            seconds: Duration in seconds
+        """
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        histogram.observe(seconds)
+    
+    def gauge(self, name, func):
+        """
+        Register a gauge whose value is read from func() at snapshot time.
+        
+        Args:
+            name: Gauge name
+            func: Callable returning a number
+        """
+        with self.lock:
+            self.gauges[name] = func
+    
+    def snapshot(self):
+        """
+        Get the current value of every metric.
+        
+        Returns:
+            Dictionary with 'counters', 'gauges' and 'histograms'
+        """
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = dict(self.histograms)
+            funcs = dict(self.gauges)
+        
+        gauges = {}
+        for name, func in funcs.items():
+            try:
+                gauges[name] = func()
+            except Exception as e:
+                logger.error(f"Error reading gauge {name}: {e}")
+        
+        return {
+            'counters': counters,
+            'gauges': gauges,
+            'histograms': {name: h.snapshot() for name, h in histograms.items()},
+        }
+    
+    def render_prometheus(self):
+        """
+        Render a snapshot in the Prometheus text exposition format.
+        
+        Returns:
+            The exposition text
+        """
+        snapshot = self.snapshot()
+        lines = []
+        
+        for name, value in sorted(snapshot['counters'].items()):
+            metric = f"{self.prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        
+        for name, value in sorted(snapshot['gauges'].items()):
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+        
+        for name, histogram in sorted(snapshot['histograms'].items()):
+            metric = f"{self.prefix}_{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for bound, count in histogram['buckets'].items():
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{metric}_bucket{{le="{le}"}} {count}')
+            lines.append(f"{metric}_sum {histogram['sum']}")
+            lines.append(f"{metric}_count {histogram['count']}")
+        
+        return '\n'.join(lines) + '\n'
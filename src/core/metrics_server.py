@@ -0,0 +1,88 @@
+import os
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from loguru import logger
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves GET /metrics from the server's Metrics instance"""
+    
+    def do_GET(self):
+        if self.path not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        
+        body = self.server.metrics.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def address_string(self):
+        return self.client_address[0] if self.client_address else 'unix'
+    
+    def log_message(self, format, *args):
+        logger.debug(f"Metrics request: {format % args}")
+
+
+class _UnixMetricsServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class MetricsServer:
+    """
+    Exposes Metrics over HTTP on localhost or on a Unix domain socket.
+    """
+    
+    def __init__(self, metrics, port=9464, unix_socket=None):
+        """
+        Initialize the server.
+        
+        Args:
+            metrics: Metrics instance to serve
+            port: TCP port on 127.0.0.1 (ignored when unix_socket is set)
+            unix_socket: Optional Unix socket path
+        """
+        self.metrics = metrics
+        self.port = port
+        self.unix_socket = os.path.expanduser(unix_socket) if unix_socket else None
+        self.server = None
+        self.thread = None
+    
+    def start(self):
+        """
+        Start serving in a background thread.
+        
+        Returns:
+            bool: True if the server started
+        """
+        try:
+            if self.unix_socket:
+                if os.path.exists(self.unix_socket):
+                    os.remove(self.unix_socket)
+                self.server = _UnixMetricsServer(self.unix_socket, _MetricsHandler)
+                where = self.unix_socket
+            else:
+                self.server = ThreadingHTTPServer(('127.0.0.1', self.port), _MetricsHandler)
+                self.server.daemon_threads = True
+                where = f"http://127.0.0.1:{self.server.server_address[1]}/metrics"
+            
+            self.server.metrics = self.metrics
+            self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+            self.thread.start()
+            logger.info(f"Metrics endpoint listening on {where}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to start metrics endpoint: {e}")
+            self.server = None
+            return False
+    
+    def stop(self):
+        """Stop serving"""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            if self.unix_socket and os.path.exists(self.unix_socket):
+                os.remove(self.unix_socket)
@@ -0,0 +1,90 @@
+import time
+
+class KeystrokePacer:
+    """
+    Controls keystroke timing for a typer.
+    
+    Text is typed in batches of `batch_size` characters with `key_delay` seconds
+    between batches and `line_delay` seconds after each line. With `batch_size`
+    0 a line is typed in one go, unless `key_delay` is set: then it is paced
+    per key.
+    """
+    
+    def __init__(self, config=None):
+        """
+        Initialize the pacer.
+        
+        Args:
+            config: Typing configuration dictionary
+        """
+        config = config or {}
+        self.key_delay = config.get('key_delay', 0.0)
+        self.line_delay = config.get('line_delay', 0.01)
+        self.batch_size = config.get('batch_size', 0)
+        self.chars_typed = 0
+        self.typing_time = 0.0
+    
+    @property
+    def effective_batch_size(self):
+        """Characters typed between key_delay pauses (0: the whole line)"""
+        if self.batch_size > 0:
+            return self.batch_size
+        return 1 if self.key_delay > 0 else 0
+    
+    def batches(self, line):
+        """
+        Split a line into the chunks that are typed without pausing.
+        
+        Args:
+            line: One line of text
+        
+        Returns:
+            List of string chunks
+        """
+        size = self.effective_batch_size
+        if size <= 0 or len(line) <= size:
+            return [line]
+        return [line[i:i + size] for i in range(0, len(line), size)]
+    
+    def after_batch(self):
+        """Wait between two batches of the same line"""
+        if self.key_delay > 0:
+            time.sleep(self.key_delay)
+    
+    def after_line(self):
+        """Wait after a line has been typed"""
+        if self.line_delay > 0:
+            time.sleep(self.line_delay)
+    
+    def record(self, chars, elapsed):
+        """
+        Account for a typed record.
+        
+        Args:
+            chars: Number of characters typed
+            elapsed: Seconds spent typing them
+        """
+        self.chars_typed += chars
+        self.typing_time += elapsed
+    
+    @property
+    def chars_per_second(self):
+        """Average typing throughput so far"""
+        if self.typing_time <= 0:
+            return 0.0
+        return self.chars_typed / self.typing_time
+    
+    def get_stats(self):
+        """
+        Get pacing state and throughput.
+        
+        Returns:
+            Dictionary of current delays and counters
+        """
+        return {
+            'key_delay': self.key_delay,
+            'line_delay': self.line_delay,
+            'batch_size': self.batch_size,
+            'chars_typed': self.chars_typed,
+            'chars_per_second': self.chars_per_second,
+        }
@@ -0,0 +1,329 @@
+import os
+import sys
+import errno
+import select
+import ctypes
+import threading
+import serial.tools.list_ports
+from loguru import logger
+
+PREFERRED_DESCRIPTIONS = ("CH340", "FTDI")
+
+# inotify flags from <sys/inotify.h>
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+def port_info(port):
+    """
+    Convert a pyserial ListPortInfo into the dictionary used across the app.
+    
+    Args:
+        port: serial.tools.list_ports ListPortInfo
+    
+    Returns:
+        Dictionary with device, description, vid, pid and serial_number
+    """
+    return {
+        'device': port.device,
+        'description': port.description,
+        'vid': port.vid,
+        'pid': port.pid,
+        'serial_number': port.serial_number,
+    }
+
+def list_serial_ports():
+    """
+    Enumerate serial ports once, CH340 and FTDI devices first.
+    
+    Returns:
+        List of port info dictionaries
+    """
+    preferred = []
+    others = []
+    seen = set()
+    
+    for port in serial.tools.list_ports.comports():
+        if port.device in seen:
+            continue
+        seen.add(port.device)
+        info = port_info(port)
+        if any(name in port.description for name in PREFERRED_DESCRIPTIONS):
+            preferred.append(info)
+        else:
+            others.append(info)
+    
+    return preferred + others
+
+
+class PortWatcher:
+    """
+    Keeps an indexed cache of serial ports and pushes hot-plug events.
+    
+    The cache is indexed by device path, by (vid, pid) and by description, so
+    front ends and SerialReader look ports up without enumerating. Changes are
+    detected with inotify on /dev (Linux) or a kqueue vnode watch (macOS);
+    elsewhere the ports are re-enumerated every `poll_interval` seconds.
+    Subscribers are called as callback(event, info) with event 'added' or
+    'removed', from the watcher thread.
+    """
+    
+    def __init__(self, poll_interval=2.0, watch_dir='/dev', settle_time=0.2):
+        """
+        Initialize the watcher.
+        
+        Args:
+            poll_interval: Seconds between enumerations when no change notification is available
+            watch_dir: Directory whose entries appear and disappear with devices
+            settle_time: Seconds to wait after a change notification before enumerating
+        """
+        self.poll_interval = poll_interval
+        self.watch_dir = watch_dir
+        self.settle_time = settle_time
+        self.ports = {}
+        self.by_vid_pid = {}
+        self.by_description = {}
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.is_running = False
+        self.thread = None
+        self.refresh_count = 0
+        self._stop_r, self._stop_w = os.pipe()
+    
+    def subscribe(self, callback):
+        """Register callback(event, info) for port additions and removals"""
+        with self.lock:
+            self.subscribers.append(callback)
+    
+    def unsubscribe(self, callback):
+        """Remove a previously registered callback"""
+        with self.lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+    
+    def get_ports(self):
+        """
+        Get the cached ports, CH340 and FTDI devices first.
+        
+        Returns:
+            List of port info dictionaries
+        """
+        with self.lock:
+            ports = list(self.ports.values())
+        preferred = [p for p in ports if any(name in p['description'] for name in PREFERRED_DESCRIPTIONS)]
+        others = [p for p in ports if p not in preferred]
+        return preferred + others
+    
+    def get(self, device):
+        """Get the cached info of one device, or None"""
+        with self.lock:
+            return self.ports.get(device)
+    
+    def find(self, vid=None, pid=None, serial_number=None, description=None):
+        """
+        Look up cached ports by USB identity or description.
+        
+        Args:
+            vid: USB vendor ID
+            pid: USB product ID
+            serial_number: USB serial number
+            description: Exact port description
+        
+        Returns:
+            List of matching port info dictionaries
+        """
+        with self.lock:
+            if vid is not None and pid is not None:
+                devices = self.by_vid_pid.get((vid, pid), set())
+            elif description is not None:
+                devices = self.by_description.get(description, set())
+            else:
+                devices = self.ports.keys()
+            matches = [self.ports[d] for d in devices]
+        
+        return [
+            p for p in matches
+            if (serial_number is None or p['serial_number'] == serial_number)
+            and (description is None or p['description'] == description)
+            and (vid is None or p['vid'] == vid)
+            and (pid is None or p['pid'] == pid)
+        ]
+    
+    def refresh(self):
+        """
+        Enumerate the ports and apply the differences to the cache.
+        
+        Returns:
+            Tuple of (added, removed) port info lists
+        """
+        try:
+            current = {p['device']: p for p in list_serial_ports()}
+        except Exception as e:
+            logger.error(f"Error getting available ports: {e}")
+            return [], []
+        
+        with self.lock:
+            self.refresh_count += 1
+            removed = [info for device, info in self.ports.items() if current.get(device) != info]
+            added = [info for device, info in current.items() if self.ports.get(device) != info]
+            
+            for info in removed:
+                self._unindex(info)
+            for info in added:
+                self._index(info)
+            subscribers = list(self.subscribers)
+        
+        if added or removed:
+            logger.info(f"Serial ports changed: +{len(added)} -{len(removed)} ({len(current)} total)")
+        
+        for event, infos in (('removed', removed), ('added', added)):
+            for info in infos:
+                for callback in subscribers:
+                    try:
+                        callback(event, info)
+                    except Exception as e:
+                        logger.error(f"Error in port watcher subscriber: {e}")
+        
+        return added, removed
+    
+    def _index(self, info):
+        self.ports[info['device']] = info
+        self.by_vid_pid.setdefault((info['vid'], info['pid']), set()).add(info['device'])
+        self.by_description.setdefault(info['description'], set()).add(info['device'])
+    
+    def _unindex(self, info):
+        self.ports.pop(info['device'], None)
+        for index, key in ((self.by_vid_pid, (info['vid'], info['pid'])), (self.by_description, info['description'])):
+            devices = index.get(key)
+            if devices:
+                devices.discard(info['device'])
+                if not devices:
+                    del index[key]
+    
+    def start(self):
+        """Fill the cache and start watching for changes in a background thread"""
+        if self.is_running:
+            return
+        
+        self.refresh()
+        self.is_running = True
+        self.thread = threading.Thread(target=self._watch_loop, daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        """Stop watching"""
+        self.is_running = False
+        try:
+            os.write(self._stop_w, b'\0')
+        except OSError:
+            pass
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+    
+    def _watch_loop(self):
+        """Pick the best change notification mechanism for this platform"""
+        try:
+            if sys.platform.startswith('linux'):
+                if self._inotify_loop():
+                    return
+            elif hasattr(select, 'kqueue'):
+                if self._kqueue_loop():
+                    return
+        except Exception as e:
+            logger.warning(f"Port change notifications unavailable, polling instead: {e}")
+        
+        self._poll_loop()
+    
+    def _poll_loop(self):
+        """Re-enumerate every poll_interval seconds"""
+        logger.info(f"Watching serial ports by polling every {self.poll_interval}s")
+        while self.is_running:
+            ready, _, _ = select.select([self._stop_r], [], [], self.poll_interval)
+            if ready or not self.is_running:
+                break
+            self.refresh()
+    
+    def _settle_and_refresh(self):
+        """Wait for a burst of device node changes to finish, then enumerate"""
+        ready, _, _ = select.select([self._stop_r], [], [], self.settle_time)
+        if not ready and self.is_running:
+            self.refresh()
+    
+    def _inotify_loop(self):
+        """
+        Watch the device directory with inotify.
+        
+        Returns:
+            bool: False if inotify could not be set up
+        """
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return False
+        
+        mask = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ATTRIB
+        if libc.inotify_add_watch(fd, self.watch_dir.encode(), mask) < 0:
+            os.close(fd)
+            return False
+        
+        logger.info(f"Watching serial ports with inotify on {self.watch_dir}")
+        try:
+            while self.is_running:
+                ready, _, _ = select.select([fd, self._stop_r], [], [])
+                if self._stop_r in ready or not self.is_running:
+                    break
+                self._drain(fd)
+                self._settle_and_refresh()
+                self._drain(fd)
+        finally:
+            os.close(fd)
+        return True
+    
+    def _kqueue_loop(self):
+        """
+        Watch the device directory with a kqueue vnode filter.
+        
+        Returns:
+            bool: False if the directory could not be watched
+        """
+        try:
+            dir_fd = os.open(self.watch_dir, os.O_RDONLY)
+        except OSError:
+            return False
+        
+        kq = select.kqueue()
+        events = [
+            select.kevent(dir_fd, filter=select.KQ_FILTER_VNODE,
+                          flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+                          fflags=select.KQ_NOTE_WRITE),
+            select.kevent(self._stop_r, filter=select.KQ_FILTER_READ, flags=select.KQ_EV_ADD),
+        ]
+        
+        logger.info(f"Watching serial ports with kqueue on {self.watch_dir}")
+        try:
+            kq.control(events, 0, 0)
+            while self.is_running:
+                fired = kq.control(None, 4, None)
+                if not self.is_running or any(e.ident == self._stop_r for e in fired):
+                    break
+                self._settle_and_refresh()
+        finally:
+            kq.close()
+            os.close(dir_fd)
+        return True
+    
+    @staticmethod
+    def _drain(fd):
+        """Discard pending inotify events; only the fact that something changed matters"""
+        while True:
+            try:
+                if not os.read(fd, 4096):
+                    break
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
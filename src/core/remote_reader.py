@@ -0,0 +1,141 @@
+import threading
+from loguru import logger
+
+from core.events import EventBus
+from core.ipc import ControlClient
+
+# Events after which the cached connection state is refreshed
+CONNECTION_EVENTS = ('connected', 'disconnected', 'lost', 'reconnected', 'error')
+
+
+class RemotePortWatcher:
+    """PortWatcher stand-in fed by the daemon's 'port' events"""
+    
+    def __init__(self):
+        self.subscribers = []
+        self.lock = threading.Lock()
+    
+    def subscribe(self, callback):
+        """Register callback(event, info) for port additions and removals"""
+        with self.lock:
+            self.subscribers.append(callback)
+    
+    def unsubscribe(self, callback):
+        """Remove a previously registered callback"""
+        with self.lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+    
+    def notify(self, event, info):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for callback in subscribers:
+            try:
+                callback(event, info)
+            except Exception as e:
+                logger.error(f"Error in port watcher subscriber: {e}")
+
+
+class RemoteReader:
+    """
+    Thin-client stand-in for SerialReader, used by the GUI and tray.
+    
+    The ports are owned by the ingest daemon (main.py --headless); this class
+    forwards commands over its control socket and republishes the daemon's
+    events on a local EventBus, so front ends use the same interface as with
+    an in-process reader. Connection state is cached and refreshed whenever a
+    connection event arrives. If the daemon goes away, a fatal 'error' event
+    is published and the reader reports itself disconnected.
+    """
+    
+    def __init__(self, client):
+        """
+        Initialize the proxy.
+        
+        Args:
+            client: Connected ControlClient
+        """
+        self.client = client
+        self.events = EventBus()
+        self.port_watcher = RemotePortWatcher()
+        self.is_connected = False
+        self.is_reconnecting = False
+        self.available = True
+        self.config = self.client.request('config')
+        self._refresh_status()
+        self.client.subscribe(self._on_daemon_event, self._on_daemon_closed)
+    
+    @classmethod
+    def attach(cls, path):
+        """
+        Attach to the running daemon, starting it if needed.
+        
+        Args:
+            path: Control socket path
+        
+        Returns:
+            RemoteReader
+        """
+        return cls(ControlClient.connect_or_spawn(path))
+    
+    def _request(self, command, default=None, **args):
+        """Send a command; a lost daemon is logged and `default` returned"""
+        try:
+            return self.client.request(command, **args)
+        except (OSError, ValueError) as e:
+            logger.error(f"QR2Key daemon is not reachable: {e}")
+            self._on_daemon_closed()
+        except RuntimeError as e:
+            logger.error(f"QR2Key daemon rejected {command}: {e}")
+        return default
+    
+    def _refresh_status(self):
+        status = self._request('status')
+        if status is not None:
+            self.is_connected = status['connected']
+            self.is_reconnecting = status['reconnecting']
+    
+    def _on_daemon_event(self, event, info):
+        if event == 'port':
+            self.port_watcher.notify(info['change'], info['port'])
+            return
+        if event in CONNECTION_EVENTS:
+            self._refresh_status()
+        self.events.publish(event, **info)
+    
+    def _on_daemon_closed(self):
+        if not self.available:
+            return
+        self.available = False
+        self.is_connected = self.is_reconnecting = False
+        self.events.publish('error', message="QR2Key daemon stopped", device=None, fatal=True)
+    
+    def get_available_ports(self):
+        return self._request('ports', [])
+    
+    def connect(self, port=None):
+        """Ask the daemon to connect, with the baud rate set in `config`"""
+        connected = self._request('connect', False, port=port, baudrate=self.config.get('baudrate'))
+        self._refresh_status()
+        return connected
+    
+    def disconnect(self):
+        self._request('disconnect')
+        self._refresh_status()
+    
+    def unfinished_records(self):
+        return self._request('unfinished', [])
+    
+    def recover_spool(self, policy):
+        return self._request('recover_spool', 0, policy=policy)
+    
+    def shutdown(self):
+        """Stop the daemon (and with it reading from every port)"""
+        self._request('shutdown')
+        self.available = False
+        self.client.close()
+    
+    def close(self):
+        """Detach from the daemon, leaving it running"""
+        self.available = False
+        self.client.close()
@@ -1,59 +1,270 @@
-
+import os
 import time
+import queue
+import selectors
 import threading
+from functools import partial
+from collections import namedtuple
 import serial
-import serial.tools.list_ports
 from loguru import logger
 
+from core.framing import RecordDecoder, create_framer
+from core.dedup import DuplicateFilter
+from core.encoding_detect import DEFAULT_CANDIDATES, EncodingCache, EncodingDetection, identity_key
+from core.transform import TransformPipeline, compile_pipeline
+from core.capture import CaptureWriter
+from core.spool import Spool
+from core.events import EventBus, ThroughputTicker
+from core.shm_ring import KIND_DATA
+from core.metrics import Metrics
+from core.log_sink import payload_preview
+from core.port_watcher import list_serial_ports
+from core.supervisor import ReconnectSupervisor
+
+# seq is the record's spool sequence number, or None when the spool is off
+Record = namedtuple(
+    'Record', ['port', 'text', 'first_byte_time', 'framed_time', 'decoded_time', 'seq'], defaults=(None,)
+)
+
+# Settings that rebuild a session's framer and decoder when they change
+CODEC_KEYS = (
+    'framer', 'terminator', 'stx', 'etx', 'length_bytes', 'length_byteorder',
+    'record_suffix', 'encoding', 'error_char'
+)
+# Settings that reconfigure the duplicate filter
+DEDUP_KEYS = ('dedup_window', 'dedup_port_windows', 'dedup_global_window')
+# Settings that only take effect the next time the reader is started
+RESTART_KEYS = (
+    'read_mode', 'queue_size', 'capture_path', 'auto_reconnect', 'spool_path', 'spool_sync', 'io_ring_size'
+)
+
+class PortSession:
+    """
+    State of one open serial port: the pyserial handle plus its own framer,
+    decoder and throughput counters.
+    """
+    
+    def __init__(self, device, serial_port, framer, decoder, description=''):
+        """
+        Initialize the session.
+        
+        Args:
+            device: Port device path
+            serial_port: Open pyserial Serial instance
+            framer: Framer for this port's byte stream
+            decoder: RecordDecoder for this port
+            description: Human readable port description
+        """
+        self.device = device
+        self.description = description
+        self.serial_port = serial_port
+        self.framer = framer
+        self.decoder = decoder
+        self.identity = (None, None, None)
+        self.opened_at = time.time()
+        self.last_read_time = 0
+        self.record_start_time = None
+        self.bytes_read = 0
+        self.records = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.codec_generation = 0
+        self.encoding = None
+        self.detection = None
+        self.redetect_start = 0
+        self.redetect_errors = 0
+        # stream_typing: payload bytes of the pending record already decoded,
+        # and their text while it waits for the typer to catch up
+        self.stream_pos = 0
+        self.stream_text = ''
+        # Lines of the current scan held for duplicate suppression (see _groups_scans)
+        self.scan_text = ''
+        self.scan_start = None
+        
+        try:
+            self.fd = serial_port.fileno()
+        except Exception:
+            self.fd = None
+    
+    @property
+    def awaiting_gap(self):
+        """True while a partial record or a held scan waits for the idle gap"""
+        return bool(self.framer.pending or self.scan_text)
+    
+    def get_stats(self):
+        """
+        Get throughput and framing latency for this port.
+        
+        Latency is measured from the first byte of a record to the moment the
+        framer completes it.
+        
+        Returns:
+            Dictionary of per-port counters
+        """
+        elapsed = max(time.time() - self.opened_at, 1e-9)
+        return {
+            'description': self.description,
+            'encoding': self.decoder.encoding,
+            'bytes': self.bytes_read,
+            'records': self.records,
+            'bytes_per_second': self.bytes_read / elapsed,
+            'records_per_second': self.records / elapsed,
+            'latency_avg': self.latency_total / self.records if self.records else 0.0,
+            'latency_max': self.latency_max,
+        }
+
 class SerialReader:
     """
     Handles serial port communication for QR code data reading.
     Automatically detects USB-COM ports (CH340/FTDI) and reads Shift-JIS encoded data.
+    
+    Any number of ports can be open at once. A single read thread services all
+    of them from one selector, keeping framing and decoding state per port and
+    merging their records into one ordered queue. A separate typer thread
+    drains the queue so slow keystroke emission never stalls the serial ports.
+    With `read_mode: process` the ports are read by a separate process
+    (core.io_process) and the read thread consumes its shared-memory ring.
     """
     
-    def __init__(self, typer, config):
+    def __init__(self, typer, config, metrics=None, port_watcher=None):
         """
         Initialize the SerialReader.
         
         Args:
-            typer: The keyboard typer instance to send decoded text
-            config: Serial configuration dictionary
+            typer: The keyboard typer instance to send decoded text, or an output
+                   sink / MultiSink (see core.sinks)
+            config: Serial configuration dictionary (see DEFAULT_CONFIG in core.config;
+                    without `spool_path` or `encoding_cache_path` nothing is written to disk)
+            metrics: Optional Metrics instance for hot-path instrumentation
+            port_watcher: Optional PortWatcher whose cache replaces port enumeration
         """
         self.typer = typer
+        # Sinks take the whole Record (port and timestamps); typers only the text
+        self._write_record = getattr(typer, 'write_record', None)
         self.config = config
-        self.serial_port = None
+        self.metrics = metrics or Metrics()
+        self.port_watcher = port_watcher
+        self.supervisor = None
+        if self.config.get('auto_reconnect', True):
+            self.supervisor = ReconnectSupervisor(self, self.config, port_watcher)
+        self.sessions = {}
+        self.lock = threading.Lock()
         self.is_connected = False
         self.is_running = False
         self.read_thread = None
-        self.buffer = bytearray()
-        self.last_read_time = 0
         self.available_ports = []
+        self.wakeup_count = 0
+        self.type_thread = None
+        self.record_queue = queue.Queue(maxsize=self.config.get('queue_size', 64))
+        self.records_enqueued = 0
+        self.records_dropped = 0
+        self.max_queue_depth = 0
+        self.capture = None
+        self.dedup = DuplicateFilter.from_config(self.config)
+        self.transforms = self._compile_transforms()
+        self.encoding_cache = EncodingCache(self.config.get('encoding_cache_path'))
+        self.spool = self._open_spool()
+        self.io_process = None
+        if self.config.get('read_mode', 'event') == 'process':
+            from core.io_process import SerialIOProcess
+            self.io_process = SerialIOProcess(
+                self.config.get('io_ring_size', 1024 * 1024), self.config.get('timeout', 0.05)
+            )
+        self.events = EventBus()
+        self.throughput = ThroughputTicker(self.events)
+        self._sessions_changed = False
+        self._pending_config = None
+        self._codec_generation = 0
+        self.config_reloads = 0
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        
+        self.metrics.register_counters(
+            'bytes', 'records', 'decode_replacements', 'records_dropped',
+            'port_errors', 'reconnects', 'typing_errors', 'records_deduplicated',
+            'records_filtered'
+        )
+        self.metrics.gauge('queue_depth', lambda: self.queue_depth)
+        self.metrics.gauge('ports_open', lambda: len(self.sessions))
+        self.metrics.gauge('read_wakeups', lambda: self.wakeup_count)
+        if self.spool is not None:
+            self.metrics.gauge('spool_unfinished', lambda: len(self.spool.outstanding))
+        if self.io_process is not None:
+            self.metrics.gauge('io_ring_dropped', lambda: self.io_process.get_stats()['ring_dropped'])
+    
+    def _open_spool(self):
+        """Open the record spool if `spool_path` is set"""
+        path = self.config.get('spool_path')
+        if not path:
+            return None
+        try:
+            return Spool(
+                path,
+                self.config.get('spool_sync', 'interval'),
+                self.config.get('spool_sync_interval', 0.05),
+                self.config.get('spool_max_bytes', 1024 * 1024)
+            )
+        except Exception as e:
+            logger.error(f"Failed to open spool {path}, records will not be journaled: {e}")
+            return None
+    
+    def unfinished_records(self):
+        """
+        Records the last run journaled but never handed to the output.
+        
+        Returns:
+            List of spool.SpooledRecord (empty when the spool is off)
+        """
+        return self.spool.unfinished() if self.spool is not None else []
+    
+    def recover_spool(self, policy):
+        """
+        Deal with records left unfinished by a crash or forced quit.
+        
+        Args:
+            policy: 'replay' types them now (in their original order), 'discard'
+                    marks them done; anything else keeps them for the next start
+        
+        Returns:
+            int: Number of unfinished records
+        """
+        records = self.unfinished_records()
+        if not records:
+            return 0
         
+        if policy == 'replay':
+            logger.info(f"Replaying {len(records)} unfinished records from the spool")
+            self._start_typing()
+            for spooled in records:
+                # Blocking put: the reader is not running yet, so queue_policy does not apply
+                now = time.time()
+                self.record_queue.put(Record(spooled.port, spooled.text, now, now, now, spooled.seq))
+                self.records_enqueued += 1
+        elif policy == 'discard':
+            logger.warning(f"Discarding {len(records)} unfinished records from the spool")
+            for spooled in records:
+                self.spool.complete(spooled.seq)
+        else:
+            logger.warning(f"Keeping {len(records)} unfinished records in the spool until they are replayed or discarded")
+        return len(records)
+    
     def get_available_ports(self):
         """
         Get a list of available serial ports, prioritizing CH340 and FTDI devices.
         
+        Reads the port watcher's cache when one is attached; otherwise the
+        ports are enumerated.
+        
         Returns:
-            List of port info dictionaries with 'device' and 'description' keys
+            List of port info dictionaries with 'device', 'description', 'vid',
+            'pid' and 'serial_number' keys
         """
+        if self.port_watcher is not None:
+            self.available_ports = self.port_watcher.get_ports()
+            return self.available_ports
+        
         try:
-            ports = list(serial.tools.list_ports.comports())
-            port_list = []
-            
-            for port in ports:
-                if "CH340" in port.description or "FTDI" in port.description:
-                    port_list.append({
-                        'device': port.device,
-                        'description': port.description
-                    })
-            
-            for port in ports:
-                if not any(p['device'] == port.device for p in port_list):
-                    port_list.append({
-                        'device': port.device,
-                        'description': port.description
-                    })
-            
+            port_list = list_serial_ports()
             self.available_ports = port_list
             logger.info(f"Found {len(port_list)} serial ports")
             return port_list
@@ -63,113 +274,1118 @@ class SerialReader:
     
     def connect(self, port=None):
         """
-        Connect to a serial port. If port is None, connect to the first available port.
+        Connect to a serial port. If port is None, connect to the first available port,
+        or to every configured/matching port when `ports` or `multi_port` is set.
         
         Args:
             port: Optional port device path to connect to
-            
+        
         Returns:
             bool: True if connection successful, False otherwise
         """
-        if self.is_connected:
+        if port is None and (self.config.get('ports') or self.config.get('multi_port')):
+            return self.connect_all()
+        
+        if self.is_connected or self.is_reconnecting:
             self.disconnect()
         
+        description = ''
+        if port is None:
+            ports = self.get_available_ports()
+            if not ports:
+                logger.error("No serial ports available")
+                return False
+            port = ports[0]['device']
+            description = ports[0]['description']
+        
+        return self.add_port(port, description)
+    
+    def connect_all(self, ports=None):
+        """
+        Connect to several ports at once.
+        
+        Without an explicit list, the `ports` config list is used, or else every
+        available port whose description contains one of `port_match`
+        (default CH340 and FTDI).
+        
+        Args:
+            ports: Optional list of port device paths
+        
+        Returns:
+            bool: True if at least one port was opened
+        """
+        if self.is_connected or self.is_reconnecting:
+            self.disconnect()
+        
+        if ports is None:
+            ports = self.config.get('ports')
+        
+        available = {p['device']: p['description'] for p in self.get_available_ports()}
+        if not ports:
+            patterns = self.config.get('port_match', ['CH340', 'FTDI'])
+            ports = [
+                device for device, description in available.items()
+                if any(pattern in description for pattern in patterns)
+            ]
+        
+        if not ports:
+            logger.error("No matching serial ports available")
+            return False
+        
+        opened = 0
+        for device in ports:
+            if self.add_port(device, available.get(device, '')):
+                opened += 1
+        
+        logger.info(f"Connected to {opened} of {len(ports)} serial ports")
+        return opened > 0
+    
+    def add_port(self, port, description=''):
+        """
+        Open one more port and start servicing it from the read thread.
+        
+        Args:
+            port: Port device path or pyserial URL
+            description: Optional human readable description
+        
+        Returns:
+            bool: True if the port was opened
+        """
+        if port in self.sessions:
+            return True
+        
         try:
-            if port is None:
-                ports = self.get_available_ports()
-                if not ports:
-                    logger.error("No serial ports available")
-                    return False
-                port = ports[0]['device']
-            
-            self.serial_port = serial.Serial(
-                port=port,
-                baudrate=self.config.get('baudrate', 9600),
-                timeout=self.config.get('timeout', 0.05)
-            )
+            session = self._create_session(port, self._open_serial(port), description)
+            session.identity = self._port_identity(port)
+            self._init_encoding(session)
             
+            with self.lock:
+                self.sessions[port] = session
+                self._sessions_changed = True
             self.is_connected = True
             logger.info(f"Connected to serial port: {port}")
             
             self.start_reading()
+            self._wake()
+            self.events.publish('connected', device=port)
             return True
         except Exception as e:
             logger.error(f"Failed to connect to serial port {port}: {e}")
-            self.is_connected = False
+            self.is_connected = bool(self.sessions)
+            self.events.publish('error', message=f"Failed to connect to {port}: {e}", device=port, fatal=False)
             return False
     
-    def disconnect(self):
-        """Disconnect from the serial port"""
-        self.stop_reading()
+    def _open_serial(self, port):
+        """Open a pyserial handle with the configured settings (a RingPort in process mode)"""
+        if self.io_process is not None:
+            return self.io_process.open_port(
+                port, self.config.get('baudrate', 9600), self.config.get('timeout', 0.05)
+            )
+        # serial_for_url also accepts pyserial URLs such as loop:// for benchmarks
+        return serial.serial_for_url(
+            port,
+            baudrate=self.config.get('baudrate', 9600),
+            timeout=self.config.get('timeout', 0.05)
+        )
+    
+    def _port_identity(self, port):
+        """
+        Look up the USB identity of a port for matching it after a reconnect.
+        
+        Returns:
+            Tuple of (vid, pid, serial_number); all None for non-USB ports
+        """
+        info = None
+        if self.port_watcher is not None:
+            info = self.port_watcher.get(port)
+        else:
+            info = next((p for p in self.available_ports if p['device'] == port), None)
+        
+        if not info or info.get('vid') is None:
+            return (None, None, None)
+        return (info['vid'], info['pid'], info.get('serial_number'))
+    
+    @property
+    def is_reconnecting(self):
+        """True while a failed port is waiting to be reopened"""
+        return self.supervisor is not None and self.supervisor.pending
+    
+    def reattach_session(self, session, device):
+        """
+        Reopen a lost session's port, possibly under a new device path.
+        
+        The session's framer and decoder are kept, so a record that was
+        partially received before the failure is completed by the bytes that
+        follow the reconnect.
+        
+        Args:
+            session: The detached PortSession
+            device: Device path to open
+        
+        Returns:
+            bool: True if the port was reopened
+        """
+        try:
+            serial_port = self._open_serial(device)
+        except Exception as e:
+            logger.debug("Reconnect to {} failed: {}", device, e)
+            return False
+        
+        session.serial_port = serial_port
+        session.device = device
+        session.last_read_time = time.time()
+        try:
+            session.fd = serial_port.fileno()
+        except Exception:
+            session.fd = None
+        
+        with self.lock:
+            self.sessions[device] = session
+            self._sessions_changed = True
+        self.is_connected = True
+        
+        self.start_reading()
+        self._wake()
+        self.events.publish('reconnected', device=device)
+        return True
+    
+    def _create_session(self, port, serial_port, description=''):
+        """Create a PortSession with a fresh framer and decoder from the current config"""
+        session = PortSession(
+            port,
+            serial_port,
+            create_framer(self.config),
+            self._create_decoder(),
+            description
+        )
+        session.codec_generation = self._codec_generation
+        return session
+    
+    def _create_decoder(self, session=None):
+        """Create a RecordDecoder for the session's detected encoding, or the configured one"""
+        encoding = None
+        if session is not None and self.config.get('encoding_detect', True):
+            encoding = session.encoding
+        return RecordDecoder(
+            encoding or self.config.get('encoding', 'shift_jis'),
+            self.config.get('error_char', '�')
+        )
+    
+    def _encoding_candidates(self, session):
+        """Candidate encodings in order of preference: current verdict, configured, then the rest"""
+        candidates = [session.encoding, self.config.get('encoding', 'shift_jis')]
+        candidates += self.config.get('encoding_candidates', DEFAULT_CANDIDATES)
+        return [encoding for i, encoding in enumerate(candidates) if encoding and encoding not in candidates[:i]]
+    
+    def _init_encoding(self, session):
+        """Use the stored encoding verdict for a new session, or start detecting one"""
+        if not self.config.get('encoding_detect', True):
+            return
         
-        if self.serial_port and self.serial_port.is_open:
+        verdict = self.encoding_cache.get(identity_key(session))
+        if verdict:
+            logger.info(f"Using stored encoding {verdict} for {session.device}")
+            self._set_session_encoding(session, verdict)
+        else:
+            session.detection = EncodingDetection(
+                self._encoding_candidates(session),
+                self.config.get('encoding_detect_records', 5)
+            )
+    
+    def _set_session_encoding(self, session, encoding):
+        """Switch a session's decoder now, or at the next record boundary if a character is split"""
+        session.encoding = encoding
+        if session.decoder.encoding == encoding:
+            return
+        if session.decoder.pending:
+            session.codec_generation = -1
+            return
+        
+        replacements = session.decoder.replacements
+        session.decoder = self._create_decoder(session)
+        session.decoder.replacements = replacements
+    
+    def _detect_encoding(self, session, record):
+        """Score a record for a session that has no encoding verdict yet"""
+        detection = session.detection
+        if not detection.score(record):
+            return
+        
+        self._set_session_encoding(session, detection.best)
+        if detection.done:
+            session.detection = None
+            self.encoding_cache.put(identity_key(session), session.encoding)
+            logger.info(f"Detected encoding {session.encoding} for {session.device}")
+    
+    def _note_replacements(self, session):
+        """
+        Count a record that needed replacement characters; too many within
+        `encoding_redetect_window` records restart detection for the port.
+        
+        Returns:
+            bool: True if detection was restarted
+        """
+        if session.records - session.redetect_start > self.config.get('encoding_redetect_window', 20):
+            session.redetect_start = session.records
+            session.redetect_errors = 0
+        session.redetect_errors += 1
+        
+        if session.redetect_errors >= self.config.get('encoding_redetect_errors', 3):
+            logger.warning(f"Replacement characters from {session.device}, detecting its encoding again")
+            session.redetect_errors = 0
+            session.detection = EncodingDetection(
+                self._encoding_candidates(session),
+                self.config.get('encoding_detect_records', 5)
+            )
+            return True
+        return False
+    
+    def _compile_transforms(self):
+        """Compile the `transforms` config list; an invalid list disables transforms"""
+        try:
+            return compile_pipeline(self.config.get('transforms'))
+        except ValueError as e:
+            logger.error(f"Invalid transforms, records are typed unchanged: {e}")
+            return TransformPipeline([])
+    
+    def apply_config(self, config):
+        """
+        Apply a reloaded serial configuration without closing any port.
+        
+        Baud rate and timeouts are changed on the open ports. Framer and
+        decoder settings are swapped per port at the next record boundary, so
+        a record that is partly received keeps the framing it started with and
+        no bytes are dropped. The change is made on the read thread between
+        reads; without a running read thread it is applied immediately.
+        
+        Args:
+            config: New serial configuration dictionary (already validated)
+        """
+        with self.lock:
+            self._pending_config = dict(config)
+        if self.is_running:
+            self._wake()
+        else:
+            self._apply_pending_config()
+    
+    def _apply_pending_config(self):
+        """Apply the configuration queued by apply_config(); returns True if anything changed"""
+        with self.lock:
+            config, self._pending_config = self._pending_config, None
+            sessions = list(self.sessions.values())
+        if config is None:
+            return False
+        
+        changed = {key for key in set(self.config) | set(config) if self.config.get(key) != config.get(key)}
+        if not changed:
+            return False
+        
+        # Update in place: the supervisor and front ends hold the same dict
+        for key in set(self.config) - set(config):
+            del self.config[key]
+        self.config.update(config)
+        self.config_reloads += 1
+        
+        for session in sessions:
+            port = session.serial_port
+            if port is None:
+                continue
             try:
-                self.serial_port.close()
-                logger.info("Disconnected from serial port")
+                if 'baudrate' in changed:
+                    port.baudrate = self.config.get('baudrate', 9600)
+                if 'timeout' in changed:
+                    port.timeout = self.config.get('timeout', 0.05)
             except Exception as e:
-                logger.error(f"Error disconnecting from serial port: {e}")
+                logger.error(f"Failed to apply port settings to {session.device}: {e}")
+        
+        if changed.intersection(DEDUP_KEYS):
+            self.dedup.configure(
+                self.config.get('dedup_window', 1.0),
+                self.config.get('dedup_port_windows'),
+                self.config.get('dedup_global_window', 0.0)
+            )
+        
+        if 'transforms' in changed:
+            self.transforms = self._compile_transforms()
+        
+        if changed.intersection(CODEC_KEYS):
+            self._codec_generation += 1
+            for session in sessions:
+                self._refresh_codec(session)
+        
+        restart = sorted(changed.intersection(RESTART_KEYS))
+        if restart:
+            logger.info(f"Settings take effect after reconnecting: {', '.join(restart)}")
+        logger.info(f"Applied serial settings: {', '.join(sorted(changed))}")
+        return True
+    
+    def _refresh_codec(self, session):
+        """Give a session the current framer and decoder if it is between records"""
+        if session.codec_generation == self._codec_generation:
+            return
+        if session.framer.pending or session.decoder.pending:
+            return
+        
+        replacements = session.decoder.replacements
+        session.framer = create_framer(self.config)
+        session.decoder = self._create_decoder(session)
+        session.decoder.replacements = replacements
+        session.codec_generation = self._codec_generation
+    
+    def open_virtual_port(self, device):
+        """
+        Create a session that is fed by feed() instead of a serial port,
+        e.g. when replaying a capture file.
+        
+        Args:
+            device: Name the records are attributed to
+        
+        Returns:
+            PortSession to pass to feed() and flush_port()
+        """
+        self._start_typing()
+        session = self._create_session(device, None, 'virtual')
+        self._init_encoding(session)
+        return session
+    
+    def feed(self, session, data, timestamp=None):
+        """
+        Push bytes into a session's framing, decoding and typing path.
+        
+        Args:
+            session: PortSession from open_virtual_port()
+            data: Raw bytes as they would have been read from the port
+            timestamp: Optional time.time() at which they were read (e.g. from
+                       a capture), used for record times and duplicate windows
+        """
+        self._ingest(session, data, timestamp)
+    
+    def flush_port(self, session, timestamp=None):
+        """
+        Emit a session's partial record as if the idle gap had expired.
+        
+        Args:
+            session: PortSession to flush
+            timestamp: Optional time.time() at which the gap expired
+        """
+        self._flush_session(session, timestamp)
+    
+    def wait_idle(self, timeout=None):
+        """
+        Wait until every queued record has been handed to the typer.
+        
+        Args:
+            timeout: Optional maximum seconds to wait
+        
+        Returns:
+            bool: True if the queue drained
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while self.record_queue.unfinished_tasks:
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+    
+    def remove_port(self, port):
+        """
+        Close one port, leaving the others connected.
+        
+        Args:
+            port: Port device path
+        """
+        if self.supervisor:
+            self.supervisor.cancel(port)
+        
+        with self.lock:
+            session = self.sessions.pop(port, None)
+            self._sessions_changed = True
+            self.is_connected = bool(self.sessions)
+        
+        if session is None:
+            return
+        
+        if self.sessions:
+            self._wake()
+        else:
+            self.stop_reading()
+        self._close_session(session)
+        self.events.publish('disconnected', device=port)
+    
+    def disconnect(self):
+        """Disconnect from all serial ports"""
+        if self.supervisor:
+            self.supervisor.cancel_all()
+        self.stop_reading()
+        
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+            self._sessions_changed = True
+        
+        for session in sessions:
+            self._close_session(session)
+        
+        if self.capture:
+            self.capture.close()
+            self.capture = None
         
         self.is_connected = False
-        self.serial_port = None
+        for session in sessions:
+            self.events.publish('disconnected', device=session.device)
+    
+    def _close_session(self, session):
+        """Close the pyserial handle of a session"""
+        if session.serial_port and session.serial_port.is_open:
+            try:
+                session.serial_port.close()
+                logger.info(f"Disconnected from serial port: {session.device}")
+            except Exception as e:
+                logger.error(f"Error disconnecting from serial port {session.device}: {e}")
     
     def start_reading(self):
-        """Start the serial reading thread"""
+        """Start the serial reading thread, and the typing thread on first use"""
         if self.is_running:
             return
         
         self.is_running = True
+        self._start_typing()
+        
+        capture_path = self.config.get('capture_path')
+        if capture_path and self.capture is None:
+            try:
+                self.capture = CaptureWriter(capture_path)
+            except Exception as e:
+                logger.error(f"Failed to open capture file {capture_path}: {e}")
+        
         self.read_thread = threading.Thread(target=self._read_loop, daemon=True)
         self.read_thread.start()
         logger.info("Serial reading thread started")
     
+    def _start_typing(self):
+        """Start the typing thread if it is not running yet"""
+        if not (self.type_thread and self.type_thread.is_alive()):
+            self.type_thread = threading.Thread(target=self._type_loop, daemon=True)
+            self.type_thread.start()
+    
     def stop_reading(self):
-        """Stop the serial reading thread"""
+        """
+        Stop the serial reading thread.
+        
+        The typing thread is left running (blocked on the queue) so records
+        already queued are still typed.
+        """
         self.is_running = False
-        if self.read_thread and self.read_thread.is_alive():
+        self._wake()
+        if self.read_thread and self.read_thread.is_alive() and self.read_thread is not threading.current_thread():
             self.read_thread.join(timeout=1.0)
         logger.info("Serial reading thread stopped")
     
+    @property
+    def queue_depth(self):
+        """Number of decoded records waiting to be typed"""
+        return self.record_queue.qsize()
+    
+    def get_stats(self):
+        """
+        Get ingest counters.
+        
+        Returns:
+            Dictionary of read loop and record queue counters
+        """
+        stats = {
+            'wakeups': self.wakeup_count,
+            'records_enqueued': self.records_enqueued,
+            'records_dropped': self.records_dropped,
+            'records_deduplicated': self.dedup.suppressed,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+        }
+        if self.io_process is not None:
+            stats.update(self.io_process.get_stats())
+        return stats
+    
+    def get_port_stats(self):
+        """
+        Get throughput and latency for every open port.
+        
+        Returns:
+            Dictionary mapping port device path to its counters
+        """
+        with self.lock:
+            sessions = list(self.sessions.values())
+        return {session.device: session.get_stats() for session in sessions}
+    
+    def _wake(self):
+        """Interrupt the read thread's wait so it notices stop or port changes"""
+        try:
+            os.write(self._wakeup_w, b'\0')
+        except OSError:
+            pass
+    
     def _read_loop(self):
         """Main reading loop that runs in a separate thread"""
-        while self.is_running and self.serial_port and self.serial_port.is_open:
-            try:
-                data = self.serial_port.read(self.serial_port.in_waiting or 1)
+        try:
+            read_mode = self.config.get('read_mode', 'event')
+            if read_mode == 'poll':
+                self._poll_loop()
+            elif read_mode == 'process':
+                self._ring_loop()
+            else:
+                self._event_loop()
+        except Exception as e:
+            # Without this the ports would look connected while nothing reads them
+            logger.error(f"Serial reading thread failed: {e}")
+            self.events.publish('error', message=f"Serial reading thread failed: {e}", device=None, fatal=True)
+            self.disconnect()
+    
+    def _poll_loop(self):
+        """Legacy reading loop that polls every port every millisecond"""
+        gap = self.config.get('timeout', 0.05)
+        
+        while self.is_running:
+            if self._pending_config is not None and self._apply_pending_config():
+                gap = self.config.get('timeout', 0.05)
+            
+            self.wakeup_count += 1
+            with self.lock:
+                sessions = list(self.sessions.values())
+            
+            for session in sessions:
+                try:
+                    waiting = session.serial_port.in_waiting
+                    if waiting:
+                        self._ingest(session, session.serial_port.read(waiting))
+                    elif session.awaiting_gap and (time.time() - session.last_read_time) > gap:
+                        self._flush_session(session)
+                except Exception as e:
+                    self._handle_read_error(session, e)
+            
+            time.sleep(0.001)
+    
+    def _event_loop(self):
+        """
+        Reading loop that sleeps until bytes arrive on any port or an idle-gap
+        deadline expires.
+        
+        With nothing pending the thread blocks indefinitely; stop_reading() and
+        port changes interrupt it through a wakeup pipe. Ports without a file
+        descriptor (e.g. loop://) are polled once per idle gap instead.
+        """
+        gap = self.config.get('timeout', 0.05)
+        selector = selectors.DefaultSelector()
+        selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        polled = []
+        
+        try:
+            while self.is_running:
+                if self._pending_config is not None and self._apply_pending_config():
+                    gap = self.config.get('timeout', 0.05)
+                if self._sessions_changed:
+                    polled = self._sync_selector(selector)
                 
-                if data:
-                    self.buffer.extend(data)
-                    self.last_read_time = time.time()
-                    
-                    if b'\n' in self.buffer:
-                        self._process_buffer()
-                else:
-                    current_time = time.time()
-                    if self.buffer and (current_time - self.last_read_time) > self.config.get('timeout', 0.05):
-                        self._process_buffer()
+                with self.lock:
+                    sessions = list(self.sessions.values())
+                wait = self._idle_wait(sessions, gap)
+                if polled:
+                    wait = gap if wait is None else min(wait, gap)
                 
-                time.sleep(0.001)
+                self.wakeup_count += 1
+                events = selector.select(wait)
                 
+                for key, _ in events:
+                    session = key.data
+                    if session is None:
+                        self._drain_wakeup()
+                        continue
+                    try:
+                        port = session.serial_port
+                        self._ingest(session, port.read(port.in_waiting or 1))
+                    except Exception as e:
+                        self._handle_read_error(session, e)
+                
+                for session in polled:
+                    try:
+                        waiting = session.serial_port.in_waiting
+                        if waiting:
+                            self._ingest(session, session.serial_port.read(waiting))
+                    except Exception as e:
+                        self._handle_read_error(session, e)
+                
+                self._flush_idle(sessions, gap)
+        finally:
+            selector.close()
+    
+    def _ring_loop(self):
+        """
+        Reading loop for `read_mode: process`: frame the chunks the I/O
+        process put in the shared ring.
+        
+        Sleeps on the ring's doorbell and the wakeup pipe, with the same
+        idle-gap deadlines as the event loop. Chunks are fed to the framer as
+        memoryviews of the shared memory and carry the time the I/O process
+        read them, so latency and idle gaps are measured from the port.
+        """
+        gap = self.config.get('timeout', 0.05)
+        io = self.io_process
+        selector = selectors.DefaultSelector()
+        selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        selector.register(io.doorbell_fd, selectors.EVENT_READ, io)
+        by_id = {}
+        
+        try:
+            while self.is_running:
+                if self._pending_config is not None and self._apply_pending_config():
+                    gap = self.config.get('timeout', 0.05)
+                with self.lock:
+                    if self._sessions_changed:
+                        self._sessions_changed = False
+                        by_id = {session.serial_port.port_id: session for session in self.sessions.values()}
+                    sessions = list(self.sessions.values())
+                
+                self.wakeup_count += 1
+                for key, _ in selector.select(self._idle_wait(sessions, gap)):
+                    if key.data is None:
+                        self._drain_wakeup()
+                    elif not io.drain_doorbell():
+                        raise RuntimeError("serial I/O process exited")
+                
+                # Read head after the doorbell so the payload is visible (see SharedRing)
+                for kind, port_id, payload, timestamp in io.entries():
+                    session = by_id.get(port_id)
+                    if session is None:
+                        continue
+                    if kind == KIND_DATA:
+                        self._ingest(session, payload, timestamp)
+                    else:
+                        by_id.pop(port_id, None)
+                        self._handle_read_error(session, OSError(bytes(payload).decode('utf-8', 'replace')))
+                
+                self._flush_idle(sessions, gap)
+        finally:
+            selector.close()
+    
+    def _idle_wait(self, sessions, gap):
+        """Seconds until the earliest partial record's idle gap expires, or None"""
+        wait = None
+        now = time.time()
+        for session in sessions:
+            if session.awaiting_gap:
+                remaining = max(0.0, session.last_read_time + gap - now)
+                wait = remaining if wait is None else min(wait, remaining)
+        return wait
+    
+    def _flush_idle(self, sessions, gap):
+        """Emit the partial records of ports that have been idle for `gap` seconds"""
+        now = time.time()
+        for session in sessions:
+            if session.awaiting_gap and (now - session.last_read_time) >= gap:
+                self._flush_session(session)
+    
+    def _sync_selector(self, selector):
+        """
+        Register newly opened ports with the selector and drop closed ones.
+        
+        Returns:
+            List of sessions that have no file descriptor and must be polled
+        """
+        with self.lock:
+            self._sessions_changed = False
+            sessions = list(self.sessions.values())
+        
+        for key in list(selector.get_map().values()):
+            if key.data is not None and key.data not in sessions:
+                selector.unregister(key.fileobj)
+        
+        registered = {key.data for key in selector.get_map().values()}
+        polled = []
+        for session in sessions:
+            if session.fd is None:
+                polled.append(session)
+            elif session not in registered:
+                selector.register(session.fd, selectors.EVENT_READ, session)
+        return polled
+    
+    def _drain_wakeup(self):
+        """Empty the wakeup pipe"""
+        try:
+            while os.read(self._wakeup_r, 512):
+                pass
+        except OSError:
+            pass
+    
+    def _handle_read_error(self, session, error):
+        """
+        Handle a port whose read failed; the remaining ports keep running.
+        
+        With auto_reconnect the session is detached and handed to the
+        supervisor, otherwise the port is closed for good.
+        """
+        logger.error(f"Error in serial reading loop ({session.device}): {error}")
+        self.metrics.inc('port_errors')
+        self.events.publish('error', message=str(error), device=session.device, fatal=False)
+        
+        if self.supervisor is None:
+            self.remove_port(session.device)
+            return
+        
+        with self.lock:
+            self.sessions.pop(session.device, None)
+            self._sessions_changed = True
+            self.is_connected = bool(self.sessions)
+        self._close_session(session)
+        self.supervisor.track(session)
+        self.events.publish('lost', device=session.device)
+    
+    def _ingest(self, session, data, now=None):
+        """
+        Feed bytes read from a port through its framer.
+        
+        Args:
+            session: The PortSession the bytes came from
+            data: Bytes (or a memoryview) read from the port
+            now: Optional time.time() of the read (default now)
+        """
+        if not data:
+            return
+        
+        if now is None:
+            now = time.time()
+        if self.capture and session.serial_port is not None:
+            self.capture.write(session.device, data, now)
+        
+        session.last_read_time = now
+        session.bytes_read += len(data)
+        self.metrics.inc('bytes', len(data))
+        if not session.framer.pending:
+            session.record_start_time = now
+        if session.codec_generation != self._codec_generation:
+            data = self._feed_until_boundary(session, data, now)
+        
+        for record in session.framer.feed(data):
+            self._process_record(session, record, now)
+        
+        if session.framer.pending and self._can_stream(session):
+            self._stream_partial(session, now)
+        
+        if session.framer.pending:
+            if session.record_start_time is None:
+                session.record_start_time = now
+        else:
+            session.record_start_time = None
+    
+    def _feed_until_boundary(self, session, data, now):
+        """
+        Feed a session whose framer predates a config reload up to the first
+        record boundary, then switch it to the new framer and decoder.
+        
+        Returns:
+            The bytes that are left for the new framer
+        """
+        if not session.framer.pending:
+            self._refresh_codec(session)
+            return data
+        
+        # Byte by byte, so the boundary is found even mid-chunk; this only
+        # happens for the one read that straddles a reload.
+        for i in range(len(data)):
+            records = session.framer.feed(data[i:i + 1])
+            for record in records:
+                self._process_record(session, record, now)
+            if records and not session.framer.pending:
+                self._refresh_codec(session)
+                if session.codec_generation == self._codec_generation:
+                    session.record_start_time = now
+                    return data[i + 1:]
+        return b''
+    
+    def _can_stream(self, session):
+        """
+        True if `stream_typing` may type this session's pending record early.
+        
+        Transforms and non-keyboard outputs need the whole record, encoding
+        detection needs it to score, a scan held for duplicate suppression
+        must be complete before any of it is typed, and a record that
+        straddles a config reload is finished with the old codec first.
+        """
+        return (
+            self.config.get('stream_typing', 'off') != 'off'
+            and self._write_record is None
+            and not self._groups_scans(session)
+            and not self.transforms
+            and session.detection is None
+            and session.codec_generation == self._codec_generation
+        )
+    
+    def _stream_partial(self, session, now):
+        """
+        Queue the decodable part of a pending record for the typer.
+        
+        With `stream_typing: lines` every completed line is passed on, with
+        `chunks` everything received (a split multi-byte character is held
+        back by the decoder). Text is queued only while the typer has nothing
+        else waiting; otherwise it accumulates, so a slow typer gets fewer,
+        longer pieces instead of a backlog of tiny ones. The piece is not
+        spooled: like the rest of an unfinished record it is lost in a crash.
+        """
+        data = session.framer.partial(session.stream_pos)
+        if self.config.get('stream_typing') == 'lines':
+            # LF never occurs inside a Shift_JIS, CP932 or UTF-8 character
+            data = data[:data.rfind(b'\n') + 1]
+        if data:
+            session.stream_pos += len(data)
+            replacements = session.decoder.replacements
+            session.stream_text += session.decoder.decode(data)
+            if session.decoder.replacements != replacements:
+                self.metrics.inc('decode_replacements', session.decoder.replacements - replacements)
+        
+        if session.stream_text and self.record_queue.empty():
+            first_byte_time = session.record_start_time or now
+            self._enqueue_record(Record(session.device, session.stream_text, first_byte_time, now, time.time()))
+            session.stream_text = ''
+    
+    def _groups_scans(self, session):
+        """
+        True if the session's records are lines that must be grouped into scans.
+        
+        Duplicate suppression compares whole scans. A terminator framer yields
+        one record per line, so while dedup is on its lines are held until
+        the idle gap ends the scan, and the scan is then checked and typed as
+        one record. A repeated line inside a multi-line code is never dropped.
+        """
+        return self.dedup.enabled and not session.framer.whole_scans
+    
+    def _flush_session(self, session, now=None):
+        """Emit a port's partial record, and its held scan, after the idle-gap timeout"""
+        now = now or time.time()
+        self._process_record(session, session.framer.flush(), now)
+        session.record_start_time = None
+        if session.scan_text:
+            text, first_byte_time = session.scan_text, session.scan_start
+            session.scan_text = ''
+            session.scan_start = None
+            try:
+                self._dispatch_text(session, text, first_byte_time, now, time.time())
             except Exception as e:
-                logger.error(f"Error in serial reading loop: {e}")
-                self.is_running = False
-                break
+                logger.error(f"Error processing record: {e}")
+        if session.codec_generation != self._codec_generation:
+            self._refresh_codec(session)
     
-    def _process_buffer(self):
-        """Process the current buffer and send to typer"""
-        if not self.buffer:
+    def _process_record(self, session, record, framed_time):
+        """
+        Decode a framed record and queue it for the typer.
+        
+        Args:
+            session: The PortSession that produced the record
+            record: Raw record bytes from the framer
+            framed_time: When the framer completed the record
+        """
+        if not record:
             return
         
+        first_byte_time = session.record_start_time or framed_time
+        session.record_start_time = None
+        streamed, held = session.stream_pos, session.stream_text
+        if streamed:
+            # The start of the record went to the typer already (stream_typing)
+            record = record[streamed:]
+            session.stream_pos = 0
+            session.stream_text = ''
+        
+        latency = framed_time - first_byte_time
+        session.records += 1
+        session.latency_total += latency
+        session.latency_max = max(session.latency_max, latency)
+        self.metrics.inc('records')
+        self.metrics.observe('frame', latency)
+        
         try:
-            encoding = self.config.get('encoding', 'shift_jis')
-            error_char = self.config.get('error_char', '�')
-            text = self.buffer.decode(encoding, errors='replace')
+            if session.detection is not None:
+                self._detect_encoding(session, record)
             
-            if '�' in text and error_char != '�':
-                text = text.replace('�', error_char)
+            replacements = session.decoder.replacements
+            text = held + session.decoder.decode(record)
+            decoded_time = time.time()
+            self.metrics.observe('decode', decoded_time - framed_time)
+            if session.decoder.replacements != replacements:
+                self.metrics.inc('decode_replacements', session.decoder.replacements - replacements)
+                if session.detection is None and self.config.get('encoding_detect', True):
+                    if self._note_replacements(session):
+                        # Score the record that triggered detection and decode it again
+                        encoding = session.decoder.encoding
+                        self._detect_encoding(session, record)
+                        if session.decoder.encoding != encoding:
+                            text = held + session.decoder.decode(record)
             
-            if text:
-                logger.debug(f"Decoded text: {text}")
-                self.typer.type_text(text)
+            if not text:
+                return
+            
+            if not streamed and (session.scan_text or self._groups_scans(session)):
+                # A line of a scan that is checked for duplicates once the idle gap ends it
+                if not session.scan_text:
+                    session.scan_start = first_byte_time
+                session.scan_text += text
+                return
+            
+            self._dispatch_text(session, text, first_byte_time, framed_time, decoded_time, streamed)
         except Exception as e:
-            logger.error(f"Error processing buffer: {e}")
+            logger.error(f"Error processing record: {e}")
+    
+    def _dispatch_text(self, session, text, first_byte_time, framed_time, decoded_time, streamed=False):
+        """
+        Suppress duplicates, apply transforms, spool and queue a decoded scan.
+        
+        Args:
+            session: The PortSession that produced the text
+            text: Decoded text of a whole scan (or the rest of a streamed record)
+            first_byte_time: When the scan's first byte was read
+            framed_time: When the scan was complete
+            decoded_time: When it was decoded
+            streamed: True if the start of the record was typed already
+        """
+        # Part of a streamed record is typed already, so the rest is never suppressed
+        if not streamed and self.dedup.enabled and self.dedup.is_duplicate(session.device, text, first_byte_time):
+            self.metrics.inc('records_deduplicated')
+            logger.opt(lazy=True).debug(
+                "Suppressed duplicate scan from {}: {}", lambda: session.device, lambda: payload_preview(text)
+            )
+            return
+        
+        logger.opt(lazy=True).debug(
+            "Decoded text from {}: {}", lambda: session.device, lambda: payload_preview(text)
+        )
+        
+        if self.transforms and not streamed:
+            start = time.perf_counter()
+            text = self.transforms.apply(text, self.metrics)
+            self.metrics.observe('transform', time.perf_counter() - start)
+            if not text:
+                self.metrics.inc('records_filtered')
+                logger.debug("Record from {} emptied by transforms", session.device)
+                return
+        
+        record = Record(session.device, text, first_byte_time, framed_time, decoded_time)
+        if self.spool is not None:
+            record = record._replace(seq=self.spool.append(session.device, text, first_byte_time))
+        self._enqueue_record(record)
+    
+    def _enqueue_record(self, record):
+        """
+        Put a decoded record on the typing queue, applying `queue_policy` when full.
+        
+        Policies:
+            block: wait for the typer (backpressure; bytes stay in the driver buffer)
+            drop_oldest: discard the oldest queued record to make room
+            drop_newest: discard the incoming record
         
-        self.buffer.clear()
+        Records dropped by policy are marked done in the spool; a record dropped
+        because the reader stops with a full queue stays unfinished and is
+        replayed on the next start.
+        
+        Args:
+            record: The decoded Record
+        """
+        policy = self.config.get('queue_policy', 'block')
+        
+        if policy == 'drop_oldest':
+            while True:
+                try:
+                    self.record_queue.put_nowait(record)
+                    break
+                except queue.Full:
+                    try:
+                        self._complete(self.record_queue.get_nowait())
+                        self.record_queue.task_done()
+                        self.records_dropped += 1
+                        self.metrics.inc('records_dropped')
+                        logger.warning("Record queue full, dropped oldest record")
+                    except queue.Empty:
+                        pass
+        elif policy == 'drop_newest':
+            try:
+                self.record_queue.put_nowait(record)
+            except queue.Full:
+                self._complete(record)
+                self.records_dropped += 1
+                self.metrics.inc('records_dropped')
+                logger.warning("Record queue full, dropped incoming record")
+                return
+        else:
+            while True:
+                try:
+                    self.record_queue.put(record, timeout=0.1)
+                    break
+                except queue.Full:
+                    if not self.is_running:
+                        self.records_dropped += 1
+                        self.metrics.inc('records_dropped')
+                        logger.warning("Reader stopping with full record queue, dropped record")
+                        return
+        
+        self.records_enqueued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.record_queue.qsize())
+    
+    def _complete(self, record):
+        """Mark a record done in the spool so it is never replayed"""
+        if record.seq is not None:
+            self.spool.complete(record.seq)
+    
+    def _type_loop(self):
+        """
+        Typing loop that drains the record queue in a separate thread.
+        
+        With the spool on, every record is written to the journal before it is
+        typed and marked done once the typer returns anything but False; the
+        DONE entry is written with the next record, or at once if the queue is
+        empty. Sinks (write_record) only queue the record, so they mark it done
+        from their writer thread once it has actually been written. A record
+        whose output raised, returned False or never delivered it stays
+        unfinished and is replayed on the next start.
+        """
+        while True:
+            record = self.record_queue.get()
+            
+            if record.seq is not None:
+                # One write covers this record, those queued behind it and the previous DONE entry
+                self._spool_write(self.spool.commit)
+            
+            result = False
+            try:
+                start = time.time()
+                self.metrics.observe('queue_wait', start - record.decoded_time)
+                if self._write_record is not None:
+                    done = partial(self._complete, record) if record.seq is not None else None
+                    result = self._write_record(record, done)
+                else:
+                    result = self.typer.type_text(record.text)
+                end = time.time()
+                self.metrics.observe('typing', end - start)
+                self.metrics.observe('end_to_end', end - record.first_byte_time)
+                if self.events:
+                    self.events.publish(
+                        'record', port=record.port, chars=len(record.text), latency=end - record.first_byte_time
+                    )
+                    self.throughput.record()
+            except Exception as e:
+                self.metrics.inc('typing_errors')
+                logger.error(f"Error typing record: {e}")
+                self.events.publish('error', message=f"Error typing record: {e}", device=record.port, fatal=False)
+            finally:
+                self.record_queue.task_done()
+            
+            if record.seq is None:
+                continue
+            if result is False:
+                logger.warning(f"Output did not accept record {record.seq}, keeping it in the spool")
+            elif self._write_record is None:
+                # When idle, write the DONE entry now so a crash cannot replay the record
+                self.spool.complete(record.seq)
+                if self.record_queue.empty():
+                    self._spool_write(self.spool.commit)
+    
+    def _spool_write(self, write, *args, **kwargs):
+        """Call a spool write; a failing disk is logged but never stops typing"""
+        try:
+            write(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Error writing spool: {e}")
@@ -0,0 +1,193 @@
+import struct
+from multiprocessing import shared_memory
+
+# head and tail live on separate cache lines; the drop counter belongs to the producer.
+# The capacity is stored too, since the OS may round the block up to a page.
+HEAD_OFFSET = 0
+DROPPED_OFFSET = 8
+CAPACITY_OFFSET = 16
+TAIL_OFFSET = 64
+HEADER_SIZE = 128
+INDEX = struct.Struct('<Q')
+
+# kind, port id, payload length, timestamp
+ENTRY = struct.Struct('<BxHId')
+
+KIND_DATA = 1
+KIND_ERROR = 2
+KIND_PAD = 3
+
+def _align(size):
+    return (size + 7) & ~7
+
+class SharedRing:
+    """
+    Single-producer, single-consumer ring of byte chunks in shared memory.
+    
+    The producer (the serial I/O process) appends entries of an ENTRY header
+    and its payload; the consumer gets each payload as a memoryview into the
+    shared buffer, valid until it asks for the next entry, so nothing is
+    copied between the processes. An entry never wraps: when it does not fit
+    before the end of the buffer, the rest is skipped (KIND_PAD) and the entry
+    starts at offset 0.
+    
+    No lock is needed because each index has exactly one writer: only the
+    producer advances `head` (after the entry is written) and only the
+    consumer advances `tail` (after it is done with the entry). Both are
+    monotonic 64-bit counters; the offset is the counter modulo the capacity.
+    The producer follows every append with a doorbell write() and the
+    consumer reads `head` after draining the doorbell, so the system calls
+    also order the payload stores before the index on weakly ordered CPUs.
+    
+    A full ring is never waited on: the producer counts the chunk as dropped
+    and goes back to reading its port.
+    """
+    
+    def __init__(self, shm, owner, capacity=None):
+        self.shm = shm
+        self.owner = owner
+        self.buf = shm.buf
+        if capacity is None:
+            capacity = self._load(CAPACITY_OFFSET)
+        else:
+            self._store(CAPACITY_OFFSET, capacity)
+        self.capacity = capacity
+        self.data = self.buf[HEADER_SIZE:HEADER_SIZE + self.capacity]
+        self.max_payload = self.capacity // 4 - ENTRY.size
+    
+    @classmethod
+    def create(cls, capacity):
+        """
+        Allocate a new ring.
+        
+        Args:
+            capacity: Payload bytes the ring can hold
+        
+        Returns:
+            SharedRing owning the shared memory block
+        """
+        capacity = _align(capacity)
+        shm = shared_memory.SharedMemory(create=True, size=HEADER_SIZE + capacity)
+        ring = cls(shm, owner=True, capacity=capacity)
+        ring.reset()
+        return ring
+    
+    @classmethod
+    def attach(cls, name):
+        """Open the ring created by another process"""
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+    
+    @property
+    def name(self):
+        return self.shm.name
+    
+    def _load(self, offset):
+        return INDEX.unpack_from(self.buf, offset)[0]
+    
+    def _store(self, offset, value):
+        INDEX.pack_into(self.buf, offset, value)
+    
+    @property
+    def head(self):
+        return self._load(HEAD_OFFSET)
+    
+    @property
+    def tail(self):
+        return self._load(TAIL_OFFSET)
+    
+    @property
+    def used(self):
+        """Bytes between tail and head, including padding"""
+        return self.head - self.tail
+    
+    @property
+    def dropped(self):
+        """Chunks the producer could not append because the ring was full"""
+        return self._load(DROPPED_OFFSET)
+    
+    def reset(self):
+        """Empty the ring; only while neither side is running"""
+        for offset in (HEAD_OFFSET, DROPPED_OFFSET, TAIL_OFFSET):
+            self._store(offset, 0)
+    
+    def append(self, kind, port_id, payload, timestamp):
+        """
+        Append one entry (producer only).
+        
+        Args:
+            kind: KIND_DATA or KIND_ERROR
+            port_id: Port the entry belongs to
+            payload: Bytes, at most `max_payload` long
+            timestamp: time.time() of the read
+        
+        Returns:
+            bool: False if the ring was full and the entry was dropped
+        """
+        size = _align(ENTRY.size + len(payload))
+        head = self._load(HEAD_OFFSET)
+        offset = head % self.capacity
+        skip = self.capacity - offset
+        if skip >= size:
+            skip = 0
+        
+        if head + skip + size - self._load(TAIL_OFFSET) > self.capacity:
+            self._store(DROPPED_OFFSET, self._load(DROPPED_OFFSET) + 1)
+            return False
+        
+        if skip:
+            if skip >= ENTRY.size:
+                ENTRY.pack_into(self.data, offset, KIND_PAD, 0, 0, 0.0)
+            head += skip
+            offset = 0
+        
+        ENTRY.pack_into(self.data, offset, kind, port_id, len(payload), timestamp)
+        start = offset + ENTRY.size
+        self.data[start:start + len(payload)] = payload
+        self._store(HEAD_OFFSET, head + size)
+        return True
+    
+    def entries(self):
+        """
+        Yield (kind, port_id, payload, timestamp) up to the current head (consumer only).
+        
+        `payload` is a memoryview into shared memory; it is released and the
+        entry handed back to the producer when the next entry is requested,
+        so it must be copied (or fully consumed) before then.
+        """
+        head = self._load(HEAD_OFFSET)
+        tail = self._load(TAIL_OFFSET)
+        while tail < head:
+            offset = tail % self.capacity
+            remaining = self.capacity - offset
+            if remaining < ENTRY.size:
+                tail += remaining
+                continue
+            
+            kind, port_id, length, timestamp = ENTRY.unpack_from(self.data, offset)
+            if kind == KIND_PAD:
+                tail += remaining
+                continue
+            
+            start = offset + ENTRY.size
+            payload = self.data[start:start + length]
+            try:
+                yield kind, port_id, payload, timestamp
+            finally:
+                payload.release()
+            tail += _align(ENTRY.size + length)
+            self._store(TAIL_OFFSET, tail)
+        self._store(TAIL_OFFSET, tail)
+    
+    def close(self):
+        """Detach from the shared memory, removing it if this side created it"""
+        if self.shm is None:
+            return
+        self.data.release()
+        self.buf = self.data = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+        self.shm = None
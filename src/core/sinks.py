@@ -0,0 +1,519 @@
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import threading
+from loguru import logger
+
+class Sink:
+    """
+    Base class for non-keyboard outputs of decoded records.
+    
+    A sink has the same role as MacTyper.type_text(): SerialReader hands it
+    every record. write_record() / type_text() only enqueue; a writer thread
+    collects records into a batch and writes it when it reaches `max_batch`
+    records or `max_bytes` bytes, or `flush_interval` seconds after its first
+    record. A batch that fails to write is kept and retried with the next one;
+    at most `max_pending` bytes are kept, older records beyond that are
+    dropped and counted.
+    
+    Queuing a record does not mean it was delivered: the `done` callback given
+    to write_record() is called by the writer thread once write_batch() has
+    written the record, and never for a record that was dropped.
+    
+    Subclasses implement format() and write_batch(), and optionally close_output().
+    """
+    
+    _STOP = object()
+    _FLUSH = object()
+    
+    def __init__(self, max_batch=256, max_bytes=64 * 1024, flush_interval=0.2, max_pending=4 * 1024 * 1024):
+        """
+        Initialize the sink and start its writer thread.
+        
+        Args:
+            max_batch: Records per batch that trigger a write
+            max_bytes: Bytes per batch that trigger a write
+            flush_interval: Seconds after the first queued record that trigger a write
+            max_pending: Bytes of failed batches kept for retrying
+        """
+        self.max_batch = max_batch
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.queue = queue.SimpleQueue()
+        # Records of failed batches as (bytes, done callback)
+        self.pending = []
+        self.pending_bytes = 0
+        self.records = 0
+        self.batches = 0
+        self.errors = 0
+        self.dropped_bytes = 0
+        self.flushed = threading.Condition()
+        self.flush_requests = 0
+        self.flushes_done = 0
+        self.thread = threading.Thread(target=self._write_loop, daemon=True)
+        self.thread.start()
+    
+    @property
+    def name(self):
+        return type(self).__name__
+    
+    def type_text(self, text):
+        """Queue a record that has no port or timestamp attached (delivery is not reported)"""
+        self.queue.put((self.format(text, None, time.time()), None))
+    
+    def write_record(self, record, done=None):
+        """
+        Queue a decoded record.
+        
+        Args:
+            record: serial_reader.Record
+            done: Called without arguments from the writer thread once the
+                  record has been written
+        
+        Returns:
+            True when queued; delivery is only reported through `done`
+        """
+        self.queue.put((self.format(record.text, record.port, record.first_byte_time), done))
+        return True
+    
+    def format(self, text, port, timestamp):
+        """
+        Encode one record for this output.
+        
+        Returns:
+            bytes
+        """
+        return text.encode('utf-8')
+    
+    def write_batch(self, data):
+        """Write one batch of formatted records; raise on failure"""
+        raise NotImplementedError
+    
+    def close_output(self):
+        """Release the underlying file, socket or connection"""
+    
+    def flush(self, timeout=5.0):
+        """
+        Write everything queued so far and wait for it.
+        
+        Returns:
+            bool: True if the writer caught up within the timeout
+        """
+        with self.flushed:
+            self.flush_requests += 1
+            target = self.flush_requests
+        self.queue.put(self._FLUSH)
+        with self.flushed:
+            return self.flushed.wait_for(lambda: self.flushes_done >= target or not self.thread.is_alive(), timeout)
+    
+    def close(self):
+        """Write everything still queued, then close the output"""
+        if self.thread.is_alive():
+            self.queue.put(self._STOP)
+            self.thread.join(timeout=5.0)
+    
+    def get_stats(self):
+        """
+        Get sink counters.
+        
+        Returns:
+            Dictionary of record, batch, error and drop counts
+        """
+        return {
+            'records': self.records,
+            'batches': self.batches,
+            'errors': self.errors,
+            'pending_bytes': self.pending_bytes,
+            'dropped_bytes': self.dropped_bytes,
+        }
+    
+    def _write_loop(self):
+        """Writer thread: gather records into batches and write them"""
+        stopping = False
+        while not stopping:
+            if self.pending:
+                # Retry a failed batch after flush_interval even if nothing new arrives
+                try:
+                    item = self.queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    self._write([])
+                    continue
+            else:
+                item = self.queue.get()
+            batch = []
+            size = 0
+            flush = False
+            deadline = time.monotonic() + self.flush_interval
+            
+            while True:
+                if item is self._STOP:
+                    stopping = True
+                    break
+                if item is self._FLUSH:
+                    flush = True
+                    break
+                batch.append(item)
+                size += len(item[0])
+                if len(batch) >= self.max_batch or size >= self.max_bytes:
+                    break
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            
+            if batch or self.pending:
+                self._write(batch)
+            if flush:
+                with self.flushed:
+                    self.flushes_done += 1
+                    self.flushed.notify_all()
+        
+        try:
+            self.close_output()
+        except Exception as e:
+            logger.error(f"Error closing {self.name}: {e}")
+        with self.flushed:
+            self.flushed.notify_all()
+    
+    def _write(self, batch):
+        """Write a batch after any earlier batch that failed, then report its records done"""
+        items = self.pending + batch
+        data = b''.join(item for item, _ in items)
+        try:
+            self.write_batch(data)
+        except Exception as e:
+            self.errors += 1
+            if self.pending:
+                logger.debug("{} retry failed: {}", self.name, e)
+            else:
+                logger.error(f"{self.name} write failed, keeping data for retry: {e}")
+            self.pending = items
+            self.pending_bytes = len(data)
+            # Drop whole records from the front; they are never reported done
+            while self.pending_bytes > self.max_pending:
+                item, _ = self.pending.pop(0)
+                self.pending_bytes -= len(item)
+                self.dropped_bytes += len(item)
+            return
+        
+        if self.pending:
+            logger.info(f"{self.name} recovered, wrote {len(data)} bytes held for retry")
+        self.pending = []
+        self.pending_bytes = 0
+        self.records += len(items)
+        self.batches += 1
+        for _, done in items:
+            if done is not None:
+                try:
+                    done()
+                except Exception as e:
+                    logger.error(f"Error completing record written by {self.name}: {e}")
+
+
+class FileSink(Sink):
+    """
+    Appends records to a file, one write and (optionally) one fsync per batch.
+    """
+    
+    def __init__(self, path, fsync=True, **kwargs):
+        """
+        Open the file for appending.
+        
+        Args:
+            path: Output file path
+            fsync: Whether to fsync after every batch
+            **kwargs: Batching options for Sink
+        """
+        self.path = os.path.expanduser(path)
+        self.fsync = fsync
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.syncs = 0
+        super().__init__(**kwargs)
+    
+    def write_batch(self, data):
+        view = memoryview(data)
+        while view:
+            written = os.write(self.fd, view)
+            view = view[written:]
+        if self.fsync:
+            os.fsync(self.fd)
+            self.syncs += 1
+    
+    def close_output(self):
+        os.close(self.fd)
+
+
+class StreamSink(Sink):
+    """
+    Writes records to stdout (or another binary stream), as plain text or JSON lines.
+    """
+    
+    def __init__(self, stream=None, jsonl=False, **kwargs):
+        """
+        Initialize the sink.
+        
+        Args:
+            stream: Binary stream to write to (default sys.stdout.buffer)
+            jsonl: Write one JSON object per record instead of the raw text
+            **kwargs: Batching options for Sink
+        """
+        self.stream = stream or sys.stdout.buffer
+        self.jsonl = jsonl
+        super().__init__(**kwargs)
+    
+    def format(self, text, port, timestamp):
+        if self.jsonl:
+            return _json_line(text, port, timestamp)
+        return text.encode('utf-8')
+    
+    def write_batch(self, data):
+        self.stream.write(data)
+        self.stream.flush()
+
+
+class UnixSocketSink(Sink):
+    """
+    Streams records as JSON lines to a Unix domain socket, reconnecting on failure.
+    """
+    
+    def __init__(self, path, **kwargs):
+        """
+        Initialize the sink; the socket is connected on the first write.
+        
+        Args:
+            path: Path of the listening Unix socket
+            **kwargs: Batching options for Sink
+        """
+        self.path = os.path.expanduser(path)
+        self.sock = None
+        super().__init__(**kwargs)
+    
+    def format(self, text, port, timestamp):
+        return _json_line(text, port, timestamp)
+    
+    def write_batch(self, data):
+        if self.sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self.sock = sock
+        try:
+            self.sock.sendall(data)
+        except OSError:
+            self.close_output()
+            raise
+    
+    def close_output(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+class HttpPostSink(Sink):
+    """
+    POSTs each batch as newline-delimited JSON to a local HTTP endpoint.
+    
+    One HTTP/1.1 connection is kept open and reused across batches; it is
+    reopened after an error or when the server closes it.
+    """
+    
+    def __init__(self, url, timeout=5.0, **kwargs):
+        """
+        Initialize the sink; the connection is opened on the first batch.
+        
+        Args:
+            url: Endpoint URL (http://host:port/path)
+            timeout: Socket timeout in seconds
+            **kwargs: Batching options for Sink
+        """
+        # Imported here so the default keyboard-only setup starts without http.client
+        from urllib.parse import urlsplit
+        
+        parts = urlsplit(url)
+        if parts.scheme != 'http':
+            raise ValueError(f"Unsupported URL scheme: {parts.scheme}")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = parts.path or '/'
+        if parts.query:
+            self.path += '?' + parts.query
+        self.timeout = timeout
+        self.connection = None
+        self.connections_opened = 0
+        super().__init__(**kwargs)
+    
+    def format(self, text, port, timestamp):
+        return _json_line(text, port, timestamp)
+    
+    def write_batch(self, data):
+        import http.client
+        
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                self.connections_opened += 1
+            try:
+                self.connection.request('POST', self.path, body=data, headers={'Content-Type': 'application/x-ndjson'})
+                response = self.connection.getresponse()
+                response.read()
+            except (http.client.HTTPException, OSError) as e:
+                # A kept-alive connection the server already closed fails once; retry on a new one
+                self.close_output()
+                if attempt:
+                    raise OSError(str(e))
+                continue
+            
+            if response.will_close:
+                self.close_output()
+            if response.status >= 300:
+                raise OSError(f"HTTP {response.status} {response.reason}")
+            return
+    
+    def close_output(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class MultiSink:
+    """
+    Hands every record to several outputs, e.g. the keyboard and a file.
+    
+    Outputs without write_record() (such as MacTyper) receive type_text().
+    An error in one output is logged and does not affect the others; the
+    record only counts as accepted if every output accepted it, and `done`
+    is only called once every output has delivered it.
+    """
+    
+    def __init__(self, outputs):
+        """
+        Initialize the fan-out.
+        
+        Args:
+            outputs: List of sinks or typers
+        """
+        self.outputs = list(outputs)
+    
+    def type_text(self, text):
+        ok = True
+        for output in self.outputs:
+            try:
+                ok = output.type_text(text) is not False and ok
+            except Exception as e:
+                ok = False
+                logger.error(f"Error writing to {type(output).__name__}: {e}")
+        return ok
+    
+    def write_record(self, record, done=None):
+        remaining = [len(self.outputs)]
+        lock = threading.Lock()
+        
+        def delivered():
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last and done is not None:
+                done()
+        
+        ok = True
+        for output in self.outputs:
+            try:
+                write = getattr(output, 'write_record', None)
+                if write is not None:
+                    ok = write(record, delivered) is not False and ok
+                elif output.type_text(record.text) is not False:
+                    delivered()
+                else:
+                    ok = False
+            except Exception as e:
+                ok = False
+                logger.error(f"Error writing to {type(output).__name__}: {e}")
+        return ok
+    
+    def flush(self, timeout=5.0):
+        return all(output.flush(timeout) for output in self.outputs if hasattr(output, 'flush'))
+    
+    def close(self):
+        for output in self.outputs:
+            if hasattr(output, 'close'):
+                output.close()
+    
+    def get_stats(self):
+        return {
+            type(output).__name__: output.get_stats()
+            for output in self.outputs if hasattr(output, 'get_stats')
+        }
+
+
+def _json_line(text, port, timestamp):
+    """One record as a JSON line without the record's trailing line break"""
+    return (json.dumps(
+        {'port': port, 'time': timestamp, 'text': text.rstrip('\r\n')},
+        ensure_ascii=False
+    ) + '\n').encode('utf-8')
+
+
+def create_sink(spec):
+    """
+    Create one sink from an `output.sinks` config entry.
+    
+    Supported types: file (path, fsync), stdout (jsonl), unix_socket (path)
+    and http (url, timeout). `max_batch`, `max_bytes`, `flush_interval` and
+    `max_pending` set the batching thresholds of any sink.
+    
+    Args:
+        spec: Sink configuration dictionary
+    
+    Returns:
+        A Sink instance
+    """
+    options = {key: spec[key] for key in ('max_batch', 'max_bytes', 'flush_interval', 'max_pending') if key in spec}
+    kind = spec.get('type')
+    
+    if kind == 'file':
+        return FileSink(spec['path'], spec.get('fsync', True), **options)
+    if kind == 'stdout':
+        return StreamSink(jsonl=spec.get('jsonl', False), **options)
+    if kind == 'unix_socket':
+        return UnixSocketSink(spec['path'], **options)
+    if kind == 'http':
+        return HttpPostSink(spec['url'], spec.get('timeout', 5.0), **options)
+    
+    raise ValueError(f"Unknown sink type: {kind}")
+
+
+def create_output(specs, typer):
+    """
+    Build the object SerialReader hands records to.
+    
+    Args:
+        specs: The `output.sinks` list; a {"type": "keyboard"} entry stands for the typer
+        typer: The keyboard typer
+    
+    Returns:
+        The typer itself, a single sink, or a MultiSink
+    """
+    outputs = []
+    for spec in specs or [{'type': 'keyboard'}]:
+        if spec.get('type') == 'keyboard':
+            outputs.append(typer)
+        else:
+            outputs.append(create_sink(spec))
+    
+    if len(outputs) == 1:
+        return outputs[0]
+    return MultiSink(outputs)
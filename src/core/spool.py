@@ -0,0 +1,288 @@
+import os
+import zlib
+import struct
+import threading
+from collections import OrderedDict, namedtuple
+from loguru import logger
+
+MAGIC = b'QR2KSPL1'
+
+# crc32 of everything after it, payload length, kind, sequence number
+ENTRY_HEADER = struct.Struct('<IIBQ')
+# record payload: first-byte timestamp, port name length; then port and text (UTF-8)
+RECORD_HEADER = struct.Struct('<dH')
+
+KIND_RECORD = 1
+KIND_DONE = 2
+
+SpooledRecord = namedtuple('SpooledRecord', ['seq', 'port', 'text', 'timestamp'])
+
+def _entry(kind, seq, payload=b''):
+    """Encode one journal entry"""
+    body = ENTRY_HEADER.pack(0, len(payload), kind, seq)[4:] + payload
+    return struct.pack('<I', zlib.crc32(body)) + body
+
+class Spool:
+    """
+    Crash-safe journal of records that have not been typed yet.
+    
+    Every record is appended before it is queued for the typer, and a DONE
+    entry is appended once the typer or sink has accepted it. After a crash
+    the records without a DONE entry are returned by unfinished().
+    
+    File layout: an 8-byte magic followed by entries, each an ENTRY_HEADER
+    (with a CRC32 over the rest of the entry) and its payload. Recovery stops
+    at the first entry that is truncated or fails its checksum, and the torn
+    tail is cut off.
+    
+    Appends and completions only go to an in-memory buffer. commit() writes everything buffered
+    with a single write(), so many records share one system call (group
+    commit); the typer thread commits before dispatching a record, which makes
+    the record survive a crash of the app. Every append and completion also
+    wakes a background thread that commits whatever is still buffered
+    `sync_interval` seconds later, so records queued behind a slow typer are
+    on disk within `sync_interval` too.
+    fsync is controlled by `sync`: 'always' syncs on every commit, 'interval'
+    once per background commit, 'never' leaves it to the OS. Once the file
+    grows past `max_bytes` (and is mostly finished records) it is rewritten
+    with only the unfinished ones.
+    """
+    
+    def __init__(self, path, sync='interval', sync_interval=0.05, max_bytes=1024 * 1024):
+        """
+        Open (or create) the journal and recover unfinished records.
+        
+        Args:
+            path: Journal file path
+            sync: 'always', 'interval' or 'never'
+            sync_interval: Seconds between background commits
+            max_bytes: File size that triggers compaction
+        """
+        self.path = os.path.expanduser(path)
+        self.sync = sync
+        self.sync_interval = sync_interval
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.commit_lock = threading.Lock()
+        self.buffer = bytearray()
+        self.outstanding = OrderedDict()
+        self.outstanding_bytes = 0
+        self.recovered_seq = 0
+        self.next_seq = 1
+        self.buffered_seq = 0
+        self.written_seq = 0
+        self.unsynced = False
+        self.appends = 0
+        self.commits = 0
+        self.syncs = 0
+        self.compactions = 0
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._recover()
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        self.size = os.fstat(self.fd).st_size
+        if self.size == 0:
+            os.write(self.fd, MAGIC)
+            self.size = len(MAGIC)
+        
+        self.thread = threading.Thread(target=self._sync_loop, daemon=True)
+        self.thread.start()
+        
+        if self.outstanding:
+            logger.warning(f"Spool has {len(self.outstanding)} unfinished records from the last run")
+    
+    def _recover(self):
+        """Read the journal, keep records without a DONE entry and cut off a torn tail"""
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        
+        if not data.startswith(MAGIC):
+            if data:
+                logger.error(f"{self.path} is not a spool file, starting a new one")
+                os.replace(self.path, self.path + '.invalid')
+            return
+        
+        records = OrderedDict()
+        pos = len(MAGIC)
+        while pos + ENTRY_HEADER.size <= len(data):
+            crc, length, kind, seq = ENTRY_HEADER.unpack_from(data, pos)
+            end = pos + ENTRY_HEADER.size + length
+            if end > len(data) or zlib.crc32(data[pos + 4:end]) != crc:
+                break
+            if kind == KIND_RECORD:
+                records[seq] = data[pos:end]
+            elif kind == KIND_DONE:
+                records.pop(seq, None)
+            self.next_seq = max(self.next_seq, seq + 1)
+            pos = end
+        
+        if pos < len(data):
+            logger.warning(f"Discarding {len(data) - pos} bytes of torn spool tail")
+            with open(self.path, 'r+b') as f:
+                f.truncate(pos)
+        
+        self.outstanding = records
+        self.outstanding_bytes = sum(len(entry) for entry in records.values())
+        self.recovered_seq = self.written_seq = self.buffered_seq = self.next_seq - 1
+    
+    def unfinished(self):
+        """
+        Records from an earlier run that were never completed (records appended
+        in this run are not included).
+        
+        Returns:
+            List of SpooledRecord in arrival order
+        """
+        with self.lock:
+            entries = list(self.outstanding.items())
+        
+        result = []
+        for seq, entry in entries:
+            if seq > self.recovered_seq:
+                break
+            payload = entry[ENTRY_HEADER.size:]
+            timestamp, port_length = RECORD_HEADER.unpack_from(payload)
+            start = RECORD_HEADER.size
+            port = payload[start:start + port_length].decode('utf-8') or None
+            text = payload[start + port_length:].decode('utf-8')
+            result.append(SpooledRecord(seq, port, text, timestamp))
+        return result
+    
+    def append(self, port, text, timestamp):
+        """
+        Buffer one record; it reaches the file with the next commit(), at the
+        latest `sync_interval` seconds from now.
+        
+        Returns:
+            The record's sequence number
+        """
+        port_bytes = (port or '').encode('utf-8')
+        payload = RECORD_HEADER.pack(timestamp, len(port_bytes)) + port_bytes + text.encode('utf-8')
+        with self.lock:
+            seq = self.next_seq
+            self.next_seq += 1
+            entry = _entry(KIND_RECORD, seq, payload)
+            self.outstanding[seq] = entry
+            self.outstanding_bytes += len(entry)
+            self.buffer += entry
+            self.buffered_seq = seq
+            self.appends += 1
+        self.wakeup.set()
+        return seq
+    
+    def complete(self, seq):
+        """Mark a record as handed over; it will not be replayed"""
+        with self.lock:
+            entry = self.outstanding.pop(seq, None)
+            if entry is None:
+                return
+            self.outstanding_bytes -= len(entry)
+            self.buffer += _entry(KIND_DONE, seq)
+        self.wakeup.set()
+    
+    def commit(self):
+        """
+        Write everything buffered with one system call.
+        
+        With sync='always' the file is fsynced if the write carried new records
+        (a lost DONE entry only means a record is offered for replay).
+        """
+        with self.commit_lock:
+            with self.lock:
+                if not self.buffer:
+                    return
+                data = bytes(self.buffer)
+                self.buffer.clear()
+                seq = self.buffered_seq
+            
+            view = memoryview(data)
+            while view:
+                written = os.write(self.fd, view)
+                view = view[written:]
+            self.size += len(data)
+            new_records = seq > self.written_seq
+            self.written_seq = seq
+            self.commits += 1
+            self.unsynced = True
+            
+            if self.sync == 'always' and new_records:
+                self._fsync()
+            elif self.sync == 'interval':
+                self.wakeup.set()
+            
+            if self.size > self.max_bytes and self.size > 2 * self.outstanding_bytes:
+                self._compact()
+    
+    def _fsync(self):
+        os.fsync(self.fd)
+        self.unsynced = False
+        self.syncs += 1
+    
+    def _compact(self):
+        """Rewrite the journal with only the unfinished records (commit_lock held)"""
+        with self.lock:
+            tmp = self.path + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(MAGIC)
+                for seq, entry in self.outstanding.items():
+                    if seq <= self.written_seq:
+                        f.write(entry)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            os.close(self.fd)
+            self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+            self.size = os.fstat(self.fd).st_size
+            # Records buffered but not yet written stay in the buffer
+            self.unsynced = False
+            self.compactions += 1
+    
+    def _sync_loop(self):
+        """Background group commit: everything buffered within sync_interval shares one write and fsync"""
+        while not self.stopped.is_set():
+            self.wakeup.wait()
+            if self.stopped.wait(self.sync_interval):
+                break
+            self.wakeup.clear()
+            try:
+                self.commit()
+                with self.commit_lock:
+                    if self.unsynced and self.sync == 'interval':
+                        self._fsync()
+            except Exception as e:
+                logger.error(f"Spool sync failed: {e}")
+    
+    def close(self):
+        """Write and sync everything, then close the journal"""
+        self.stopped.set()
+        self.wakeup.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+        try:
+            self.commit()
+            with self.commit_lock:
+                self._fsync()
+                os.close(self.fd)
+        except Exception as e:
+            logger.error(f"Error closing spool: {e}")
+    
+    def get_stats(self):
+        """
+        Get journal counters.
+        
+        Returns:
+            Dictionary with appends, commits, fsyncs, compactions and open records
+        """
+        return {
+            'appends': self.appends,
+            'commits': self.commits,
+            'syncs': self.syncs,
+            'compactions': self.compactions,
+            'unfinished': len(self.outstanding),
+            'bytes': self.size,
+        }
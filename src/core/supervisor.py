@@ -0,0 +1,165 @@
+import os
+import time
+import threading
+from loguru import logger
+
+from core.port_watcher import list_serial_ports
+
+class LostPort:
+    """Bookkeeping for one port that is waiting to be reconnected"""
+    
+    def __init__(self, session, delay):
+        self.session = session
+        self.lost_at = time.time()
+        self.attempts = 0
+        self.delay = delay
+        self.next_attempt = self.lost_at
+
+
+class ReconnectSupervisor:
+    """
+    Reopens ports whose reads failed (USB glitch, scanner unplugged).
+    
+    A lost port keeps its PortSession, so the framer's partial record and the
+    decoder's pending bytes survive the reconnect. Attempts back off
+    exponentially from `reconnect_initial_delay` up to `reconnect_max_delay`
+    seconds. The device is matched by USB VID/PID/serial number, so a scanner
+    that comes back under a different /dev path is still found; ports without
+    USB identity are retried at their old path. A port watcher 'added' event
+    triggers an immediate attempt.
+    """
+    
+    def __init__(self, reader, config, port_watcher=None):
+        """
+        Initialize the supervisor.
+        
+        Args:
+            reader: SerialReader owning the sessions
+            config: Serial configuration dictionary
+            port_watcher: Optional PortWatcher for identity lookups and hot-plug events
+        """
+        self.reader = reader
+        self.config = config
+        self.port_watcher = port_watcher
+        self.lost = {}
+        self.condition = threading.Condition()
+        self.thread = None
+        
+        if port_watcher is not None:
+            port_watcher.subscribe(self._on_port_event)
+    
+    @property
+    def pending(self):
+        """True while any port is waiting to be reconnected"""
+        return bool(self.lost)
+    
+    def track(self, session):
+        """
+        Start reconnecting a session whose port has failed.
+        
+        Args:
+            session: The detached PortSession
+        """
+        with self.condition:
+            self.lost[session.device] = LostPort(session, self.config.get('reconnect_initial_delay', 0.5))
+            if not (self.thread and self.thread.is_alive()):
+                self.thread = threading.Thread(target=self._reconnect_loop, daemon=True)
+                self.thread.start()
+            self.condition.notify()
+        logger.warning(f"Lost serial port {session.device}, reconnecting")
+    
+    def cancel(self, device):
+        """Stop reconnecting one port"""
+        with self.condition:
+            self.lost.pop(device, None)
+    
+    def cancel_all(self):
+        """Stop reconnecting every port"""
+        with self.condition:
+            self.lost.clear()
+    
+    def _on_port_event(self, event, info):
+        """Port watcher callback: retry immediately when a device appears"""
+        if event != 'added':
+            return
+        with self.condition:
+            for entry in self.lost.values():
+                entry.next_attempt = time.time()
+            self.condition.notify()
+    
+    def _reconnect_loop(self):
+        """Supervisor thread: sleep until the next attempt is due, then retry"""
+        while True:
+            with self.condition:
+                now = time.time()
+                due = [entry for entry in self.lost.values() if entry.next_attempt <= now]
+                if not due:
+                    wait = None
+                    if self.lost:
+                        wait = min(entry.next_attempt for entry in self.lost.values()) - now
+                    self.condition.wait(wait)
+                    continue
+            
+            for entry in due:
+                self._attempt(entry)
+    
+    def _attempt(self, entry):
+        """Try each candidate device for one lost session"""
+        session = entry.session
+        entry.attempts += 1
+        
+        for device in self._candidates(session):
+            # Held across the reopen so a cancel() or cancel_all() that returns
+            # before it can never be followed by a reattached port
+            with self.condition:
+                if self.lost.get(session.device) is not entry:
+                    return
+                if not self.reader.reattach_session(session, device):
+                    continue
+                elapsed = time.time() - entry.lost_at
+                self.lost = {d: e for d, e in self.lost.items() if e is not entry}
+            
+            self.reader.metrics.inc('reconnects')
+            self.reader.metrics.observe('reconnect', elapsed)
+            logger.info(
+                f"Reconnected {session.description or session.device} at {device} "
+                f"after {elapsed:.2f}s ({entry.attempts} attempts)"
+            )
+            return
+        
+        with self.condition:
+            entry.next_attempt = time.time() + entry.delay
+            entry.delay = min(entry.delay * 2, self.config.get('reconnect_max_delay', 10.0))
+    
+    def _candidates(self, session):
+        """
+        Device paths the lost scanner may now be reachable at.
+        
+        Returns:
+            List of device paths, best match first
+        """
+        vid, pid, serial_number = session.identity
+        if vid is None:
+            return [session.device] if os.path.exists(session.device) else []
+        
+        if self.port_watcher is not None:
+            ports = self.port_watcher.get_ports()
+        else:
+            try:
+                ports = list_serial_ports()
+            except Exception as e:
+                logger.error(f"Error getting available ports: {e}")
+                return []
+        
+        in_use = set(self.reader.sessions)
+        matches = [
+            p['device'] for p in ports
+            if p['vid'] == vid and p['pid'] == pid
+            and (serial_number is None or p['serial_number'] == serial_number)
+            and p['device'] not in in_use
+        ]
+        matches.sort(key=lambda device: device != session.device)
+        if serial_number is None and len(matches) > 1 and session.device not in matches:
+            # Several identical scanners without serial numbers; don't guess
+            return []
+        return matches
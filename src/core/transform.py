@@ -0,0 +1,195 @@
+import re
+import time
+import unicodedata
+from functools import lru_cache
+from loguru import logger
+
+HALFWIDTH_KANA = ''.join(chr(code) for code in range(0xFF61, 0xFFA0))
+SOUND_MARKS = 'ﾞﾟ'
+
+@lru_cache(maxsize=None)
+def _kana_tables():
+    """
+    Build the half-width <-> full-width katakana tables once.
+    
+    Returns:
+        (full-width translate table, voiced-pair map, half-width translate table)
+    """
+    to_full = {}
+    pairs = {}
+    for char in HALFWIDTH_KANA:
+        to_full[ord(char)] = unicodedata.normalize('NFKC', char)
+        for mark in SOUND_MARKS:
+            combined = unicodedata.normalize('NFKC', char + mark)
+            if len(combined) == 1:
+                pairs[char + mark] = combined
+    
+    to_half = {full: chr(code) for code, full in to_full.items()}
+    to_half.update({full: pair for pair, full in pairs.items()})
+    return str.maketrans(to_full), pairs, str.maketrans(to_half)
+
+_VOICED_PAIR = re.compile(f"[{HALFWIDTH_KANA}][{SOUND_MARKS}]")
+
+def _normalize(spec):
+    form = spec.get('form', 'NFKC')
+    if form not in ('NFC', 'NFD', 'NFKC', 'NFKD'):
+        raise ValueError(f"Unknown normalization form: {form}")
+    return lambda text: unicodedata.normalize(form, text)
+
+def _kana(spec):
+    to_full, pairs, to_half = _kana_tables()
+    direction = spec.get('to', 'full')
+    if direction == 'full':
+        lookup = pairs.__getitem__
+        return lambda text: _VOICED_PAIR.sub(lambda m: lookup(m.group()), text).translate(to_full)
+    if direction == 'half':
+        return lambda text: text.translate(to_half)
+    raise ValueError(f"Unknown kana direction: {direction}")
+
+def _translate(spec):
+    table = str.maketrans(spec['map'])
+    return lambda text: text.translate(table)
+
+def _strip_prefix(spec):
+    prefixes = spec.get('prefixes') or [spec['prefix']]
+    pattern = re.compile('|'.join(re.escape(prefix) for prefix in sorted(prefixes, key=len, reverse=True)))
+    
+    def strip(text):
+        match = pattern.match(text)
+        return text[match.end():] if match else text
+    return strip
+
+def _strip_suffix(spec):
+    suffix = spec['suffix']
+    return lambda text: text[:-len(suffix)] if suffix and text.endswith(suffix) else text
+
+def _replace(spec):
+    flags = re.IGNORECASE if spec.get('ignore_case') else 0
+    pattern = re.compile(spec['pattern'], flags)
+    repl = spec.get('repl', '')
+    count = spec.get('count', 0)
+    return lambda text: pattern.sub(repl, text, count)
+
+def _extract(spec):
+    delimiter = spec.get('delimiter', ',')
+    fields = spec.get('fields', [0])
+    join = spec.get('join', delimiter)
+    
+    def extract(text):
+        parts = text.split(delimiter)
+        return join.join(parts[i] if -len(parts) <= i < len(parts) else '' for i in fields)
+    return extract
+
+def _match(spec):
+    """Replace the text with a template filled from a regex match; non-matching text is kept"""
+    pattern = re.compile(spec['pattern'])
+    template = spec.get('template', r'\g<0>')
+    
+    def match(text):
+        found = pattern.search(text)
+        return found.expand(template) if found else text
+    return match
+
+STAGES = {
+    'normalize': _normalize,
+    'kana': _kana,
+    'translate': _translate,
+    'strip_prefix': _strip_prefix,
+    'strip_suffix': _strip_suffix,
+    'replace': _replace,
+    'extract': _extract,
+    'match': _match,
+}
+
+class TransformPipeline:
+    """
+    A compiled chain of text transforms applied to each decoded record.
+    
+    The trailing line break of a record is split off before the stages run and
+    put back afterwards, so stages see only the payload and the typer still
+    presses Enter. A record a stage empties is dropped. If a stage raises, the
+    error is logged and the record is typed untransformed rather than lost.
+    """
+    
+    def __init__(self, stages):
+        """
+        Initialize the pipeline.
+        
+        Args:
+            stages: List of (name, callable) pairs, applied in order
+        """
+        self.stages = stages
+        self.metric_names = [f"transform_{i}_{name}" for i, (name, _) in enumerate(stages)]
+        self.errors = 0
+    
+    def __bool__(self):
+        return bool(self.stages)
+    
+    def __len__(self):
+        return len(self.stages)
+    
+    def apply(self, text, metrics=None):
+        """
+        Run a record through every stage.
+        
+        Args:
+            text: Decoded record text
+            metrics: Optional Metrics instance for per-stage timings
+        
+        Returns:
+            The transformed text, or '' if the record should be dropped
+        """
+        body = text.rstrip('\r\n')
+        ending = text[len(body):]
+        
+        try:
+            if metrics is not None and metrics.enabled:
+                for (_, stage), metric in zip(self.stages, self.metric_names):
+                    start = time.perf_counter()
+                    body = stage(body)
+                    metrics.observe(metric, time.perf_counter() - start)
+            else:
+                for _, stage in self.stages:
+                    body = stage(body)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error transforming record, typing it unchanged: {e}")
+            return text
+        
+        return body + ending if body else ''
+
+
+def compile_pipeline(specs):
+    """
+    Compile the `transforms` list of the serial config.
+    
+    Each entry is a dict with a `type` and its options:
+        normalize     form: NFC/NFD/NFKC/NFKD (default NFKC)
+        kana          to: full (half-width katakana -> full-width, default) or half
+        translate     map: {"from": "to", ...} character mapping
+        strip_prefix  prefix, or prefixes: [...] (longest match is removed)
+        strip_suffix  suffix
+        replace       pattern, repl, count, ignore_case
+        extract       delimiter (default ","), fields: [indexes], join (default delimiter)
+        match         pattern, template (default the whole match)
+    
+    Args:
+        specs: List of stage dictionaries (may be empty or None)
+    
+    Returns:
+        A TransformPipeline
+    
+    Raises:
+        ValueError: If a stage is unknown or its options are invalid
+    """
+    stages = []
+    for i, spec in enumerate(specs or []):
+        kind = spec.get('type') if isinstance(spec, dict) else None
+        factory = STAGES.get(kind)
+        if factory is None:
+            raise ValueError(f"Unknown transform at position {i}: {kind}")
+        try:
+            stages.append((kind, factory(spec)))
+        except (KeyError, TypeError, ValueError, re.error) as e:
+            raise ValueError(f"Invalid {kind} transform at position {i}: {e}")
+    return TransformPipeline(stages)
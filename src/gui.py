@@ -1,14 +1,19 @@
 
 import os
-import time
-import threading
+import subprocess
 import PySimpleGUI as sg
 from loguru import logger
 
+from core.config import validate_config
+from core.ipc import InstanceLock, launch_command, tray_lock_path
+
 class QR2KeyApp:
     """
     Main GUI application for QR2Key.
     Provides interface for port selection, connection control, and status display.
+    
+    The event loop blocks in window.read() until something happens: port
+    watcher and SerialReader events are posted to it with write_event_value().
     """
     
     def __init__(self, serial_reader, log_path):
@@ -16,14 +21,17 @@ class QR2KeyApp:
         Initialize the GUI application.
         
         Args:
-            serial_reader: SerialReader instance
+            serial_reader: RemoteReader attached to the ingest daemon
             log_path: Path to log file
         """
         self.serial_reader = serial_reader
         self.log_path = log_path
         self.window = None
         self.is_running = False
-        self.update_thread = None
+        self.port_watcher = serial_reader.port_watcher
+        self.last_record = None
+        self.record_posted = False
+        self.records_per_second = 0.0
         
         sg.theme('SystemDefault')
     
@@ -45,6 +53,7 @@ class QR2KeyApp:
             [sg.Button('接続', key='-CONNECT-', size=(10, 1)), 
              sg.Button('切断', key='-DISCONNECT-', size=(10, 1), disabled=True)],
             [sg.Text('状態: 未接続', key='-STATUS-', size=(40, 1))],
+            [sg.Text('スキャン: -', key='-SCAN_STATS-', size=(40, 1))],
             [sg.HorizontalSeparator()],
             [sg.Button('ログを開く', key='-OPEN_LOG-', size=(15, 1)),
              sg.Button('メニューバーに最小化', key='-MINIMIZE-', size=(20, 1)),
@@ -57,13 +66,18 @@ class QR2KeyApp:
         """Start the GUI application"""
         layout = self.create_layout()
         self.window = sg.Window('QR2Key', layout, finalize=True, icon=None)
+        # The daemon may already be connected (or reconnecting) when the GUI attaches
+        self._update_connection_status()
         
         self.is_running = True
-        self.update_thread = threading.Thread(target=self._update_loop, daemon=True)
-        self.update_thread.start()
+        if self.port_watcher:
+            self.port_watcher.subscribe(self._on_ports_changed)
+        self.serial_reader.events.subscribe(self._on_reader_event)
+        self._ask_spool_replay()
+        minimized = False
         
         while True:
-            event, values = self.window.read(timeout=100)
+            event, values = self.window.read()
             
             if event == sg.WIN_CLOSED or event == '-EXIT-':
                 break
@@ -74,70 +88,144 @@ class QR2KeyApp:
                     port = port_str.split(' - ')[0]
                     
                     try:
-                        baudrate = int(values['-BAUDRATE-'])
-                        self.serial_reader.config['baudrate'] = baudrate
+                        config = dict(self.serial_reader.config, baudrate=int(values['-BAUDRATE-']))
+                        validate_config({'serial': config})
+                        self.serial_reader.apply_config(config)
                     except ValueError:
                         sg.popup_error('ボーレートは数値で入力してください')
                         continue
                     
                     if self.serial_reader.connect(port):
-                        self.window['-STATUS-'].update('状態: 接続済み')
-                        self.window['-CONNECT-'].update(disabled=True)
-                        self.window['-DISCONNECT-'].update(disabled=False)
+                        self._update_connection_status()
                     else:
                         sg.popup_error(f'ポート {port} への接続に失敗しました')
             
             elif event == '-DISCONNECT-':
                 self.serial_reader.disconnect()
-                self.window['-STATUS-'].update('状態: 未接続')
-                self.window['-CONNECT-'].update(disabled=False)
-                self.window['-DISCONNECT-'].update(disabled=True)
+                self._update_connection_status()
+                self._refresh_port_list()
+            
+            elif event == '-READER_EVENT-':
+                self._apply_reader_event(*values[event])
+            
+            elif event == '-PORTS_CHANGED-':
+                if not self.serial_reader.is_connected:
+                    self._refresh_port_list()
             
             elif event == '-OPEN_LOG-':
                 self._open_log_file()
             
             elif event == '-MINIMIZE-':
-                self.window.hide()
-                import tray
-                tray_app = tray.QR2KeyTray(self.serial_reader, self.log_path)
-                tray_app.run()
+                minimized = self._open_tray()
                 break
         
         self.is_running = False
-        if self.update_thread and self.update_thread.is_alive():
-            self.update_thread.join(timeout=1.0)
+        if self.port_watcher:
+            self.port_watcher.unsubscribe(self._on_ports_changed)
+        self.serial_reader.events.unsubscribe(self._on_reader_event)
         
-        if self.serial_reader.is_connected:
-            self.serial_reader.disconnect()
+        # The daemon keeps reading while the menu bar app is running
+        if minimized or InstanceLock.is_held(tray_lock_path(self.serial_reader.client.path)):
+            self.serial_reader.close()
+        else:
+            self.serial_reader.shutdown()
         
         if self.window:
             self.window.close()
     
-    def _update_loop(self):
-        """Update loop for refreshing port list"""
-        last_update = 0
+    def _open_tray(self):
+        """
+        Start the menu bar app in its own process (rumps cannot share Tk's main loop).
         
-        while self.is_running and self.window:
-            current_time = time.time()
-            
-            if current_time - last_update > 5:
-                if not self.serial_reader.is_connected:
-                    ports = self.serial_reader.get_available_ports()
-                    port_list = [f"{p['device']} - {p['description']}" for p in ports]
-                    
-                    if not port_list:
-                        port_list = ['No ports available']
-                    
-                    self.window['-PORT-'].update(values=port_list)
-                
-                last_update = current_time
-            
-            time.sleep(0.1)
+        Returns:
+            bool: True if the menu bar app is (or will be) running
+        """
+        if InstanceLock.is_held(tray_lock_path(self.serial_reader.client.path)):
+            return True
+        try:
+            subprocess.Popen(launch_command('--tray'), start_new_session=True)
+            logger.info("Moved to the menu bar")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to start the menu bar app: {e}")
+            sg.popup_error(f'メニューバーアプリを起動できませんでした: {e}')
+            return False
+    
+    def _ask_spool_replay(self):
+        """Ask whether to type the records the last run left unfinished"""
+        if self.serial_reader.config.get('spool_replay', 'ask') != 'ask':
+            return
+        records = self.serial_reader.unfinished_records()
+        if not records:
+            return
+        
+        answer = sg.popup_yes_no(
+            f'前回の終了時に入力されなかったスキャンが {len(records)} 件あります。\n'
+            '今すぐ入力しますか？（「No」で破棄します）',
+            title='QR2Key'
+        )
+        self.serial_reader.recover_spool('replay' if answer == 'Yes' else 'discard')
+    
+    def _on_ports_changed(self, event, info):
+        """Port watcher callback; hands the change to the GUI thread"""
+        if self.is_running and self.window:
+            self.window.write_event_value('-PORTS_CHANGED-', (event, info['device']))
+    
+    def _on_reader_event(self, event, info):
+        """Event bus callback (reader threads); hands the event to the GUI thread"""
+        if not (self.is_running and self.window):
+            return
+        if event == 'record':
+            # Coalesce bursts: only the latest scan is shown, so post it once per GUI pass
+            self.last_record = info
+            if self.record_posted:
+                return
+            self.record_posted = True
+        self.window.write_event_value('-READER_EVENT-', (event, info))
+    
+    def _apply_reader_event(self, event, info):
+        """Update the window for one reader event (GUI thread)"""
+        if event in ('record', 'throughput'):
+            if event == 'record':
+                self.record_posted = False
+            else:
+                self.records_per_second = info['records_per_second']
+            record = self.last_record
+            if record is not None:
+                self.window['-SCAN_STATS-'].update(
+                    f"スキャン: {self.records_per_second:.1f} 件/秒・最終 {record['latency'] * 1000:.1f} ms（{record['port']}）"
+                )
+        elif event == 'error' and info.get('fatal'):
+            sg.popup_error(info['message'], non_blocking=True)
+        else:
+            self._update_connection_status()
+    
+    def _update_connection_status(self):
+        """Show the reader's connection state and enable the matching button"""
+        if self.serial_reader.is_connected:
+            status = '状態: 接続済み'
+        elif self.serial_reader.is_reconnecting:
+            status = '状態: 再接続中'
+        else:
+            status = '状態: 未接続'
+        active = self.serial_reader.is_connected or self.serial_reader.is_reconnecting
+        self.window['-STATUS-'].update(status)
+        self.window['-CONNECT-'].update(disabled=active)
+        self.window['-DISCONNECT-'].update(disabled=not active)
+    
+    def _refresh_port_list(self):
+        """Refresh the port combo box from the port cache"""
+        ports = self.serial_reader.get_available_ports()
+        port_list = [f"{p['device']} - {p['description']}" for p in ports]
+        
+        if not port_list:
+            port_list = ['No ports available']
+        
+        self.window['-PORT-'].update(values=port_list)
     
     def _open_log_file(self):
         """Open the log file with the default application"""
         try:
-            import subprocess
             subprocess.run(['open', self.log_path], check=True)
             logger.info(f"Opened log file: {self.log_path}")
         except Exception as e:
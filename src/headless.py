@@ -0,0 +1,164 @@
+import os
+import signal
+import threading
+from loguru import logger
+
+from core.config import validate_config
+from core.ipc import ControlServer
+
+class QR2KeyDaemon:
+    """
+    Headless QR2Key service without GUI or menu bar.
+    Connects to the configured scanners and keeps them connected until
+    SIGTERM/SIGINT, reconnecting whenever a new port appears or the reader
+    reports that its ports were closed.
+    
+    This is the only process that opens serial ports. With a control socket
+    it also serves the GUI and tray, which run as thin clients (see
+    core.remote_reader): they send commands and receive the reader's events.
+    Disconnecting from a front end pauses automatic connecting until a front
+    end connects again.
+    """
+    
+    def __init__(self, serial_reader, log_path, control_path=None):
+        """
+        Initialize the daemon.
+        
+        Args:
+            serial_reader: SerialReader instance
+            log_path: Path to log file
+            control_path: Optional Unix socket path for front ends
+        """
+        self.serial_reader = serial_reader
+        self.log_path = log_path
+        self.port_watcher = serial_reader.port_watcher
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
+        self.connect_lock = threading.Lock()
+        self.paused = False
+        self.control = ControlServer(control_path, self.handle_command) if control_path else None
+    
+    def start(self, on_ready=None):
+        """
+        Run until a termination signal arrives.
+        
+        Args:
+            on_ready: Optional callable invoked once the first connection attempt
+                      has been made; returning True stops the daemon
+        """
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+        
+        if self.port_watcher:
+            self.port_watcher.subscribe(self._on_ports_changed)
+        self.serial_reader.events.subscribe(self._on_disconnected, ('disconnected',))
+        if self.control and self.control.start():
+            self.serial_reader.events.subscribe(self.control.publish)
+        
+        logger.info("Headless daemon started")
+        first_attempt = True
+        
+        while not self.stop_event.is_set():
+            with self.connect_lock:
+                idle = not (self.paused or self.serial_reader.is_connected or self.serial_reader.is_reconnecting)
+                if idle:
+                    if self.serial_reader.connect():
+                        logger.info("Headless daemon connected")
+                    else:
+                        logger.info("Headless daemon waiting for a scanner")
+            
+            if first_attempt:
+                first_attempt = False
+                if on_ready and on_ready():
+                    break
+            
+            self.wake_event.wait()
+            self.wake_event.clear()
+        
+        if self.control:
+            self.serial_reader.events.unsubscribe(self.control.publish)
+            self.control.stop()
+        if self.port_watcher:
+            self.port_watcher.unsubscribe(self._on_ports_changed)
+        self.serial_reader.events.unsubscribe(self._on_disconnected)
+        if self.serial_reader.is_connected or self.serial_reader.is_reconnecting:
+            self.serial_reader.disconnect()
+        logger.info("Headless daemon stopped")
+    
+    def stop(self):
+        """Ask the daemon loop to exit"""
+        self.stop_event.set()
+        self.wake_event.set()
+    
+    def handle_command(self, command, args):
+        """
+        Execute one control socket command (on a connection thread).
+        
+        Args:
+            command: Command name
+            args: Dictionary of arguments
+        
+        Returns:
+            JSON-serializable result
+        
+        Raises:
+            ValueError: For unknown commands
+        """
+        reader = self.serial_reader
+        if command == 'status':
+            return {
+                'pid': os.getpid(),
+                'connected': reader.is_connected,
+                'reconnecting': reader.is_reconnecting,
+                'paused': self.paused,
+                'ports': sorted(reader.sessions),
+                'stats': reader.get_stats(),
+            }
+        if command == 'config':
+            return reader.config
+        if command == 'ports':
+            return reader.get_available_ports()
+        if command == 'connect':
+            with self.connect_lock:
+                if args.get('baudrate'):
+                    config = dict(reader.config, baudrate=int(args['baudrate']))
+                    validate_config({'serial': config})
+                    reader.apply_config(config)
+                self.paused = False
+                return reader.connect(args.get('port'))
+        if command == 'disconnect':
+            with self.connect_lock:
+                self.paused = True
+                reader.disconnect()
+            return None
+        if command == 'unfinished':
+            return [
+                {'seq': record.seq, 'port': record.port, 'timestamp': record.timestamp}
+                for record in reader.unfinished_records()
+            ]
+        if command == 'recover_spool':
+            # Replaying types every record; answer right away instead of holding the client
+            records = len(reader.unfinished_records())
+            threading.Thread(target=reader.recover_spool, args=(args.get('policy'),), daemon=True).start()
+            return records
+        if command == 'shutdown':
+            logger.info("Shutdown requested over the control socket")
+            self.stop()
+            return None
+        raise ValueError(f"Unknown command: {command}")
+    
+    def _on_signal(self, signum, frame):
+        logger.info(f"Received signal {signum}, shutting down")
+        self.stop()
+    
+    def _on_ports_changed(self, event, info):
+        """Port watcher callback; retry connecting when a port appears"""
+        if self.control:
+            self.control.publish('port', {'change': event, 'port': info})
+        if event == 'added':
+            self.wake_event.set()
+    
+    def _on_disconnected(self, event, info):
+        """Event bus callback; try to connect again once the last port is gone"""
+        if not self.serial_reader.is_connected:
+            self.wake_event.set()
@@ -1,67 +1,160 @@
 
+import time
+
+_START_TIME = time.perf_counter()
+
 import os
-import json
 import sys
+import atexit
+import argparse
 from pathlib import Path
 from loguru import logger
 
-from core.serial_reader import SerialReader
-from platform.mac_typing import MacTyper
-import gui
-import tray
+from core.config import DEFAULT_CONFIG, ConfigWatcher, load_config
+from core.ipc import InstanceLock, tray_lock_path
+from core.log_sink import BatchedFileSink, configure_payload_logging
 
-def setup_logging():
-    """Configure logging with loguru"""
-    log_dir = os.path.expanduser("~/Library/Logs/QR2Key")
-    os.makedirs(log_dir, exist_ok=True)
+# Only the --headless daemon opens serial ports and types; the GUI and tray are
+# thin clients on its control socket. Each process imports only what it runs:
+# the reader stack in the daemon, PySimpleGUI/Tk or rumps/PyObjC in front ends.
+
+def setup_logging(app_config=None):
+    """
+    Configure logging with loguru.
+    
+    Log lines are written by a batching background thread so the serial and
+    typing threads never block on file I/O.
     
-    log_path = os.path.join(log_dir, "app.log")
+    Args:
+        app_config: The "app" section of config.json
+    """
+    app_config = app_config or {}
+    log_path = os.path.expanduser(app_config.get("log_path", "~/Library/Logs/QR2Key/app.log"))
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    
+    configure_payload_logging(app_config.get("log_payload", "truncate"), app_config.get("log_payload_max", 64))
     
     logger.remove()  # Remove default handler
-    logger.add(log_path, rotation="10 MB", level="INFO", 
+    logger.add(BatchedFileSink(log_path), level=str(app_config.get("log_level", "INFO")).upper(),
                format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}")
     
     logger.info("QR2Key application started")
     return log_path
 
-def load_config():
-    """Load configuration from config.json"""
-    try:
-        config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
-        with open(config_path, 'r') as f:
-            config = json.load(f)
-        logger.info("Configuration loaded successfully")
-        return config
-    except Exception as e:
-        logger.error(f"Failed to load configuration: {e}")
-        return {
-            "serial": {
-                "baudrate": 9600,
-                "timeout": 0.05,
-                "encoding": "shift_jis",
-                "error_char": "�"
-            },
-            "app": {
-                "log_path": "~/Library/Logs/QR2Key/app.log",
-                "log_level": "INFO"
-            }
-        }
+def parse_args(argv=None):
+    """Parse command line options; unknown options (e.g. from macOS launch) are ignored"""
+    parser = argparse.ArgumentParser(description="QR2Key")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--tray', action='store_true', help='run as a menu bar app')
+    mode.add_argument('--headless', action='store_true', help='run without GUI or menu bar')
+    parser.add_argument('--exit-when-ready', action='store_true',
+                        help='with --headless: print startup time and exit after the first connection attempt')
+    args, _ = parser.parse_known_args(argv)
+    return args
 
-def main():
-    """Main application entry point"""
-    log_path = setup_logging()
+def run_daemon(config, args, log_path):
+    """
+    Run the ingest daemon: the one process that owns the serial ports.
     
-    config = load_config()
+    A second daemon finds the instance lock held and exits, so two processes
+    never fight over a port or the spool.
+    """
+    app_config = config.get("app", {})
+    control_path = app_config.get("control_socket") or DEFAULT_CONFIG["app"]["control_socket"]
+    lock = InstanceLock(control_path + ".lock")
+    if not lock.acquire():
+        logger.info("QR2Key ingest daemon is already running")
+        if args.exit_when_ready:
+            print("already running", flush=True)
+        return
+    
+    from core.serial_reader import SerialReader
+    from core.metrics import Metrics
+    from core.port_watcher import PortWatcher
+    from core.sinks import create_output
+    from platform_mac.mac_typing import MacTyper
+    import headless
+    
+    metrics_config = config.get("metrics", {})
+    metrics = Metrics(enabled=metrics_config.get("enabled", False))
+    if metrics.enabled and metrics_config.get("serve", True):
+        from core.metrics_server import MetricsServer
+        MetricsServer(metrics, metrics_config.get("port", 9464), metrics_config.get("unix_socket")).start()
+    
+    typer = MacTyper(config.get("typing", {}), metrics=metrics)
+    port_watcher = PortWatcher(config["serial"].get("port_poll_interval", 2.0))
+    port_watcher.start()
+    output = create_output(config.get("output", {}).get("sinks"), typer)
+    serial_reader = SerialReader(output, config["serial"], metrics, port_watcher)
+    if serial_reader.io_process is not None:
+        atexit.register(serial_reader.io_process.stop)
+    if serial_reader.spool is not None:
+        atexit.register(serial_reader.spool.close)
+    if output is not typer:
+        # Runs before the spool closes: sinks mark records done as they write them
+        atexit.register(output.close)
+    
+    # With "ask" the records are kept until a GUI client asks the operator
+    serial_reader.recover_spool(config["serial"].get("spool_replay", "ask"))
     
-    typer = MacTyper()
-    serial_reader = SerialReader(typer, config["serial"])
+    if app_config.get("config_reload", True):
+        def on_config_changed(new_config):
+            serial_reader.apply_config(new_config["serial"])
+            typer.apply_config(new_config.get("typing", {}))
+        
+        ConfigWatcher(on_config_changed, poll_interval=app_config.get("config_poll_interval", 1.0)).start()
     
-    if len(sys.argv) > 1 and sys.argv[1] == "--tray":
+    def on_ready():
+        elapsed = time.perf_counter() - _START_TIME
+        logger.info(f"Ready to scan {elapsed:.3f}s after start")
+        if args.exit_when_ready:
+            print(f"ready {elapsed:.6f}", flush=True)
+        return args.exit_when_ready
+    
+    app = headless.QR2KeyDaemon(serial_reader, log_path, control_path)
+    app.start(on_ready)
+
+def run_front_end(config, args, log_path):
+    """Run the GUI or the menu bar app as a thin client of the ingest daemon (started if needed)"""
+    control_path = config.get("app", {}).get("control_socket") or DEFAULT_CONFIG["app"]["control_socket"]
+    if args.tray:
+        tray_lock = InstanceLock(tray_lock_path(control_path))
+        if not tray_lock.acquire():
+            logger.info("QR2Key menu bar app is already running")
+            return
+    
+    from core.remote_reader import RemoteReader
+    try:
+        serial_reader = RemoteReader.attach(control_path)
+    except (OSError, RuntimeError, ValueError) as e:
+        logger.error(f"Could not reach the QR2Key ingest daemon: {e}")
+        sys.exit(1)
+    
+    if args.tray:
+        import tray
         app = tray.QR2KeyTray(serial_reader, log_path)
         app.run()
     else:
+        import gui
         app = gui.QR2KeyApp(serial_reader, log_path)
         app.start()
 
+def main():
+    """Main application entry point"""
+    args = parse_args()
+    
+    config = load_config()
+    
+    log_path = setup_logging(config.get("app", {}))
+    
+    if args.headless:
+        run_daemon(config, args, log_path)
+    else:
+        run_front_end(config, args, log_path)
+
 if __name__ == "__main__":
+    if getattr(sys, 'frozen', False):
+        # The bundled app re-executes itself for the read_mode "process" child
+        import multiprocessing
+        multiprocessing.freeze_support()
     main()
@@ -0,0 +1,162 @@
+
+import time
+from pynput.keyboard import Controller, Key
+from loguru import logger
+
+from core.pacing import KeystrokePacer
+from core.keystroke_plan import PRESS, RELEASE, PAUSE_BATCH, PlanCache, compile_plan
+from core.metrics import Metrics
+from core.log_sink import payload_preview
+
+class MacTyper:
+    """
+    Handles keyboard emulation for macOS.
+    Types decoded text at the current cursor position.
+    
+    Records are compiled into keystroke plans that are cached by payload, so a
+    repeated scan replays ready-made press/release events.
+    """
+    
+    def __init__(self, config=None, controller=None, metrics=None):
+        """
+        Initialize the keyboard controller.
+        
+        Args:
+            config: Optional typing configuration dictionary (delays, batch size, plan cache size)
+            controller: Optional keyboard controller, e.g. a fake for tests and benchmarks
+            metrics: Optional Metrics instance for typing counters
+        """
+        self.keyboard = controller or Controller()
+        self.pacer = KeystrokePacer(config)
+        self.metrics = metrics or Metrics()
+        self.metrics.gauge('typing_chars_per_second', lambda: self.pacer.chars_per_second)
+        self.metrics.register_counters('typing_errors')
+        
+        cache_size = (config or {}).get('plan_cache_size', 256)
+        self.plans = PlanCache(cache_size) if cache_size > 0 else None
+        if self.plans is not None:
+            self.metrics.register_counters('typing_plan_cache_hits', 'typing_plan_cache_misses')
+        self.special_keys = {'\t': Key.tab}
+        self._pending_pacer = None
+        logger.info("MacTyper initialized")
+    
+    def apply_config(self, config):
+        """
+        Use new typing delays and batch size from the next record on.
+        
+        Args:
+            config: Typing configuration dictionary
+        """
+        self._pending_pacer = KeystrokePacer(config)
+    
+    def type_text(self, text):
+        """
+        Type the given text at the current cursor position.
+        Preserves all line breaks and special characters.
+        
+        Args:
+            text: The text to type
+        
+        Returns:
+            bool: False if typing failed part-way, True otherwise
+        """
+        if not text:
+            return True
+        
+        if self._pending_pacer is not None:
+            self.pacer, self._pending_pacer = self._pending_pacer, None
+        
+        try:
+            start = time.perf_counter()
+            
+            if self.plans is not None:
+                self._replay(self._get_plan(text))
+            else:
+                self._type_lines(text)
+            
+            self.pacer.record(len(text), time.perf_counter() - start)
+            logger.info("Successfully typed text ({} characters)", len(text))
+            return True
+        except Exception as e:
+            self.metrics.inc('typing_errors')
+            logger.error(f"Error typing text: {e}")
+            return False
+    
+    def _type_lines(self, text):
+        """Type text line by line through the controller's type() (no plan cache)"""
+        lines = text.split('\n')
+        
+        for i, line in enumerate(lines):
+            if line:
+                batches = self.pacer.batches(line)
+                for j, batch in enumerate(batches):
+                    self.keyboard.type(batch)
+                    if j < len(batches) - 1:
+                        self.pacer.after_batch()
+                logger.opt(lazy=True).debug("Typed line: {}", lambda: payload_preview(line))
+            
+            if i < len(lines) - 1:
+                self.keyboard.press(Key.enter)
+                self.keyboard.release(Key.enter)
+                logger.debug("Pressed Enter key")
+            
+            self.pacer.after_line()
+    
+    def _get_plan(self, text):
+        """Return the cached keystroke plan for text, compiling it on a miss"""
+        key = PlanCache.key_for(text, self.pacer.effective_batch_size)
+        plan = self.plans.get(key)
+        if plan is None:
+            self.metrics.inc('typing_plan_cache_misses')
+            plan = compile_plan(text, self.pacer, Key.enter, self.special_keys)
+            self.plans.put(key, plan)
+        else:
+            self.metrics.inc('typing_plan_cache_hits')
+        return plan
+    
+    def _replay(self, plan):
+        """Send a keystroke plan's events to the controller"""
+        press = self.keyboard.press
+        release = self.keyboard.release
+        
+        for action, key in plan.events:
+            if action == PRESS:
+                press(key)
+            elif action == RELEASE:
+                release(key)
+            elif action == PAUSE_BATCH:
+                self.pacer.after_batch()
+            else:
+                self.pacer.after_line()
+    
+    def type_key(self, key):
+        """
+        Type a specific key.
+        
+        Args:
+            key: The key to type (from pynput.keyboard.Key)
+        """
+        try:
+            self.keyboard.press(key)
+            self.keyboard.release(key)
+            logger.debug("Pressed key: {}", key)
+        except Exception as e:
+            self.metrics.inc('typing_errors')
+            logger.error(f"Error typing key: {e}")
+    
+    @property
+    def chars_per_second(self):
+        """Average typing throughput so far"""
+        return self.pacer.chars_per_second
+    
+    def get_stats(self):
+        """
+        Get typing throughput and plan cache counters.
+        
+        Returns:
+            Dictionary of pacing and cache statistics
+        """
+        stats = self.pacer.get_stats()
+        if self.plans is not None:
+            stats['plan_cache'] = self.plans.get_stats()
+        return stats
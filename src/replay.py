@@ -0,0 +1,47 @@
+import sys
+import argparse
+from loguru import logger
+
+from core.config import load_config
+from core.serial_reader import SerialReader
+from core.capture import replay
+
+class PrintTyper:
+    """Writes records to stdout instead of typing them"""
+    
+    def type_text(self, text):
+        sys.stdout.write(text if text.endswith('\n') else text + '\n')
+        sys.stdout.flush()
+
+def main():
+    """Replay a capture file through the framing/decoding/typing path"""
+    parser = argparse.ArgumentParser(description="Replay a QR2Key serial capture file")
+    parser.add_argument('trace', help='capture file written with serial.capture_path')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='playback speed multiplier (0 = as fast as possible)')
+    parser.add_argument('--type', action='store_true',
+                        help='type records with MacTyper instead of printing them')
+    args = parser.parse_args()
+    
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    
+    config = load_config()
+    
+    if args.type:
+        from platform_mac.mac_typing import MacTyper
+        typer = MacTyper(config.get("typing", {}))
+    else:
+        typer = PrintTyper()
+    
+    serial_config = dict(config["serial"])
+    serial_config.pop('capture_path', None)
+    serial_config.pop('spool_path', None)
+    reader = SerialReader(typer, serial_config)
+    
+    chunks = replay(args.trace, reader, args.speed)
+    reader.wait_idle()
+    print(f"Replayed {chunks} chunks, {reader.records_enqueued} records", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,18 @@ import os
 import sys
 import subprocess
 import rumps
+from PyObjCTools import AppHelper
 from loguru import logger
 
+from core.ipc import launch_command
+
 class QR2KeyTray(rumps.App):
     """
     macOS menu bar application for QR2Key.
     Provides menu options for connection control and application management.
+    
+    Connection state and scan statistics follow SerialReader's event bus;
+    updates are moved to the main (AppKit) thread with AppHelper.callAfter.
     """
     
     def __init__(self, serial_reader, log_path):
@@ -16,18 +22,25 @@ class QR2KeyTray(rumps.App):
         Initialize the tray application.
         
         Args:
-            serial_reader: SerialReader instance
+            serial_reader: RemoteReader attached to the ingest daemon
             log_path: Path to log file
         """
         super(QR2KeyTray, self).__init__("QR2Key", icon=None)
         
         self.serial_reader = serial_reader
         self.log_path = log_path
+        self.last_latency = None
+        
+        # Keep the items: menu lookups go by the original title, which changes
+        self.status_item = rumps.MenuItem("接続状態: 未接続", callback=None)
+        self.stats_item = rumps.MenuItem("スキャン: -", callback=None)
+        self.connect_item = rumps.MenuItem("接続開始", callback=self.toggle_connection)
         
         self.menu = [
-            rumps.MenuItem("接続状態: 未接続", callback=None),
+            self.status_item,
+            self.stats_item,
             None,  # Separator
-            rumps.MenuItem("接続開始", callback=self.toggle_connection),
+            self.connect_item,
             rumps.MenuItem("ログを開く", callback=self.open_log),
             rumps.MenuItem("設定を開く", callback=self.open_settings),
             None,  # Separator
@@ -36,21 +49,52 @@ class QR2KeyTray(rumps.App):
             rumps.MenuItem("終了", callback=self.quit_app)
         ]
         
+        self.serial_reader.events.subscribe(self._on_reader_event)
         self._update_connection_status()
     
     def _update_connection_status(self):
         """Update the connection status in the menu"""
         if self.serial_reader.is_connected:
-            self.menu["接続状態: 未接続"].title = "接続状態: 接続済み"
-            self.menu["接続開始"].title = "接続停止"
+            self.status_item.title = "接続状態: 接続済み"
+            self.connect_item.title = "接続停止"
+        elif self.serial_reader.is_reconnecting:
+            self.status_item.title = "接続状態: 再接続中"
+            self.connect_item.title = "接続停止"
         else:
-            self.menu["接続状態: 接続済み"].title = "接続状態: 未接続"
-            self.menu["接続開始"].title = "接続開始"
+            self.status_item.title = "接続状態: 未接続"
+            self.connect_item.title = "接続開始"
+    
+    def _on_reader_event(self, event, info):
+        """Event bus callback (reader threads); hands the update to the main thread"""
+        if event == 'record':
+            # Shown with the next throughput tick instead of one UI update per scan
+            self.last_latency = info['latency']
+            return
+        AppHelper.callAfter(self._apply_reader_event, event, info)
+    
+    def _apply_reader_event(self, event, info):
+        """Update the menu for one reader event (main thread)"""
+        if event == 'throughput':
+            title = f"スキャン: {info['records_per_second']:.1f} 件/秒"
+            if self.last_latency is not None:
+                title += f"（最終 {self.last_latency * 1000:.1f} ms）"
+            self.stats_item.title = title
+            return
+        
+        if event == 'lost':
+            rumps.notification(
+                title="QR2Key",
+                subtitle="接続エラー",
+                message=f"{info['device']} との接続が切れました。再接続しています。"
+            )
+        elif event == 'error' and info.get('fatal'):
+            rumps.notification(title="QR2Key", subtitle="エラー", message=info['message'])
+        self._update_connection_status()
     
     @rumps.clicked("接続開始")
     def toggle_connection(self, sender):
         """Toggle serial connection"""
-        if self.serial_reader.is_connected:
+        if self.serial_reader.is_connected or self.serial_reader.is_reconnecting:
             self.serial_reader.disconnect()
             logger.info("Disconnected from serial port via menu bar")
         else:
@@ -83,8 +127,7 @@ class QR2KeyTray(rumps.App):
     def open_settings(self, _):
         """Open the settings GUI"""
         try:
-            app_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "main.py"))
-            subprocess.Popen([sys.executable, app_path])
+            subprocess.Popen(launch_command(), start_new_session=True)
             logger.info("Opened settings GUI")
         except Exception as e:
             logger.error(f"Failed to open settings: {e}")
@@ -165,9 +208,9 @@ class QR2KeyTray(rumps.App):
     
     @rumps.clicked("終了")
     def quit_app(self, _):
-        """Quit the application"""
-        if self.serial_reader.is_connected:
-            self.serial_reader.disconnect()
+        """Quit the application, stopping the ingest daemon with it"""
+        self.serial_reader.events.unsubscribe(self._on_reader_event)
+        self.serial_reader.shutdown()
         
         logger.info("Application exiting via menu bar")
         rumps.quit_application()
@@ -0,0 +1,138 @@
+import os
+import json
+import random
+import threading
+import time
+
+import pytest
+
+from core.config import ConfigWatcher
+from core.framing import TerminatorFramer
+from core.serial_reader import SerialReader
+
+pty = pytest.importorskip('pty')
+tty = pytest.importorskip('tty')
+
+
+class RecordingTyper:
+    def __init__(self):
+        self.texts = []
+    
+    def type_text(self, text):
+        self.texts.append(text)
+
+
+def split(data, positions):
+    bounds = [0, *positions, len(data)]
+    return [data[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def reload_mid_record(chunks):
+    """Start a record with the lf framer, switch to cr, then feed the chunks"""
+    config = {'framer': 'lf', 'dedup_window': 0, 'spool_path': None, 'encoding_detect': False}
+    typer = RecordingTyper()
+    reader = SerialReader(typer, config)
+    session = reader.open_virtual_port('virtual')
+    reader.feed(session, b'AB')
+    reader.apply_config(dict(config, framer='cr'))
+    for chunk in chunks:
+        reader.feed(session, chunk)
+    reader.wait_idle(5.0)
+    return typer.texts, session
+
+
+def test_reload_switches_framer_at_record_boundary():
+    # The pending record ends with the old terminator; everything after it
+    # in the same read is framed with the new one
+    data = b'C\nD\rE\nF\r'
+    for position in range(len(data) + 1):
+        texts, session = reload_mid_record(split(data, [position]))
+        assert texts == ['ABC\n', 'D\n', 'E\nF\n'], position
+        assert isinstance(session.framer, TerminatorFramer)
+        assert session.framer.terminator == b'\r'
+
+
+def test_reload_keeps_old_framer_until_boundary():
+    texts, session = reload_mid_record([b'C\r', b'D'])
+    assert texts == []
+    assert session.framer.terminator == b'\n'
+    assert session.framer.pending == len(b'ABC\rD')
+
+
+def serial_config(step):
+    """The serial section for reload number `step`; every variant frames and decodes the scans alike"""
+    return {
+        'baudrate': (9600, 115200)[step % 2],
+        'timeout': (0.05, 0.2)[step // 2 % 2],
+        'encoding': ('shift_jis', 'cp932')[step // 3 % 2],
+        'framer': ('lf', 'terminator')[step // 5 % 2],
+        'terminator': '\n',
+        'queue_size': 4096,
+        'auto_reconnect': False,
+        'dedup_window': 0,
+        'spool_path': None,
+        'encoding_detect': False,
+    }
+
+
+def write_config(path, config):
+    """Replace the file atomically, as an editor saving it would"""
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        if config is None:
+            f.write('{"serial": {"baudrate": -1')
+        else:
+            json.dump({'serial': config}, f)
+    os.replace(tmp, path)
+
+
+def test_repeated_reloads_while_data_flows(tmp_path):
+    rng = random.Random(1)
+    alphabet = 'ABCDEFGHIJ0123456789アイウエオ患者品番'
+    texts = [f'{seq:05d}:' + ''.join(rng.choice(alphabet) for _ in range(20)) + '\n' for seq in range(400)]
+    stream = b''.join(text.encode('shift_jis') for text in texts)
+    
+    typer = RecordingTyper()
+    reader = SerialReader(typer, serial_config(0))
+    master, slave = pty.openpty()
+    tty.setraw(master)
+    assert reader.connect(os.ttyname(slave))
+    
+    path = str(tmp_path / 'config.json')
+    write_config(path, serial_config(0))
+    watcher = ConfigWatcher(lambda config: reader.apply_config(config['serial']), path, 0.005)
+    watcher.start()
+    
+    def send():
+        # Random chunk sizes split records and double-byte characters across reads
+        pos = 0
+        while pos < len(stream):
+            size = rng.randint(1, 40)
+            os.write(master, stream[pos:pos + size])
+            pos += size
+            time.sleep(0.001)
+    
+    writer = threading.Thread(target=send)
+    writer.start()
+    step = 0
+    try:
+        while writer.is_alive():
+            step += 1
+            # Every few reloads an invalid file must be ignored
+            write_config(path, None if step % 7 == 0 else serial_config(step))
+            time.sleep(0.02)
+        writer.join()
+        deadline = time.monotonic() + 5.0
+        while len(typer.texts) < len(texts) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        reader.wait_idle(2.0)
+    finally:
+        watcher.stop()
+        reader.disconnect()
+        os.close(master)
+        os.close(slave)
+    
+    assert step > 10
+    assert reader.config_reloads > 5
+    assert watcher.error_count > 0
+    assert typer.texts == texts
@@ -0,0 +1,77 @@
+import itertools
+
+import pytest
+
+from core.framing import RecordDecoder
+
+# (encoding, text) pairs with multi-byte characters whose bytes can be split by a read
+CASES = {
+    'shift_jis': ('shift_jis', '患者ID: 山田 太郎\nｶﾅ 123\n'),
+    'cp932': ('cp932', '患者ID①～Ⅱ ﾃｽﾄ\n髙橋\n'),
+}
+
+
+def decode(encoding, chunks):
+    """Decode chunks one by one, then flush the decoder"""
+    decoder = RecordDecoder(encoding)
+    text = ''.join(decoder.decode(chunk) for chunk in chunks)
+    text += decoder.decode(b'', final=True)
+    assert not decoder.pending
+    return text, decoder.replacements
+
+
+def split(data, positions):
+    bounds = [0, *positions, len(data)]
+    return [data[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_every_split_position(name):
+    encoding, text = CASES[name]
+    data = text.encode(encoding)
+    expected = RecordDecoder(encoding).decode(data, final=True)
+    assert expected == text
+    for position in range(len(data) + 1):
+        assert decode(encoding, split(data, [position])) == (expected, 0), position
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_every_pair_of_split_positions(name):
+    encoding, text = CASES[name]
+    data = text.encode(encoding)
+    for positions in itertools.combinations_with_replacement(range(len(data) + 1), 2):
+        assert decode(encoding, split(data, positions)) == (text, 0), positions
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_byte_by_byte(name):
+    encoding, text = CASES[name]
+    data = text.encode(encoding)
+    assert decode(encoding, [data[i:i + 1] for i in range(len(data))]) == (text, 0)
+
+
+def test_pending_holds_split_lead_byte():
+    decoder = RecordDecoder('cp932')
+    data = '①'.encode('cp932')
+    assert decoder.decode(b'A' + data[:1]) == 'A'
+    assert decoder.pending
+    assert decoder.decode(data[1:]) == '①'
+    assert not decoder.pending
+
+
+def test_final_replaces_dangling_lead_byte():
+    decoder = RecordDecoder('shift_jis', error_char='?')
+    assert decoder.decode('患'.encode('shift_jis')[:1]) == ''
+    assert decoder.pending
+    assert decoder.decode(b'', final=True) == '?'
+    assert not decoder.pending
+    assert decoder.replacements == 1
+
+
+def test_reset_drops_pending_lead_byte():
+    decoder = RecordDecoder('shift_jis')
+    decoder.decode('患'.encode('shift_jis')[:1])
+    decoder.reset()
+    assert not decoder.pending
+    assert decoder.decode(b'AB') == 'AB'
+    assert decoder.replacements == 0
@@ -0,0 +1,102 @@
+import itertools
+
+import pytest
+
+from core.framing import (
+    IdleGapFramer, LengthPrefixedFramer, StxEtxFramer, TerminatorFramer, create_framer
+)
+
+# (framer factory, stream, records expected from feeding the stream and flushing)
+CASES = {
+    'lf': (
+        lambda: TerminatorFramer(b'\n'),
+        b'ABC\nDE\n\nF\nG',
+        [b'ABC\n', b'DE\n', b'\n', b'F\n', b'G'],
+    ),
+    'crlf': (
+        lambda: TerminatorFramer(b'\r\n'),
+        b'AB\r\nC\r\n\r\nD\rE\r\n\r',
+        [b'AB\n', b'C\n', b'\n', b'D\rE\n', b'\r'],
+    ),
+    'custom_terminator': (
+        lambda: TerminatorFramer(b'<END>', b'|'),
+        b'A<END>B<E<END><EN<END>',
+        [b'A|', b'B<E|', b'<EN|'],
+    ),
+    'stx_etx': (
+        lambda: StxEtxFramer(),
+        b'junk\x02AB\x03x\x02\x03\x02CD\x03\x02E',
+        [b'AB\n', b'\n', b'CD\n', b'E'],
+    ),
+    'length_prefixed': (
+        lambda: LengthPrefixedFramer(2, 'big'),
+        b'\x00\x03ABC\x00\x00\x00\x01D\x00\x05EF',
+        [b'ABC\n', b'\n', b'D\n', b'EF'],
+    ),
+    'idle_gap': (
+        lambda: IdleGapFramer(),
+        b'AB\nC\x02D',
+        [b'AB\nC\x02D'],
+    ),
+}
+
+
+def frame(factory, chunks):
+    """Feed chunks one by one, checking partial() at every step, then flush"""
+    framer = factory()
+    records = []
+    pending_prefix = b''
+    for chunk in chunks:
+        completed = framer.feed(chunk)
+        if completed:
+            assert completed[0].startswith(pending_prefix)
+        records.extend(completed)
+        pending_prefix = framer.partial()
+    rest = framer.flush()
+    assert rest.startswith(pending_prefix)
+    if rest:
+        records.append(rest)
+    assert framer.pending == 0
+    return records
+
+
+def split(data, positions):
+    bounds = [0, *positions, len(data)]
+    return [data[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_whole_stream(name):
+    factory, data, expected = CASES[name]
+    assert frame(factory, [data]) == expected
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_every_split_position(name):
+    factory, data, expected = CASES[name]
+    for position in range(len(data) + 1):
+        assert frame(factory, split(data, [position])) == expected, position
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_every_pair_of_split_positions(name):
+    factory, data, expected = CASES[name]
+    for positions in itertools.combinations_with_replacement(range(len(data) + 1), 2):
+        assert frame(factory, split(data, positions)) == expected, positions
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_byte_by_byte(name):
+    factory, data, expected = CASES[name]
+    assert frame(factory, [data[i:i + 1] for i in range(len(data))]) == expected
+
+
+def test_create_framer_names():
+    assert isinstance(create_framer({}), TerminatorFramer)
+    assert create_framer({'framer': 'crlf'}).terminator == b'\r\n'
+    assert isinstance(create_framer({'framer': 'stx_etx'}), StxEtxFramer)
+    assert isinstance(create_framer({'framer': 'length_prefixed'}), LengthPrefixedFramer)
+    assert isinstance(create_framer({'framer': 'idle_gap'}), IdleGapFramer)
+    with pytest.raises(ValueError):
+        create_framer({'framer': 'bogus'})
+
@@ -0,0 +1,99 @@
+import os
+import time
+
+import pytest
+
+from core.serial_reader import SerialReader
+
+pty = pytest.importorskip('pty')
+tty = pytest.importorskip('tty')
+
+# Split inside a record and inside the double-byte character '患'
+RECORD = 'HELLO-患者ID\n'.encode('shift_jis')
+SPLIT = RECORD.index('患'.encode('shift_jis')) + 1
+
+CONFIG = {
+    'framer': 'lf', 'encoding': 'shift_jis', 'dedup_window': 0, 'spool_path': None,
+    'encoding_detect': False, 'timeout': 0.3,
+    'reconnect_initial_delay': 0.05, 'reconnect_max_delay': 0.2,
+}
+
+
+class RecordingTyper:
+    def __init__(self):
+        self.texts = []
+    
+    def type_text(self, text):
+        self.texts.append(text)
+
+
+def plug(link):
+    """Create a pty and point `link` at its slave side"""
+    master, slave = pty.openpty()
+    tty.setraw(master)
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.ttyname(slave), link)
+    return master, slave
+
+
+def unplug(link, master, slave):
+    os.close(master)
+    os.close(slave)
+    os.remove(link)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+@pytest.fixture
+def scanner(tmp_path):
+    """A reader connected to a pty behind a symlink, as a scanner under a stable /dev path"""
+    link = str(tmp_path / 'scanner0')
+    ends = list(plug(link))
+    typer = RecordingTyper()
+    reader = SerialReader(typer, dict(CONFIG))
+    assert reader.connect(link)
+    yield link, ends, reader, typer
+    reader.disconnect()
+    for fd in ends:
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+
+def test_record_survives_delete_and_recreate(scanner):
+    link, ends, reader, typer = scanner
+    for cycle in range(3):
+        typer.texts.clear()
+        os.write(ends[0], RECORD[:SPLIT])
+        time.sleep(0.05)
+        unplug(link, *ends)
+        assert wait_until(lambda: reader.is_reconnecting), cycle
+        time.sleep(0.1)
+        
+        ends[:] = plug(link)
+        assert wait_until(lambda: reader.is_connected), cycle
+        os.write(ends[0], RECORD[SPLIT:])
+        assert wait_until(lambda: typer.texts), cycle
+        reader.wait_idle(2.0)
+        assert typer.texts == ['HELLO-患者ID\n'], cycle
+
+
+def test_disconnect_cancels_reconnect(scanner):
+    link, ends, reader, typer = scanner
+    unplug(link, *ends)
+    assert wait_until(lambda: reader.is_reconnecting)
+    reader.disconnect()
+    
+    ends[:] = plug(link)
+    time.sleep(0.5)
+    assert not reader.is_connected
+    assert not reader.sessions